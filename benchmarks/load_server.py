@@ -0,0 +1,173 @@
+"""Load test of the agenda server (``smart-agenda serve``) with thousands of running agendas.
+
+The server runs in a separate process. Clients open the agendas, subscribe to all of them and move random agendas to
+the next or previous item at a fixed rate, while the server pushes the updates of every agenda once per second.
+Command latency, pushed updates and the CPU time of the server are reported.
+
+Usage:
+    $ python benchmarks/load_server.py --rooms 5000 --clients 50 --rate 500 --duration 10
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import multiprocessing
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+from smart_agenda.profiling import Histogram
+from smart_agenda.server import AgendaServer, parse_address
+
+AGENDA = "# Load Test\n" + "".join(f"Item {idx} {idx % 10 + 1}:00\n" for idx in range(10))
+
+
+def run_server(address: str, ready, loaded, stop, results):
+    """Serve until *stop* is set, then report the CPU time and loop lag (in µs) of the server since *loaded* was set.
+
+    The loop lag is how much later than requested a sleeping task is resumed, i.e. how long a command may have to wait
+    until the server gets to it.
+    """
+
+    async def serve():
+        server = AgendaServer()
+        await server.start(address)
+        ready.set()
+        while not loaded.is_set():
+            await asyncio.sleep(0.01)
+        cpu_start = time.process_time()
+        lag = Histogram()
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag.record(round((time.perf_counter() - start - 0.001) * 1e6))
+        results.put({"cpu": time.process_time() - cpu_start, "lag": lag, "updates_dropped": server.updates_dropped})
+
+    asyncio.run(serve())
+
+
+class LoadClient:
+    """Client connection that counts pushed updates and records the latency of its commands (in µs)."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, latency: Histogram):
+        self.reader = reader
+        self.writer = writer
+        self.latency = latency
+        self.pushed = 0
+        self.errors = 0
+        self._pending: dict[int, tuple[float, asyncio.Future]] = {}
+        self._next_id = 0
+        self._task = asyncio.get_running_loop().create_task(self._read())
+
+    async def request(self, cmd: str, **params):
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = (time.perf_counter(), future)
+        self.writer.write(json.dumps({"id": self._next_id, "cmd": cmd, **params}).encode() + b"\n")
+        return await future
+
+    async def _read(self):
+        async for line in self.reader:
+            if line.startswith(b'{"room"'):
+                # pushed update, which are not parsed to keep the load generator fast
+                self.pushed += 1
+                continue
+            message = json.loads(line)
+            start, future = self._pending.pop(message["id"])
+            self.latency.record(round((time.perf_counter() - start) * 1e6))
+            self.errors += not message["ok"]
+            future.set_result(message)
+
+    def close(self):
+        self._task.cancel()
+        self.writer.close()
+
+
+async def run_load(address: str, n_rooms: int, n_clients: int, rate: float, duration: float, loaded) -> dict:
+    _, path = parse_address(address)
+    latency = Histogram()
+    clients = []
+    for _ in range(n_clients):
+        reader, writer = await asyncio.open_unix_connection(path, limit=2**20)
+        clients.append(LoadClient(reader, writer, latency))
+    rooms = [f"room-{idx}" for idx in range(n_rooms)]
+    for idx, room in enumerate(rooms):
+        client = clients[idx % n_clients]
+        await client.request("open", room=room, content=AGENDA)
+        await client.request("subscribe", room=room)
+        await client.request("next", room=room)
+    setup_latency = latency.percentile(50)
+
+    # only report the latency under load
+    latency = Histogram()
+    for client in clients:
+        client.latency = latency
+    pushed_start = sum(client.pushed for client in clients)
+    rng = random.Random(0)
+    loaded.set()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    n_commands = 0
+    while time.perf_counter() - start < duration:
+        client = rng.choice(clients)
+        room = rng.choice(rooms)
+        asyncio.get_running_loop().create_task(client.request(rng.choice(("next", "previous")), room=room))
+        n_commands += 1
+        await asyncio.sleep(max(start + n_commands / rate - time.perf_counter(), 0))
+    await asyncio.sleep(0.5)  # wait for the last responses
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    for client in clients:
+        client.close()
+    return {
+        "setup_latency_p50": setup_latency,
+        "commands": n_commands,
+        "errors": sum(client.errors for client in clients),
+        "latency": latency,
+        "pushes_per_second": (sum(client.pushed for client in clients) - pushed_start) / elapsed,
+        "elapsed": elapsed,
+        "cpu": cpu,
+    }
+
+
+@click.command()
+@click.option("--rooms", "n_rooms", default=5000, show_default=True, help="Number of running agendas.")
+@click.option("--clients", "n_clients", default=50, show_default=True, help="Number of client connections.")
+@click.option("--rate", default=500.0, show_default=True, help="Commands per second (next or previous).")
+@click.option("--duration", default=10.0, show_default=True, help="Seconds to run the load.")
+def main(n_rooms, n_clients, rate, duration):
+    ctx = multiprocessing.get_context("spawn")
+    ready, loaded, stop, results = ctx.Event(), ctx.Event(), ctx.Event(), ctx.Queue()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        address = f"unix:{Path(tmp_dir) / 'server.sock'}"
+        server = ctx.Process(target=run_server, args=(address, ready, loaded, stop, results))
+        server.start()
+        try:
+            if not ready.wait(10):
+                raise click.ClickException("server did not start")
+            load = asyncio.run(run_load(address, n_rooms, n_clients, rate, duration, loaded))
+        finally:
+            stop.set()
+        server_results = results.get(timeout=10)
+        server.join()
+
+    latency: Histogram = load["latency"]
+    click.echo(f"{n_rooms} agendas, {n_clients} clients, {load['commands'] / load['elapsed']:.0f} commands/s")
+    click.echo(f"setup latency p50: {load['setup_latency_p50']} µs (open, subscribe, next)")
+    click.echo(
+        f"command latency: p50 {latency.percentile(50)} µs, p90 {latency.percentile(90)} µs, "
+        f"p99 {latency.percentile(99)} µs, max {latency.max} µs ({load['errors']} errors)"
+    )
+    lag: Histogram = server_results["lag"]
+    click.echo(f"server loop lag: p50 {lag.percentile(50)} µs, p90 {lag.percentile(90)} µs, max {lag.max} µs")
+    click.echo(f"pushed updates: {load['pushes_per_second']:.0f}/s ({server_results['updates_dropped']} dropped)")
+    for name, cpu in (("server", server_results["cpu"]), ("clients", load["cpu"])):
+        click.echo(f"{name} CPU: {cpu:.2f} s in {load['elapsed']:.1f} s ({100 * cpu / load['elapsed']:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
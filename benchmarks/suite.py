@@ -0,0 +1,330 @@
+"""Benchmark suite for the hot paths of smart-agenda.
+
+Results are written as JSON and compared against a previously saved baseline. As timings depend on the machine, a
+baseline should be saved on the same machine that later runs the comparison.
+
+Usage:
+    # run all benchmarks and compare against baseline (if there is one)
+    $ nox -s benchmark
+    # save results as new baseline
+    $ nox -s benchmark -- --save-baseline
+    # only run benchmarks whose name contains "loads"
+    $ nox -s benchmark -- -k loads
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import io
+import json
+import platform
+import random
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, ContextManager, Union
+
+import click
+from rich.console import Console
+
+from smart_agenda.cache import AgendaCache
+from smart_agenda.cli_output import (
+    RunningAgendaRenderer,
+    max_rows_for,
+    render_completed_agenda,
+    render_running_agenda,
+)
+from smart_agenda.clock import VirtualClock
+from smart_agenda.history import History, item_stats
+from smart_agenda.lib import Agenda, AgendaItem, format_td, parse_duration
+from smart_agenda.replay import replay, synthetic_events
+from smart_agenda.util import get_filepath
+
+BENCHMARKS_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BENCHMARKS_DIR / "baseline.json"
+DEFAULT_OUTPUT = BENCHMARKS_DIR.parent / "build" / "benchmarks.json"
+DEFAULT_TOLERANCE = 0.25
+"""Relative slowdown compared to the baseline that is reported as regression."""
+
+
+def make_content(n_items: int) -> str:
+    """Create agenda content with *n_items* items and some non-item lines."""
+    lines = ["# Benchmark Agenda", ""]
+    for idx in range(n_items):
+        lines.append(f"- Item {idx} ({idx % 30 + 1}:{idx % 60:02})")
+        if idx % 10 == 0:
+            lines.append("Notes that mention a duration (1:00) but are no agenda item.")
+    return "\n".join(lines) + "\n"
+
+
+def make_agenda(n_items: int, running: bool = True) -> Agenda:
+    """Create an agenda with *n_items* items, where the middle item is active (if *running*)."""
+    agenda = Agenda.loads(make_content(n_items))
+    if running:
+        for _ in range(n_items // 2 + 1):
+            agenda.to_next()
+    return agenda
+
+
+# Each benchmark sets up its data and returns the function to measure. Benchmarks that need files return a context
+# manager that provides the function, so their temporary directory is removed after the measurement.
+
+
+def bench_loads(n_items: int):
+    content = make_content(n_items)
+    return lambda: Agenda.loads(content)
+
+
+@contextlib.contextmanager
+def bench_load_many(n_agendas: int, n_items: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp = Path(tmp_dir) / "bundle.md"
+        content = make_content(n_items)
+        fp.write_text("".join(content.replace("# Benchmark Agenda", f"# Meeting {idx}") for idx in range(n_agendas)))
+
+        def load_one():
+            with Agenda.load_many(fp) as bundle:
+                return bundle[n_agendas // 2]
+
+        yield load_one
+
+
+@contextlib.contextmanager
+def bench_cached_load(n_items: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = Path(tmp_dir) / ".cache"
+        content = make_content(n_items)
+        AgendaCache(cache_dir).loads(content)
+        yield lambda: AgendaCache(cache_dir).loads(content)
+
+
+def bench_parse_duration():
+    durations = [f"{m}:{s:02}" for m in range(60) for s in range(60)] + ["1:30:00", "90m", "1h30", "45s"]
+    parse = parse_duration.__wrapped__  # measure parsing itself instead of the cache
+    return lambda: [parse(duration) for duration in durations]
+
+
+def bench_parse_duration_cached():
+    """Parse durations drawn from a few distinct values, like those of real-world agendas."""
+    rng = random.Random(0)
+    values = [f"{m}:{s:02}" for m in range(1, 31) for s in (0, 30)]
+    durations = [rng.choice(values) for _ in range(10_000)]
+    return lambda: [parse_duration(duration) for duration in durations]
+
+
+def parse_duration_strptime(duration: str) -> timedelta:
+    """Previous implementation of duration parsing, for comparison with :func:`parse_duration`."""
+    if len(duration) <= 5:
+        time = datetime.strptime(duration, "%M:%S")
+    else:
+        time = datetime.strptime(duration, "%H:%M:%S")
+    return timedelta(hours=time.hour, minutes=time.minute, seconds=time.second)
+
+
+def bench_parse_duration_strptime():
+    durations = [f"{m}:{s:02}" for m in range(60) for s in range(60)] + ["1:30:00"]
+    return lambda: [parse_duration_strptime(duration) for duration in durations]
+
+
+def bench_agenda_item():
+    return lambda: AgendaItem("- Some agenda item ", "12:00")
+
+
+def bench_delta_for(n_items: int):
+    agenda = make_agenda(n_items)
+    return lambda: agenda.delta_for(n_items)
+
+
+def bench_transition(n_items: int):
+    agenda = make_agenda(n_items)
+
+    def transition():
+        agenda.to_next()
+        agenda.to_previous()
+
+    return transition
+
+
+def bench_render_running_agenda(n_items: int):
+    agenda = make_agenda(n_items)
+    return lambda: render_running_agenda(agenda)
+
+
+def bench_running_agenda_renderer(n_items: int):
+    renderer = RunningAgendaRenderer(make_agenda(n_items))
+
+    def tick():
+        renderer.update()
+        return renderer.render()
+
+    return tick
+
+
+def bench_uncached_frame(n_items: int):
+    """Format all rows of every frame, for comparison with the row cache of :class:`RunningAgendaRenderer`."""
+    console = Console(file=io.StringIO(), width=80, height=40, force_terminal=True)
+    agenda = make_agenda(n_items)
+    return lambda: console.print(render_running_agenda(agenda))
+
+
+def bench_frame(n_items: int, windowed: bool = False, show_eta: bool = False):
+    console = Console(file=io.StringIO(), width=80, height=40, force_terminal=True)
+    agenda = make_agenda(n_items)
+    if show_eta:
+        # the active item overruns, so the projected times move on every frame
+        agenda.current_item.past_worktime = agenda.current_item.duration
+        agenda.invalidate()
+    max_rows = max_rows_for(console) if windowed else None
+    renderer = RunningAgendaRenderer(agenda, max_rows=max_rows, show_eta=show_eta)
+
+    def frame():
+        renderer.update()
+        console.print(renderer.render())
+
+    return frame
+
+
+def bench_replay_day(n_items: int):
+    """Replay a synthetic 24 hour session of *n_items* items, rendering a frame after every key press."""
+    content = "# Day\n" + "".join(f"Item {idx} {24 * 60 // n_items}:00\n" for idx in range(n_items))
+    events = synthetic_events(Agenda.loads(content))
+
+    def replay_day():
+        agenda = Agenda.loads(content, clock=VirtualClock())
+        renderer = RunningAgendaRenderer(agenda, max_rows=36)
+        return replay(agenda, events, on_frame=lambda agenda: renderer.update() and renderer.render())
+
+    return replay_day
+
+
+@contextlib.contextmanager
+def bench_item_stats(n_sessions: int):
+    """Compute the overrun statistics of a history of *n_sessions* sessions of 5 agendas with 20 items each."""
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        history = History(Path(tmp_dir))
+        agendas = [make_agenda(20, running=False) for _ in range(5)]
+        for idx, agenda in enumerate(agendas):
+            agenda.title = f"Agenda {idx}"
+        for session in range(n_sessions):
+            agenda = agendas[session % len(agendas)]
+            for item in agenda.items:
+                item.past_worktime_ns = round(item.duration_ns * rng.uniform(0.7, 1.5))
+            history.append(agenda, completed=float(session))
+        yield lambda: item_stats(history.read())
+
+
+def bench_render_completed_agenda(n_items: int):
+    agenda = make_agenda(n_items)
+    return lambda: render_completed_agenda(agenda)
+
+
+def bench_format_td():
+    tds = [timedelta(seconds=seconds) for seconds in range(-3600, 3600, 7)]
+    return lambda: [format_td(td) for td in tds]
+
+
+@contextlib.contextmanager
+def bench_get_filepath(n_items: int):
+    agenda = make_agenda(n_items, running=False)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        yield lambda: get_filepath(agenda, parent=Path(tmp_dir))
+
+
+Benchmark = Callable[[], object]
+BENCHMARKS: dict[str, Callable[[], Union[Benchmark, ContextManager[Benchmark]]]] = {
+    **{f"loads[{n}]": functools.partial(bench_loads, n) for n in (10, 1_000, 100_000)},
+    **{f"cached_load[{n}]": functools.partial(bench_cached_load, n) for n in (10, 1_000, 100_000)},
+    "load_many[50x1000]": functools.partial(bench_load_many, 50, 1_000),
+    "parse_duration": bench_parse_duration,
+    "parse_duration_cached": bench_parse_duration_cached,
+    "parse_duration_strptime": bench_parse_duration_strptime,
+    "agenda_item": bench_agenda_item,
+    **{f"delta_for[{n}]": functools.partial(bench_delta_for, n) for n in (10, 10_000)},
+    **{f"transition[{n}]": functools.partial(bench_transition, n) for n in (10, 100_000)},
+    **{f"render_running_agenda[{n}]": functools.partial(bench_render_running_agenda, n) for n in (10, 1_000)},
+    **{f"running_agenda_renderer[{n}]": functools.partial(bench_running_agenda_renderer, n) for n in (10, 1_000)},
+    "frame[100]": functools.partial(bench_frame, 100),
+    "uncached_frame[100]": functools.partial(bench_uncached_frame, 100),
+    **{f"windowed_frame[{n}]": functools.partial(bench_frame, n, windowed=True) for n in (100, 10_000)},
+    **{f"eta_frame[{n}]": functools.partial(bench_frame, n, windowed=True, show_eta=True) for n in (100, 10_000)},
+    **{f"replay_day[{n}]": functools.partial(bench_replay_day, n) for n in (48, 288)},
+    **{f"item_stats[{n}]": functools.partial(bench_item_stats, n) for n in (1_000, 10_000)},
+    **{f"render_completed_agenda[{n}]": functools.partial(bench_render_completed_agenda, n) for n in (10, 1_000)},
+    "format_td": bench_format_td,
+    "get_filepath[1000]": functools.partial(bench_get_filepath, 1_000),
+}
+"""Registered benchmarks by name."""
+
+
+def measure(func: Callable[[], object], repeat: int = 5) -> dict:
+    """Measure *func* and return the best and median time per call (in seconds)."""
+    timer = timeit.Timer(func)
+    # call func often enough to take at least 0.2 s per repetition
+    number, _ = timer.autorange()
+    times = sorted(t / number for t in timer.repeat(repeat=repeat, number=number))
+    return {"min": times[0], "median": times[len(times) // 2], "number": number, "repeat": repeat}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print comparison of *results* against *baseline* and return names of regressed benchmarks."""
+    regressions = []
+    for name, result in results.items():
+        line = f"{name:<36} {format_time(result['min']):>10}"
+        if name in baseline:
+            ratio = result["min"] / baseline[name]["min"]
+            line += f" {format_time(baseline[name]['min']):>10} {ratio:6.2f}x"
+            if ratio > 1 + tolerance:
+                regressions.append(name)
+                line += "  REGRESSION"
+        click.echo(line)
+    return regressions
+
+
+def format_time(seconds: float) -> str:
+    for unit, factor in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= factor:
+            return f"{seconds / factor:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+@click.command()
+@click.option("-k", "filter_", help="Only run benchmarks whose name contains this string.")
+@click.option("--output", type=click.Path(path_type=Path), default=DEFAULT_OUTPUT, show_default=True)
+@click.option("--baseline", type=click.Path(path_type=Path), default=DEFAULT_BASELINE, show_default=True)
+@click.option("--save-baseline", is_flag=True, help="Save results as new baseline.")
+@click.option("--tolerance", type=float, default=DEFAULT_TOLERANCE, show_default=True, help="Allowed slowdown.")
+def main(filter_, output, baseline, save_baseline, tolerance):
+    """Run benchmarks and compare results against a saved baseline."""
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if filter_ and filter_ not in name:
+            continue
+        benchmark = setup()
+        if isinstance(benchmark, contextlib.AbstractContextManager):
+            with benchmark as func:
+                results[name] = measure(func)
+        else:
+            results[name] = measure(benchmark)
+
+    data = {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(data, indent=2))
+
+    baseline_results = json.loads(baseline.read_text())["results"] if baseline.exists() else {}
+    click.echo(f"{'benchmark':<36} {'time':>10} {'baseline':>10} {'ratio':>7}")
+    regressions = compare(results, baseline_results, tolerance)
+
+    if save_baseline:
+        baseline.write_text(json.dumps(data, indent=2))
+        click.echo(f"Saved baseline to {baseline}")
+    elif regressions:
+        click.secho(f"{len(regressions)} benchmark(s) regressed by more than {tolerance:.0%}", fg="red")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -29,6 +29,19 @@ def test(session: nox.Session):
     session.run("pytest", *args)
 
 
+@nox.session(python=[default_python_version])
+def benchmark(session: nox.Session):
+    """Run benchmark suite and compare results against a saved baseline.
+
+    Usage:
+        $ nox -s benchmark
+        # save results as new baseline
+        $ nox -s benchmark -- --save-baseline
+    """
+    session.run("poetry", "install", "--no-interaction", "--quiet", external=True)
+    session.run("python", "benchmarks/suite.py", *session.posargs)
+
+
 # wrapper for `nox -s test -p 3.10 -- --log-cli-level=LVL`
 @nox.session(python=[default_python_version], reuse_venv=True)
 def test_logging(session: nox.Session):
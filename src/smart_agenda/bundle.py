@@ -0,0 +1,110 @@
+"""Bundles of several agendas in a single markdown file (one ``#`` heading per meeting)."""
+
+from __future__ import annotations
+
+import mmap
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from smart_agenda.lib import Agenda
+
+
+@dataclass
+class BundleEntry:
+    title: str | None
+    start: int
+    """Byte offset of the heading of the agenda."""
+    stop: int
+    """Byte offset after the end of the agenda."""
+
+
+class AgendaBundle:
+    """Agendas in the file at *path*, which starts a new agenda with every ``#`` heading.
+
+    The file is memory-mapped and only scanned for the offsets of its headings, so opening a large bundle reads no
+    more than the heading lines. Agendas are parsed when they are accessed, and cached. Any content before the first
+    heading is an agenda without title.
+
+    Example:
+
+        >>> with Agenda.load_many("event-day.md") as bundle:  # doctest: +SKIP
+        ...     print(bundle.titles)
+        ...     agenda = bundle[1]
+        ['Opening', 'Workshop', 'Closing']
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self._mmap = None
+        self._agendas: dict[int, Agenda] = {}
+        with self.path.open("rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.entries: list[BundleEntry] = self._index() if self._mmap is not None else []
+
+    def _index(self) -> list[BundleEntry]:
+        data = self._mmap
+        size = len(data)
+        # only level 1 headings ("#" followed by whitespace) start a new agenda
+        offsets = [pos for pos in _iter_heading_offsets(data) if pos + 1 < size and data[pos + 1] in b" \t"]
+        entries = []
+        if not offsets or data[: offsets[0]].strip():
+            entries.append(BundleEntry(None, 0, offsets[0] if offsets else size))
+        for start, stop in zip(offsets, offsets[1:] + [size]):
+            end = data.find(b"\n", start, stop)
+            heading = data[start:stop] if end < 0 else data[start:end]
+            entries.append(BundleEntry(heading[1:].decode(errors="replace").strip(), start, stop))
+        return entries
+
+    @property
+    def titles(self) -> list[str | None]:
+        return [entry.title for entry in self.entries]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, idx: int) -> Agenda:
+        """Return the agenda at *idx*, which is parsed on first access."""
+        idx = range(len(self.entries))[idx]
+        if idx not in self._agendas:
+            self._agendas[idx] = Agenda.loads(self.content(idx))
+        return self._agendas[idx]
+
+    def content(self, idx: int) -> str:
+        """Return the markdown of the agenda at *idx*."""
+        start, stop = self.entries[idx].start, self.entries[idx].stop
+        return self._mmap[start:stop].decode().replace("\r\n", "\n")
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> AgendaBundle:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _iter_heading_offsets(data: mmap.mmap) -> Iterator[int]:
+    """Yield offsets of the lines in *data* that start with ``#``."""
+    if data[:1] == b"#":
+        yield 0
+    pos = data.find(b"\n#")
+    while pos >= 0:
+        yield pos + 1
+        pos = data.find(b"\n#", pos + 1)
+
+
+def select_agenda(bundle: AgendaBundle) -> int | None:
+    """Let the user select an agenda of *bundle* and return its index (or None if the selection was cancelled)."""
+    from smart_agenda.picker import AgendaList, AgendaPicker, run_picker, summarize_agenda_lines
+
+    path = str(bundle.path.absolute())
+    summaries = [summarize_agenda_lines(bundle.content(idx).splitlines(), path) for idx in range(len(bundle))]
+    picker = AgendaPicker(AgendaList(bundle.path.parent, summaries), title="Select a meeting", unit="agendas")
+    selection = run_picker(picker)
+    return next((idx for idx, summary in enumerate(summaries) if summary is selection), None)
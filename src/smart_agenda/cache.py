@@ -0,0 +1,102 @@
+"""Persistent cache of parsed agendas, which lets repeated launches skip parsing."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from smart_agenda.lib import Agenda, AgendaItem, Section
+
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+"""Default size limit of the cached agendas in bytes."""
+
+
+def dumps_agenda(agenda: Agenda) -> str:
+    """Serialize the parsed structure of *agenda* (title, item names and durations in seconds, sections).
+
+    Examples:
+        >>> dumps_agenda(Agenda("Title", ["first 1:00", "second 2:30"]))
+        '[1,"Title",[["first",60],["second",150]],[]]'
+    """
+    items = [[item.name, item.duration_ns // 1_000_000_000] for item in agenda.items]
+    sections = [[s.title, s.level, s.start, s.stop, s.parent] for s in agenda.sections]
+    return json.dumps([CACHE_VERSION, agenda.title, items, sections], separators=(",", ":"), ensure_ascii=False)
+
+
+def loads_agenda(data: str) -> Agenda:
+    """Deserialize an agenda serialized by :func:`dumps_agenda`.
+
+    Raises:
+        ValueError: if *data* was serialized by another version.
+    """
+    version, title, items, sections = json.loads(data)
+    if version != CACHE_VERSION:
+        raise ValueError(f"unsupported version {version} of cached agenda")
+    return Agenda(
+        title,
+        [AgendaItem.from_ns(name, seconds * 1_000_000_000) for name, seconds in items],
+        sections=[Section(*section) for section in sections],
+    )
+
+
+class AgendaCache:
+    """Cache of parsed agendas in *directory*, which maps the hash of an agenda's content to its parsed structure.
+
+    The content of saved agendas is read through :class:`~smart_agenda.store.AgendaStore` anyway (e.g. for the session
+    log), so only its hash is computed to look up the parsed agenda. Cached agendas are evicted least recently used
+    first once they exceed *max_bytes*.
+
+    Example:
+
+        >>> agenda = AgendaCache(app_dir / ".cache").loads(content)  # doctest: +SKIP
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def loads(self, content: str) -> Agenda:
+        """Return the agenda of *content*, parsing it only if it is not cached."""
+        digest = hashlib.md5(content.encode(), usedforsecurity=False).hexdigest()
+        agenda = self._read_entry(digest)
+        if agenda is None:
+            agenda = Agenda.loads(content)
+            self._write_entry(digest, agenda)
+        return agenda
+
+    def _read_entry(self, digest: str) -> Agenda | None:
+        fp = self.directory / digest
+        try:
+            agenda = loads_agenda(fp.read_text())
+        except (OSError, ValueError, TypeError):
+            return None
+        # mark as recently used
+        os.utime(fp)
+        return agenda
+
+    def _write_entry(self, digest: str, agenda: Agenda):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fp = self.directory / digest
+        tmp_path = fp.with_name(f"{digest}.tmp")
+        tmp_path.write_text(dumps_agenda(agenda))
+        os.replace(tmp_path, fp)
+        self._evict()
+
+    def _evict(self):
+        """Remove least recently used agendas until the cached agendas fit into *max_bytes*."""
+        entries = []
+        for fp in self.directory.iterdir():
+            if not fp.name.endswith(".tmp"):
+                stat = fp.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, fp))
+        total = sum(size for _, size, _ in entries)
+        for _, size, fp in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            logging.debug("evicting cached agenda %s", fp.name)
+            fp.unlink()
+            total -= size
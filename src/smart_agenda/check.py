@@ -0,0 +1,151 @@
+"""Validation of many agenda files at once (``smart-agenda check``), e.g. in CI.
+
+Every file is read and parsed line by line, which finds the same agendas as :meth:`Agenda.load_many` and the same
+items as :meth:`Agenda.loads`, but reports *all* invalid durations with their line numbers instead of stopping at the
+first. Files are checked in a pool of worker processes (see :func:`check_files`), and results are yielded as soon as
+they are available.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from smart_agenda.lib import format_td, ns_to_timedelta, parse_agenda_item, timedelta_to_ns
+
+CHUNKS_PER_JOB = 4
+"""Number of chunks handed to every worker process, so workers that got quick files can take over the rest."""
+MAX_CHUNKSIZE = 64
+"""Maximum number of files that are sent to a worker process at once."""
+
+
+@dataclass
+class Problem:
+    line: int | None
+    """Line number (counted from 1) of the problem, or None if it concerns the whole file."""
+    message: str
+
+    def __str__(self):
+        return self.message if self.line is None else f"{self.line}: {self.message}"
+
+
+@dataclass
+class CheckResult:
+    """Result of checking the agenda file at *path*."""
+
+    path: str
+    agendas: int = 0
+    items: int = 0
+    problems: list[Problem] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "ok": self.ok}
+
+
+@dataclass
+class _AgendaTotals:
+    title: str | None
+    line: int
+    """Line number of the heading of the agenda."""
+    items: int = 0
+    duration_ns: int = 0
+    blank: bool = True
+    """Whether the agenda consists of blank lines only."""
+
+
+def is_agenda_heading(line: str) -> bool:
+    """Return whether *line* starts a new agenda in a file of several agendas (see :class:`AgendaBundle`)."""
+    return line[:1] == "#" and line[1:2] in (" ", "\t")
+
+
+def check_content(content: str, path: str = "<string>", slot_ns: int = None) -> CheckResult:
+    """Check the agendas in *content*: each must have items with valid durations, which fit into *slot_ns*.
+
+    Examples:
+        >>> result = check_content("# Weekly\\nfirst 1:00\\nsecond 1:75\\n# Empty\\n", slot_ns=60 * 10**9)
+        >>> result.agendas, result.items
+        (2, 1)
+        >>> for problem in result.problems:
+        ...     print(problem)
+        3: invalid duration '1:75': seconds must be below 60
+        4: no agenda items in 'Empty'
+    """
+    result = CheckResult(path)
+    agendas = []
+    current = _AgendaTotals(None, 1)
+    for lineno, line in enumerate(content.splitlines(), start=1):
+        if is_agenda_heading(line):
+            agendas.append(current)
+            current = _AgendaTotals(line[1:].strip(), lineno)
+        current.blank = current.blank and not line.strip()
+        try:
+            item = parse_agenda_item(line)
+        except ValueError as e:
+            result.problems.append(Problem(lineno, str(e)))
+            continue
+        if item is not None:
+            current.items += 1
+            current.duration_ns += item.duration_ns
+    agendas.append(current)
+    if agendas[0].blank and agendas[1:]:
+        del agendas[0]  # nothing but blank lines before the first heading
+
+    for agenda in agendas:
+        result.agendas += 1
+        result.items += agenda.items
+        name = f" in '{agenda.title}'" if agenda.title else ""
+        if not agenda.items:
+            result.problems.append(Problem(agenda.line, f"no agenda items{name}"))
+        elif slot_ns is not None and agenda.duration_ns > slot_ns:
+            total = format_td(ns_to_timedelta(agenda.duration_ns), positive_sign=False)
+            slot = format_td(ns_to_timedelta(slot_ns), positive_sign=False)
+            result.problems.append(Problem(agenda.line, f"agenda{name} takes {total}, longer than the slot of {slot}"))
+    result.problems.sort(key=lambda problem: problem.line)
+    return result
+
+
+def check_file(path: str | os.PathLike, slot_ns: int = None) -> CheckResult:
+    """Check the agenda file at *path* (see :func:`check_content`)."""
+    try:
+        content = Path(path).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        return CheckResult(str(path), problems=[Problem(None, f"cannot read file: {e}")])
+    return check_content(content, str(path), slot_ns=slot_ns)
+
+
+def _check_file(args: tuple[str, int | None]) -> CheckResult:
+    return check_file(*args)
+
+
+def iter_agenda_files(paths: Iterable[str | os.PathLike]) -> Iterator[Path]:
+    """Yield the files of *paths*, and the markdown files in any directories of *paths* (recursively, sorted)."""
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(fp for fp in path.rglob("*.md") if fp.is_file())
+        else:
+            yield path
+
+
+def check_files(paths: Iterable[str | os.PathLike], slot: timedelta = None, jobs: int = None) -> Iterator[CheckResult]:
+    """Check all files of *paths* in *jobs* worker processes (defaults to the number of CPUs) against *slot*.
+
+    Results are yielded in the order in which they are finished. The files are handed to the workers in chunks, as
+    checking a single file usually takes less time than sending it to a worker and its result back.
+    """
+    slot_ns = timedelta_to_ns(slot) if slot is not None else None
+    tasks = [(str(path), slot_ns) for path in paths]
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    if jobs <= 1:
+        yield from map(_check_file, tasks)
+        return
+    chunksize = max(1, min(MAX_CHUNKSIZE, len(tasks) // (jobs * CHUNKS_PER_JOB)))
+    with multiprocessing.Pool(jobs) as pool:
+        yield from pool.imap_unordered(_check_file, tasks, chunksize=chunksize)
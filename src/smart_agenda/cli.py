@@ -2,21 +2,55 @@
 
 .. program-output:: smart-agenda --help
 """
+
+from __future__ import annotations
+
+import functools
+import logging
+import sys
+import time
 from pathlib import Path
+from typing import TYPE_CHECKING, TextIO
 
 import click
-from rich.console import Console
-from rich.live import Live
 
-console = Console()
+if TYPE_CHECKING:  # pragma: no cover
+    from rich.console import Console
+
+    from smart_agenda.profiling import NullProfiler
+    from smart_agenda.reload import AgendaReloader
 
 app_dir = Path(click.get_app_dir(app_name="smart-agenda", force_posix=True))
+sessions_dir = app_dir / ".sessions"
+cache_dir = app_dir / ".cache"
+history_dir = app_dir / ".history"
+picker_cache = app_dir / ".picker" / "summaries.json"
+server_dir = app_dir / ".server"
 
 from smart_agenda import __version__
-from smart_agenda.cli_output import render_completed_agenda, render_initial_agenda, render_running_agenda
 from smart_agenda.lib import Agenda
 from smart_agenda.options import recent
-from smart_agenda.util import get_filepath
+from smart_agenda.terminal import KEY_BACKSPACE, KEY_DOWN, KEY_ENTER, KEY_LEFT, KEY_RIGHT, KEY_UP
+from smart_agenda.util import get_filepath, save_agenda
+
+
+@functools.lru_cache(maxsize=None)
+def get_console() -> Console:
+    """Return the shared console, which is only created when output is rendered (importing rich is slow)."""
+    from rich.console import Console
+
+    return Console(stderr=messages_to_stderr())
+
+
+def messages_to_stderr() -> bool:
+    """Return whether messages go to stderr, as stdout is reserved for JSON lines (``--output ndjson``)."""
+    ctx = click.get_current_context(silent=True)
+    return ctx is not None and ctx.find_root().params.get("output") == "ndjson"
+
+
+def echo_message(message: str, **styles):
+    """Print a prompt or status *message* (see :func:`messages_to_stderr`)."""
+    click.secho(message, err=messages_to_stderr(), **styles)
 
 
 def cb_version(ctx, param, value):
@@ -35,8 +69,30 @@ Second Topic 7:00
 AOB          6:00
 """.lstrip()
 
+DEFAULT_MAX_FPS = 10
+DEFAULT_TICK = 1.0
+
+
+class AgendaCli(click.Group):
+    """Group whose optional FILE argument does not swallow the names of its subcommands."""
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if args and args[0] in self.commands:
+            # options of the meeting do not apply to subcommands
+            click.Command.parse_args(self, ctx, [])
+            ctx.protected_args, ctx.args = args[:1], args[1:]
+            return ctx.args
+        return super().parse_args(ctx, args)
 
-@click.group(invoke_without_command=True)
+
+class FileArgument(click.Argument):
+    def get_usage_pieces(self, ctx: click.Context) -> list[str]:
+        if ctx.parent is not None and self in ctx.parent.command.params:
+            return []  # usage of a subcommand, which does not take FILE
+        return super().get_usage_pieces(ctx)
+
+
+@click.group(cls=AgendaCli, invoke_without_command=True)
 @click.help_option("-h", "--help")
 @click.option("-v", "--verbose", count=True, default=0, help="Increase verbosity of output.")
 @click.option("--version", help="Print version number and exit.", is_flag=True, callback=cb_version, expose_value=False)
@@ -46,18 +102,245 @@ AOB          6:00
 @click.option("--edit", help="Edit agenda before starting the meeting.", is_flag=True)
 @click.option("--title", help="Title of your agenda.")
 @click.option("--save/--no-save", help="Save agenda for later.", default=True, show_default=True, is_flag=True)
+@click.option(
+    "--max-fps",
+    help="Maximum number of screen updates per second.",
+    type=click.FloatRange(min=0, min_open=True),
+    default=DEFAULT_MAX_FPS,
+    show_default=True,
+)
+@click.option("--resume", help="Resume the most recent meeting (e.g. after the terminal was closed).", is_flag=True)
+@click.option("--pick", help="Pick FILE from the agenda files in and below the current directory.", is_flag=True)
+@click.option("--watch", help="Reload FILE whenever it is saved, keeping the timing of unchanged items.", is_flag=True)
+@click.option("--eta", help="Show when upcoming items are projected to start, and when the meeting ends.", is_flag=True)
+@click.option("--profile", help="Print render times, key latency and output volume at exit.", is_flag=True)
+@click.option(
+    "--profile-output",
+    help="Write profiling summary as JSON (implies --profile).",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+)
+@click.option(
+    "--cprofile",
+    help="Dump cProfile statistics of the whole meeting.",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+)
+@click.option(
+    "--output",
+    help="Show a live view in the terminal, a live view that only redraws changed cells (for slow connections, e.g."
+    " over SSH), or write JSON lines for dashboards (and start the meeting right away).",
+    type=click.Choice(["live", "diff", "ndjson"]),
+    default="live",
+    show_default=True,
+)
+@click.option(
+    "--output-file",
+    help="Write JSON lines to this file or FIFO instead of stdout.",
+    type=click.Path(dir_okay=False, path_type=Path),
+)
+@click.option(
+    "--tick",
+    help="Seconds between JSON lines while nothing changes.",
+    type=click.FloatRange(min=0, min_open=True),
+    default=DEFAULT_TICK,
+    show_default=True,
+)
 @recent
-@click.argument("file", type=click.File(), required=False)
+@click.argument("file", cls=FileArgument, type=click.File(), required=False)
 @click.pass_context
-def cli(ctx, verbose, example, save, recent, skip_input, demo, edit, title, file):
+def cli(
+    ctx,
+    verbose,
+    example,
+    save,
+    recent,
+    skip_input,
+    demo,
+    edit,
+    title,
+    max_fps,
+    resume,
+    pick,
+    watch,
+    eta,
+    profile,
+    profile_output,
+    cprofile,
+    output,
+    output_file,
+    tick,
+    file,
+):
     """Smart Agenda."""
+    if ctx.invoked_subcommand is not None:
+        return
+    if pick:
+        file = open_picked_file()
+    if watch and (file is None or not Path(file.name).is_file()):
+        raise click.UsageError("--watch requires FILE.")
+    if output != "ndjson":
+        get_console().clear()
+    if resume:
+        agenda = resume_session()
+    else:
+        agenda = new_session(file, recent, edit, example, skip_input, demo, title, save)
+    reloader = None
+    if watch:
+        from smart_agenda.reload import AgendaReloader
+
+        reloader = AgendaReloader(Path(file.name), agenda.log.content, agenda.title)
+
+    if output == "ndjson":
+        main_ndjson(agenda, tick=tick, resume=resume, output_file=output_file, reloader=reloader)
+        return
+    from smart_agenda.profiling import profile_session
+
+    with profile_session(profile, profile_output, cprofile) as profiler:
+        main(
+            agenda,
+            max_fps=max_fps,
+            resume=resume,
+            profiler=profiler,
+            reloader=reloader,
+            low_bandwidth=output == "diff",
+            show_eta=eta,
+        )
+
+
+@cli.command()
+@click.help_option("-h", "--help")
+@click.option("--address", help="Unix socket (unix:PATH) or HOST:PORT to listen on.  [default: socket in app dir]")
+@click.argument("files", metavar="[FILE]...", nargs=-1, type=click.Path(exists=True, dir_okay=False, path_type=Path))
+def serve(address, files):
+    """Run the agendas of many rooms in one process, controlled by `attach` and other clients.
+
+    Each agenda in FILE (one per `#` heading) is opened in the room named after its title.
+    """
+    import asyncio
+
+    from smart_agenda.server import AgendaServer, default_address
+
+    address = address or default_address(server_dir)
+    server_dir.mkdir(parents=True, exist_ok=True)
+    server = AgendaServer()
+    for fp in files:
+        with Agenda.load_many(fp) as bundle:
+            for idx, title in enumerate(bundle.titles):
+                server.open(title or fp.stem, bundle[idx], replace=True)
+    click.secho(f"Serving {len(server.rooms)} agendas on {address}", dim=True, italic=True, err=True)
+    try:
+        asyncio.run(server.serve_forever(address))
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command()
+@click.help_option("-h", "--help")
+@click.option("--address", help="Unix socket (unix:PATH) or HOST:PORT of the server.  [default: socket in app dir]")
+@click.option(
+    "--max-fps",
+    help="Maximum number of screen updates per second.",
+    type=click.FloatRange(min=0, min_open=True),
+    default=DEFAULT_MAX_FPS,
+    show_default=True,
+)
+@click.argument("room")
+def attach(address, max_fps, room):
+    """Show the agenda of ROOM that is running on the server, and move it to the next or previous item."""
+    from smart_agenda.client import ServerError
+    from smart_agenda.server import default_address
+
+    try:
+        main_attach(room, address or default_address(server_dir), max_fps=max_fps)
+    except (OSError, ServerError) as e:
+        click.secho(f"Cannot attach to '{room}': {e}", fg="red", err=True)
+        exit(1)
+
+
+@cli.command()
+@click.help_option("-h", "--help")
+@click.option("--title", help="Only include agendas whose title contains this text.")
+@click.option("--min-sessions", help="Only include items of at least this many meetings.", default=1, show_default=True)
+@click.option("--limit", help="Maximum number of items to show.", default=20, show_default=True)
+def stats(title, min_sessions, limit):
+    """Show which agenda items overrun, over all completed meetings.
+
+    Items are sorted by their median overrun. The trend is how much the overrun changes from one meeting to the next.
+    """
+    from smart_agenda.cli_output import render_item_stats
+    from smart_agenda.history import History, item_stats
+
+    try:
+        items = item_stats(History(history_dir).read(), title=title, min_sessions=min_sessions)
+    except ValueError as e:
+        click.secho(str(e), fg="red", err=True)
+        exit(1)
+    if not items:
+        click.secho("No completed meetings yet.", dim=True, fg="yellow", italic=True)
+        return
+    get_console().print(render_item_stats(items[:limit]))
+
+
+def cb_duration(ctx, param, value):
+    """Parse the duration *value* of an option."""
+    if value is None:
+        return None
+    from smart_agenda.lib import parse_duration
+
+    try:
+        return parse_duration(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from None
+
+
+@cli.command()
+@click.help_option("-h", "--help")
+@click.option("--slot", help="Flag agendas that take longer than this duration (e.g. 1:00:00).", callback=cb_duration)
+@click.option("-j", "--jobs", help="Number of worker processes.  [default: number of CPUs]", type=click.IntRange(min=1))
+@click.option(
+    "--format",
+    "output_format",
+    help="Print problems as 'FILE:LINE: message', or a JSON line per file.",
+    type=click.Choice(["text", "ndjson"]),
+    default="text",
+    show_default=True,
+)
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, path_type=Path))
+def check(slot, jobs, output_format, paths):
+    """Check the agenda files in PATHS (and the markdown files in directories of PATHS, recursively).
+
+    Reports agendas without items, invalid durations and agendas that do not fit into --slot, and exits with status 1
+    if there are any.
+    """
+    import json
+
+    from smart_agenda.check import check_files, iter_agenda_files
+
+    files = problems = failed = 0
+    for result in check_files(iter_agenda_files(paths), slot=slot, jobs=jobs):
+        files += 1
+        problems += len(result.problems)
+        failed += not result.ok
+        if output_format == "ndjson":
+            click.echo(json.dumps(result.to_dict()))
+            continue
+        for problem in result.problems:
+            location = result.path if problem.line is None else f"{result.path}:{problem.line}"
+            click.echo(f"{click.style(location, bold=True)}: {problem.message}")
+    if output_format == "text":
+        summary = f"{problems} problems in {failed} of {files} files." if problems else f"{files} files OK."
+        click.secho(summary, fg="red" if problems else "green", err=True)
+    if problems:
+        exit(1)
+
+
+def new_session(file, recent, edit, example, skip_input, demo, title, save) -> Agenda:
+    """Load the agenda selected by the command line options, save it and create the log of its session."""
     # TODO: refactor content loading and title handling
-    console.clear()
     if file:
-        content = file.read()
+        content = read_agenda_file(file)
         save = False
     elif recent:
-        content = recent.open().read()
+        content = read_saved_agenda(recent)
         if edit:
             content = prompt_for_agenda(template=content, title=title)
         else:
@@ -69,9 +352,9 @@ def cli(ctx, verbose, example, save, recent, skip_input, demo, edit, title, file
 
     if not content.strip():
         exit(0)
-    agenda = Agenda.loads(content)
+    agenda = load_saved_agenda(content) if recent and not edit else Agenda.loads(content)
     if not len(agenda.items):
-        click.secho(
+        echo_message(
             "No agenda items found.\nSee `--example` for the expected agenda format.",
             dim=True,
             fg="yellow",
@@ -80,15 +363,89 @@ def cli(ctx, verbose, example, save, recent, skip_input, demo, edit, title, file
         exit(0)
 
     if save:
-        fp_agenda = get_filepath(agenda, parent=app_dir)
-        fp_agenda.open("w").write(content)
+        save_agenda(agenda, content, parent=app_dir)
+
+    from smart_agenda.session import SessionLog, prune_sessions, session_filename
+
+    prune_sessions(sessions_dir)
+    agenda.log = SessionLog(sessions_dir / session_filename(get_filepath(agenda).name), content)
+    return agenda
 
-    main(agenda)
+
+def open_picked_file() -> TextIO:
+    """Let the user pick an agenda file below the current directory and open it (exits if nothing was picked)."""
+    from smart_agenda.lib import select_agenda_file
+
+    path = select_agenda_file(cache_path=picker_cache)
+    if path is None:
+        exit(0)
+    return click.open_file(path)
+
+
+def read_agenda_file(file: TextIO) -> str:
+    """Read agenda from *file*, and let the user pick one if it contains several agendas (one per ``#`` heading)."""
+    path = Path(file.name)
+    if not path.is_file():  # e.g. stdin
+        return file.read()
+    from smart_agenda.bundle import select_agenda
+
+    with Agenda.load_many(path) as bundle:
+        idx = select_agenda(bundle) if len(bundle) > 1 else 0
+        if not len(bundle) or idx is None:
+            return ""
+        return bundle.content(idx)
+
+
+def read_saved_agenda(name: str) -> str:
+    """Read the saved agenda *name* (see :class:`~smart_agenda.store.AgendaStore`) and mark it as used."""
+    from smart_agenda.store import AgendaStore
+
+    store = AgendaStore(app_dir)
+    try:
+        content = store.read(name)
+    except (OSError, ValueError) as e:
+        click.secho(f"Cannot read saved agenda: {e}", fg="red", err=True)
+        exit(1)
+    store.touch(name)
+    return content
+
+
+def load_saved_agenda(content: str) -> Agenda:
+    """Load the saved agenda with *content* from the cache of parsed agendas (parsing it only if it is not cached)."""
+    from smart_agenda.cache import AgendaCache
+
+    return AgendaCache(cache_dir).loads(content)
+
+
+def resume_session() -> Agenda:
+    """Load the agenda of the most recent session with the worktimes recorded in its log."""
+    from smart_agenda.session import SessionLog, latest_session
+
+    fp_session = latest_session(sessions_dir)
+    if fp_session is None:
+        echo_message("No meeting to resume.", dim=True, fg="yellow", italic=True)
+        exit(0)
+    try:
+        log, session = SessionLog.resume(fp_session)
+    except ValueError as e:
+        # e.g. the process was killed while the log was created
+        click.secho(f"Cannot resume the most recent meeting: {e}", fg="red", err=True)
+        exit(1)
+    agenda = session.replay()
+    if session.completed:
+        from smart_agenda.cli_output import render_completed_agenda
+
+        log.close()
+        echo_message("Most recent meeting is already completed.", dim=True, fg="yellow", italic=True)
+        get_console().print(render_completed_agenda(agenda))
+        exit(0)
+    agenda.log = log
+    return agenda
 
 
 def prompt_for_agenda(template: str = None, title: str = None) -> str:
     """Prompt user to enter agenda."""
-    console.print("[d][i]Enter agenda in external editor. Close the file to continue...")
+    echo_message("Enter agenda in external editor. Close the file to continue...", dim=True, italic=True)
     if title:
         if template.startswith("#"):
             # remove template heading, as title is already provided
@@ -98,33 +455,260 @@ def prompt_for_agenda(template: str = None, title: str = None) -> str:
     return click.edit(template, require_save=False) + "\n"
 
 
-KEY_UP, KEY_DOWN, KEY_RIGHT, KEY_LEFT = [f"\x1b[{c}" for c in "ABCD"]
-KEY_ENTER, KEY_BACKSPACE = ("\n", "\x7f")
 KEYS_PREVIOUS = ("b", KEY_UP, KEY_LEFT, KEY_BACKSPACE)
 KEYS_NEXT = ("n", KEY_DOWN, KEY_RIGHT, KEY_ENTER)
 
 
-def main(agenda: Agenda):
-    """Main loop to handle cli state."""
-    console.clear()
-    console.print(render_initial_agenda(agenda))
-    console.input("Press enter to start...")
+def main(
+    agenda: Agenda,
+    max_fps: float = DEFAULT_MAX_FPS,
+    resume: bool = False,
+    profiler: NullProfiler = None,
+    reloader: AgendaReloader = None,
+    low_bandwidth: bool = False,
+    show_eta: bool = False,
+):
+    """Main loop to handle cli state.
+
+    The loop sleeps until either a key is pressed, the displayed time changes or *reloader* (if given) has a new version
+    of the agenda, and only redraws the screen when the formatted output differs from the previous frame (at most
+    *max_fps* times per second). With *low_bandwidth*, only the changed cells are written to the terminal (see
+    :mod:`smart_agenda.screen`), and the output volume is reported at the end. With *show_eta*, the projected start of
+    upcoming items and the projected end are shown (see :mod:`smart_agenda.forecast`). When *resume* is given, the
+    agenda is expected to be running already. Frames and key presses are reported to *profiler* (if given).
+    """
+    if profiler is None:
+        from smart_agenda.profiling import NullProfiler
+
+        profiler = NullProfiler()
+    if reloader is None:
+        from smart_agenda.reload import NullReloader
+
+        reloader = NullReloader()
+    try:
+        _main(agenda, max_fps, resume, profiler, reloader, low_bandwidth, show_eta)
+        record_history(agenda)
+    finally:
+        reloader.close()
+        if agenda.log is not None:
+            agenda.log.close()
+
+
+def _main(
+    agenda: Agenda,
+    max_fps: float,
+    resume: bool,
+    profiler: NullProfiler,
+    reloader: AgendaReloader,
+    low_bandwidth: bool,
+    show_eta: bool,
+):
+    from rich.live import Live
+
+    from smart_agenda.cli_output import (
+        RunningAgendaRenderer,
+        max_rows_for,
+        render_completed_agenda,
+        render_initial_agenda,
+        seconds_until_next_change,
+    )
+    from smart_agenda.terminal import KeyReader
+
+    console = get_console()
+    console.file = profiler.wrap(console.file)
     console.clear()
-    agenda.to_next()
+    if not resume:
+        console.print(render_initial_agenda(agenda))
+        console.input("Press enter to start...")
+        console.clear()
+        agenda.to_next()
 
-    import getchlib
+    frame_interval = 1 / max_fps
+    renderer = RunningAgendaRenderer(
+        agenda, max_rows=max_rows_for(console), show_sections=bool(agenda.sections), show_eta=show_eta
+    )
+    renderer.update()
+    if low_bandwidth:
+        from smart_agenda.screen import DiffScreen
 
-    with Live(render_running_agenda(agenda), auto_refresh=False, console=console) as live:
+        screen = DiffScreen(renderer.render(), console=console)
+    else:
+        screen = Live(renderer.render(), auto_refresh=False, console=console)
+    with KeyReader() as keys, screen as live:
+        reloader.start(on_reload=keys.wakeup)
+        last_frame = time.monotonic()
         agenda_completed = False
         while not agenda_completed:
-            live.update(render_running_agenda(agenda), refresh=True)
-            key = getchlib.getkey(False, 0.1)
-            if key in KEYS_NEXT:
-                agenda_completed = agenda.to_next()
-            if key in KEYS_PREVIOUS:
-                agenda.to_previous()
+            timeout = last_frame + frame_interval - time.monotonic()
+            if timeout <= 0:
+                profiler.frame_started()
+                renderer.max_rows = max_rows_for(console)  # follow terminal resizes
+                if renderer.update():
+                    table = renderer.render()
+                    profiler.frame_rendered()
+                    live.update(table, refresh=True)
+                    profiler.frame_shown()
+                    last_frame = time.monotonic()
+                else:
+                    profiler.frame_skipped()
+                timeout = seconds_until_next_change(agenda)
+            key = keys.read_key(timeout)
+            if key:
+                profiler.key_pressed()
+            agenda_completed = _apply_key(agenda, key) == "complete"
+            if reloader.apply(agenda):
+                renderer.show_sections = bool(agenda.sections)
+                renderer.invalidate()
 
         live.update(render_completed_agenda(agenda))
+    if low_bandwidth:
+        click.secho(
+            f"{screen.bytes_written} bytes written to terminal ({screen.bytes_per_second:.0f} B/s)",
+            dim=True,
+            italic=True,
+        )
+
+
+def main_ndjson(
+    agenda: Agenda,
+    tick: float = DEFAULT_TICK,
+    resume: bool = False,
+    output_file: Path = None,
+    reloader: AgendaReloader = None,
+):
+    """Run *agenda* without a user interface and write its state as JSON lines (see :mod:`smart_agenda.ndjson`).
+
+    A line is written whenever the agenda moves to another item or is reloaded by *reloader* (if given), and every
+    *tick* seconds in between, to *output_file* (or stdout). Keys are read from stdin as in the live view. Unless
+    *resume* is given, the agenda starts right away.
+    """
+    from smart_agenda.ndjson import NdjsonWriter, agenda_record
+    from smart_agenda.reload import NullReloader
+    from smart_agenda.terminal import KeyReader
+
+    if reloader is None:
+        reloader = NullReloader()
+    try:
+        with NdjsonWriter(output_file or sys.stdout.buffer) as writer, KeyReader() as keys:
+            reloader.start(on_reload=keys.wakeup)
+            if not resume:
+                agenda.to_next()
+            writer.write(agenda_record(agenda, "start"))
+            next_tick = time.monotonic() + tick
+            agenda_completed = False
+            while not agenda_completed:
+                event = _apply_key(agenda, keys.read_key(max(next_tick - time.monotonic(), 0)))
+                agenda_completed = event == "complete"
+                if reloader.apply(agenda):
+                    writer.write(agenda_record(agenda, "reload", full=True))
+                if event is not None:
+                    writer.write(agenda_record(agenda, event))
+                now = time.monotonic()
+                if now >= next_tick:
+                    # ticks are superseded by the next one, so they can be dropped when the reader falls behind
+                    writer.write(agenda_record(agenda, "tick"), droppable=True)
+                    next_tick += tick
+                    if next_tick <= now:
+                        # skip ticks that were missed (e.g. while the system was suspended)
+                        next_tick = now + tick
+        record_history(agenda)
+    finally:
+        reloader.close()
+        if agenda.log is not None:
+            agenda.log.close()
+
+
+def _apply_key(agenda: Agenda, key: str | None) -> str | None:
+    """Move *agenda* to the next or previous item for *key* and return the event (or None for any other key)."""
+    if key in KEYS_NEXT:
+        return "complete" if agenda.to_next() else "next"
+    if key in KEYS_PREVIOUS:
+        agenda.to_previous()
+        return "previous"
+    return None
+
+
+def record_history(agenda: Agenda):
+    """Add the completed *agenda* to the history of sessions (see :mod:`smart_agenda.history`)."""
+    from smart_agenda.history import History
+
+    try:
+        History(history_dir).append(agenda)
+    except (OSError, ValueError) as e:
+        logging.warning("Cannot add meeting to the history: %s", e)
+
+
+def main_attach(room: str, address: str, max_fps: float = DEFAULT_MAX_FPS):
+    """Show the agenda of *room* running on the server at *address*, and send key presses to the server.
+
+    The agenda is mirrored locally and rendered as in :func:`main`, with the updates pushed by the server applied
+    between frames. Nothing is rendered while neither the server nor the user changes anything.
+    """
+    import collections
+    import threading
+
+    from rich.live import Live
+
+    from smart_agenda.cli_output import RunningAgendaRenderer, max_rows_for, render_completed_agenda
+    from smart_agenda.client import AgendaClient, mirror_agenda
+    from smart_agenda.terminal import KeyReader
+
+    console = get_console()
+    pushed = collections.deque()
+    lock = threading.Lock()
+
+    with KeyReader() as keys:
+
+        def on_push(record: dict):
+            if record.get("room", room) == room:
+                with lock:
+                    pushed.append(record)
+                keys.wakeup()
+
+        with AgendaClient(address, on_push) as client:
+            agenda = mirror_agenda(client.request("subscribe", room=room))
+            renderer = RunningAgendaRenderer(agenda, max_rows=max_rows_for(console))
+            renderer.update()
+            console.clear()
+            with Live(renderer.render(), auto_refresh=False, console=console) as live:
+                event = _attach_loop(room, client, keys, renderer, live, pushed, lock, 1 / max_fps)
+                if event == "complete":
+                    live.update(render_completed_agenda(renderer.agenda))
+    if event in ("close", "disconnect"):
+        click.secho(f"The agenda of '{room}' was closed.", dim=True, fg="yellow", italic=True)
+
+
+def _attach_loop(room, client, keys, renderer, live, pushed, lock, frame_interval: float) -> str:
+    """Run the thin client until its agenda completes or is closed, and return the final event."""
+    from smart_agenda.cli_output import RunningAgendaRenderer, max_rows_for, seconds_until_next_change
+    from smart_agenda.client import apply_record, mirror_agenda
+
+    last_frame = 0.0
+    while True:
+        with lock:
+            records = list(pushed)
+            pushed.clear()
+        for record in records:
+            if record["event"] in ("complete", "close", "disconnect"):
+                return record["event"]
+            if record["event"] == "open":
+                # the agenda was replaced
+                renderer = RunningAgendaRenderer(mirror_agenda(record), max_rows=renderer.max_rows)
+            elif record["event"] != "tick":
+                # ticks only confirm the time that is counted locally
+                apply_record(renderer.agenda, record)
+        timeout = last_frame + frame_interval - time.monotonic()
+        if timeout <= 0:
+            renderer.max_rows = max_rows_for(live.console)
+            if renderer.update():
+                live.update(renderer.render(), refresh=True)
+                last_frame = time.monotonic()
+            timeout = seconds_until_next_change(renderer.agenda)
+        key = keys.read_key(timeout)
+        if key in KEYS_NEXT:
+            client.request("next", room=room)
+        elif key in KEYS_PREVIOUS:
+            client.request("previous", room=room)
 
 
 if __name__ == "__main__":
@@ -1,17 +1,33 @@
 """Anything related to how the cli generates its output."""
 
+from __future__ import annotations
+
+import re
 from datetime import timedelta
+from typing import Tuple
 
+from rich.console import Console, Group
 from rich.table import Table
+from rich.text import Text
+
+from smart_agenda.forecast import Forecast, format_clock_time
+from smart_agenda.history import ItemStats
+from smart_agenda.lib import Agenda, format_td, ns_to_timedelta
+from smart_agenda.picker import AgendaPicker
 
-from smart_agenda.lib import Agenda, format_td
+OVERRUN_THRESHOLD = timedelta(seconds=30)
+"""Items are highlighted once they exceed their planned duration by this amount."""
+TABLE_CHROME_HEIGHT = 4
+"""Lines of a table besides its rows (title and borders) plus the line of the cursor below it."""
 
 
-def _get_empty_table(title=None) -> Table:
+def _get_empty_table(title=None, show_eta: bool = False) -> Table:
     table = Table(show_header=False)
     table.add_column("Item")
     table.add_column("Plan", justify="right", no_wrap=True)
     table.add_column("Delta", justify="right", no_wrap=True, min_width=6)
+    if show_eta:
+        table.add_column("ETA", justify="right", no_wrap=True)
     if title:
         table.title = title
     return table
@@ -25,49 +41,395 @@ def render_initial_agenda(agenda: Agenda) -> Table:
     return table
 
 
-def render_running_agenda(agenda: Agenda, show_delta_for="previous+current") -> Table:
-    """Render a table for a currently running agenda."""
-    table = _get_empty_table(agenda.title)
-    for row_idx, item in enumerate(agenda.items):
-        name = item.name
-        time = item.delta
-        plan = format_td(item.duration, positive_sign=False)
-
-        if row_idx < agenda.current_item_idx:  # previous item
-            name = f"[dim]{name}"
-            plan = f"[dim]{plan}"
-            # show delta
-            # time += agenda.delta_for(row_idx)
-            # time = f"[dim]{format_td(time)}"
-            # show logged worktime
-            if item.worktime < timedelta(seconds=3):
-                time = ""
-            else:
-                time = f"[dim]{format_td(item.worktime, positive_sign=False)}"
-        elif row_idx == agenda.current_item_idx:  # active item
-            name = f"[b]{name}"
-            plan = f"[b]{plan}"
-            # show delta
-            time += agenda.delta
-            time = f"[b]{format_td(-time)}"
-            # show current worktime
-            # time = f"[dim]{format_td(item.worktime, positive_sign=False)}"
-        else:  # upcoming item
-            name = f"[dim]{name}"
-            plan = f"[dim]{plan}"
-            if item.worktime < timedelta(seconds=5):
-                time = ""
-            else:
-                time = f"[dim]{format_td(item.worktime, positive_sign=False)}"
-
-        # highlight items that exceed planned time by specific amount
-        if item.delta < -timedelta(seconds=30):
-            time = f"[red]{time}"
+def render_running_agenda(
+    agenda: Agenda, show_delta_for="previous+current", max_rows: int = None, show_sections: bool = False
+) -> Table:
+    """Render a table for a currently running agenda (see :func:`running_agenda_rows` for the parameters)."""
+    return render_rows(running_agenda_rows(agenda, max_rows, show_sections), agenda.title)
 
-        table.add_row(name, plan, time)
+
+def render_rows(rows: list[tuple[str, str, str]], title: str = None) -> Table:
+    """Render a table from previously formatted *rows*."""
+    table = _get_empty_table(title)
+    for row in rows:
+        table.add_row(*row)
     return table
 
 
+def running_agenda_rows(
+    agenda: Agenda, max_rows: int = None, show_sections: bool = False
+) -> list[tuple[str, str, str]]:
+    """Format the rows of a currently running agenda.
+
+    When the agenda has more than *max_rows* rows, only the items within :func:`visible_window` are formatted and the
+    hidden items before and after it are collapsed into a summary row each. With *show_sections*, each section starts
+    with a row of its planned duration and worktime in total. Rows can be compared with those of a previous frame to
+    skip rendering unchanged output.
+    """
+    return [_format_layout_row(agenda, *entry) for entry in _running_agenda_layout(agenda, max_rows, show_sections)]
+
+
+_LayoutEntry = Tuple[str, int, int, int]
+"""Kind of a row ("item", "section", "previous" or "upcoming"), the index (range) of its item(s) or section and how
+deep it is nested into sections."""
+
+
+def _running_agenda_layout(agenda: Agenda, max_rows: int = None, show_sections: bool = False) -> list[_LayoutEntry]:
+    n_items = len(agenda.items)
+    window_rows = max_rows
+    while True:
+        start, stop = visible_window(n_items, agenda.current_item_idx, window_rows)
+        layout = _window_layout(agenda, start, stop, show_sections)
+        if max_rows is None or len(layout) <= max_rows or window_rows <= MIN_WINDOW_ROWS:
+            return layout
+        # make room for the section rows within the window
+        window_rows -= len(layout) - max_rows
+
+
+def _window_layout(agenda: Agenda, start: int, stop: int, show_sections: bool) -> list[_LayoutEntry]:
+    n_items = len(agenda.items)
+    sections = agenda.sections if show_sections else []
+    layout = []
+    if start > 0:
+        layout.append(("previous", 0, start, 0))
+    depths = []
+    open_sections = []
+    sections_by_start = {}
+    for section_idx, section in enumerate(sections):
+        depths.append(0 if section.parent is None else depths[section.parent] + 1)
+        if section.start < start < section.stop:
+            # keep the sections of the first visible item on top
+            layout.append(("section", section_idx, section_idx, depths[section_idx]))
+            open_sections.append(section_idx)
+        elif start <= section.start < stop or section.start == stop == n_items:
+            sections_by_start.setdefault(section.start, []).append(section_idx)
+    for idx in range(start, stop + 1):
+        for section_idx in sections_by_start.get(idx, ()):
+            layout.append(("section", section_idx, section_idx, depths[section_idx]))
+            open_sections.append(section_idx)
+        while open_sections and sections[open_sections[-1]].stop <= idx:
+            open_sections.pop()
+        if idx < stop:
+            layout.append(("item", idx, idx, depths[open_sections[-1]] + 1 if open_sections else 0))
+    if stop < n_items:
+        layout.append(("upcoming", stop, n_items, 0))
+    return layout
+
+
+_STYLE_PREFIX = re.compile(r"(\[(dim|b|i)\])*")
+"""Markup that styles a whole row (and is followed by the indentation of the row)."""
+
+
+def _format_layout_row(agenda: Agenda, kind: str, start: int, stop: int, depth: int) -> tuple[str, str, str]:
+    if kind == "item":
+        name, plan, time = _format_running_row(agenda, start)
+    elif kind == "section":
+        name, plan, time = _format_section_row(agenda, start)
+    else:
+        min_worktime = timedelta(seconds=3 if kind == "previous" else 5)
+        name, plan, time = _format_hidden_rows(agenda, start, stop, kind, min_worktime)
+    if depth:
+        # indent name after its style
+        style_end = _STYLE_PREFIX.match(name).end()
+        name = f"{name[:style_end]}{'  ' * depth}{name[style_end:]}"
+    return name, plan, time
+
+
+def _is_live(agenda: Agenda, kind: str, start: int) -> bool:
+    """Return whether a row changes while time passes (the active item and the sections containing it)."""
+    idx = agenda.current_item_idx
+    if kind == "item":
+        return start == idx
+    if kind == "section":
+        section = agenda.sections[start]
+        return section.start <= idx < section.stop
+    return False
+
+
+MIN_WINDOW_ROWS = 3
+"""Smallest number of rows of a windowed agenda (the active item and a summary row on each side)."""
+
+
+def max_rows_for(console: Console) -> int:
+    """Return number of agenda rows that fit on the screen of *console*."""
+    return max(console.size.height - TABLE_CHROME_HEIGHT, MIN_WINDOW_ROWS)
+
+
+def visible_window(n_items: int, current_item_idx: int, max_rows: int = None) -> tuple[int, int]:
+    """Return start and stop index of the items that are shown in a table of at most *max_rows* rows.
+
+    All items are shown when they fit. Otherwise the window follows the active item, which is kept in the upper third to
+    show more upcoming than previous items, and one row is reserved for each summary of hidden items.
+
+    Examples:
+        >>> visible_window(5, 2, max_rows=10)
+        (0, 5)
+        >>> visible_window(100, 0, max_rows=10)
+        (0, 9)
+        >>> visible_window(100, 50, max_rows=10)
+        (48, 56)
+        >>> visible_window(100, 99, max_rows=10)
+        (91, 100)
+    """
+    if max_rows is None or n_items <= max_rows:
+        return 0, n_items
+    max_rows = max(max_rows, MIN_WINDOW_ROWS)
+    idx = min(max(current_item_idx, 0), n_items - 1)
+    n_shown = max_rows - 2
+    start = max(0, min(idx - (n_shown - 1) // 3, n_items - n_shown))
+    stop = start + n_shown
+    # a summary row is not needed at either end of the agenda
+    if start == 0:
+        stop += 1
+    elif stop == n_items:
+        start -= 1
+    return start, stop
+
+
+def _format_hidden_rows(agenda: Agenda, start: int, stop: int, label: str, min_worktime: timedelta):
+    n_hidden = stop - start
+    name = f"[dim][i]… {n_hidden} {label} item{'s' if n_hidden != 1 else ''}"
+    plan = f"[dim][i]{format_td(agenda.duration_for(start, stop), positive_sign=False)}"
+    worktime = agenda.worktime_for(start, stop)
+    time = f"[dim][i]{format_td(worktime, positive_sign=False)}" if worktime >= min_worktime else ""
+    return name, plan, time
+
+
+def _format_section_row(agenda: Agenda, section_idx: int) -> tuple[str, str, str]:
+    section = agenda.sections[section_idx]
+    style = "b" if _is_live(agenda, "section", section_idx) else "dim"
+    name = f"[{style}][u]{section.title}"
+    plan = f"[{style}]{format_td(agenda.duration_for(section.start, section.stop), positive_sign=False)}"
+    worktime = agenda.worktime_for(section.start, section.stop)
+    time = f"[{style}]{format_td(worktime, positive_sign=False)}" if worktime >= timedelta(seconds=3) else ""
+    return name, plan, time
+
+
+def _format_running_row(agenda: Agenda, row_idx: int) -> tuple[str, str, str]:
+    item = agenda.items[row_idx]
+    name = item.name
+    time = item.delta
+    plan = format_td(item.duration, positive_sign=False)
+
+    if row_idx < agenda.current_item_idx:  # previous item
+        name = f"[dim]{name}"
+        plan = f"[dim]{plan}"
+        # show delta
+        # time += agenda.delta_for(row_idx)
+        # time = f"[dim]{format_td(time)}"
+        # show logged worktime
+        if item.worktime < timedelta(seconds=3):
+            time = ""
+        else:
+            time = f"[dim]{format_td(item.worktime, positive_sign=False)}"
+    elif row_idx == agenda.current_item_idx:  # active item
+        name = f"[b]{name}"
+        plan = f"[b]{plan}"
+        # show delta
+        time += agenda.delta
+        time = f"[b]{format_td(-time)}"
+        # show current worktime
+        # time = f"[dim]{format_td(item.worktime, positive_sign=False)}"
+    else:  # upcoming item
+        name = f"[dim]{name}"
+        plan = f"[dim]{plan}"
+        if item.worktime < timedelta(seconds=5):
+            time = ""
+        else:
+            time = f"[dim]{format_td(item.worktime, positive_sign=False)}"
+
+    # highlight items that exceed planned time by specific amount
+    if item.delta < -OVERRUN_THRESHOLD:
+        time = f"[red]{time}"
+
+    return name, plan, time
+
+
+class _MarkupCell:
+    """Table cell whose markup can be replaced without rebuilding the table."""
+
+    def __init__(self, markup: str = ""):
+        self.markup = markup
+
+    def __rich__(self) -> Text:
+        return Text.from_markup(self.markup)
+
+
+_MINUTE_NS = 60 * 1_000_000_000
+
+
+class RunningAgendaRenderer:
+    """Render a running agenda, caching the formatted rows and table between frames.
+
+    Only the active item changes while time passes, so all other rows are formatted once and reused until the agenda
+    moves to another item. The cells of the active row (and of the rows of the sections containing it, see
+    *show_sections*) are updated in place. Call :meth:`invalidate` after the agenda's items have been changed.
+
+    With *max_rows* (e.g. the terminal height), only the rows around the active item are formatted and rendered (see
+    :func:`running_agenda_rows`), so the cost of a frame does not grow with the length of the agenda. *max_rows* can be
+    changed between updates, e.g. when the terminal was resized.
+
+    With *show_eta*, an additional column shows when the upcoming rows are projected to start, and the title shows
+    when the agenda is projected to end (see :mod:`smart_agenda.forecast`). These cells are only formatted again when
+    the projection changed, i.e. while the active item overruns.
+
+    Example:
+
+        >>> agenda = Agenda("Title", ["first 1:00", "second 2:00"])
+        >>> agenda.to_next()
+        False
+        >>> renderer = RunningAgendaRenderer(agenda)
+        >>> renderer.update()
+        True
+        >>> renderer.update()  # nothing changed within the same second
+        False
+    """
+
+    def __init__(self, agenda: Agenda, max_rows: int = None, show_sections: bool = False, show_eta: bool = False):
+        self.agenda = agenda
+        self.max_rows = max_rows
+        self.show_sections = show_sections
+        self.forecast = Forecast(agenda) if show_eta else None
+        self.etas: dict[int, str] = {}
+        """Formatted projected start of the upcoming rows by their position."""
+        self._etas_valid_until = 0
+        """Projected start of the next item up to which none of the formatted projections changes."""
+        self.rows: list[tuple[str, str, str]] = []
+        self._rows_key = None
+        self._layout: list[_LayoutEntry] = []
+        self._live_cells: dict[int, tuple[_MarkupCell, ...]] = {}
+        """Cells of the rows that change while time passes by their position."""
+        self._texts: dict[str, Text] = {}
+        """Parsed markup of the cells in the current table, which is reused when the agenda moves to another item."""
+        self._eta_cells: dict[int, _MarkupCell] = {}
+        self._table = None
+
+    def invalidate(self):
+        """Format all rows again on the next update."""
+        self._rows_key = None
+
+    def update(self) -> bool:
+        """Update the formatted rows and return whether they changed since the last update."""
+        agenda = self.agenda
+        rows_key = (agenda.current_item_idx, len(agenda.items), len(agenda.sections), self.max_rows, self.show_sections)
+        if rows_key != self._rows_key:
+            self._layout = _running_agenda_layout(agenda, self.max_rows, self.show_sections)
+            self.rows = [_format_layout_row(agenda, *entry) for entry in self._layout]
+            self._live_cells = {
+                row_idx: tuple(_MarkupCell() for _ in range(3))
+                for row_idx, (kind, start, _, _) in enumerate(self._layout)
+                if _is_live(agenda, kind, start)
+            }
+            self._rows_key = rows_key
+            self._table = None
+            if self.forecast is not None:
+                self.forecast.update()
+                self.etas = self._format_etas()
+                self._eta_cells = {row_idx: _MarkupCell() for row_idx in self.etas}
+            return True
+        changed = False
+        forecast = self.forecast
+        if forecast is not None and forecast.update() and forecast.next_start_ns >= self._etas_valid_until:
+            changed = self._update_etas()
+        for row_idx, cells in self._live_cells.items():
+            row = _format_layout_row(agenda, *self._layout[row_idx])
+            if row == self.rows[row_idx]:
+                continue
+            self.rows[row_idx] = row
+            for cell, markup in zip(cells, row):
+                cell.markup = markup
+            changed = True
+        return changed
+
+    def _format_etas(self) -> dict[int, str]:
+        """Format the projected start of the upcoming rows (items, sections and the summary of hidden items).
+
+        All projections move by the same amount, so they are valid until the first of them reaches the next minute.
+        """
+        forecast = self.forecast
+        etas = {}
+        end_ns = forecast.end_ns
+        until_next_minute = _MINUTE_NS - end_ns % _MINUTE_NS
+        current = self.agenda.current_item_idx
+        for row_idx, (kind, start, _, _) in enumerate(self._layout):
+            if kind == "section":
+                start = self.agenda.sections[start].start
+            if kind != "previous" and start > current:
+                start_ns = forecast.start_ns(start)
+                etas[row_idx] = f"[dim]{format_clock_time(start_ns)}"
+                until_next_minute = min(until_next_minute, _MINUTE_NS - start_ns % _MINUTE_NS)
+        self._etas_valid_until = forecast.next_start_ns + until_next_minute
+        return etas
+
+    def _update_etas(self) -> bool:
+        etas, title = self._format_etas(), self._title()
+        if etas == self.etas and (self._table is None or title == self._table.title):
+            return False
+        self.etas = etas
+        for row_idx, cell in self._eta_cells.items():
+            cell.markup = etas[row_idx]
+        if self._table is not None:
+            self._table.title = title
+        return True
+
+    def _title(self) -> str | None:
+        title = self.agenda.title
+        if self.forecast is None:
+            return title
+        end = f"ends {format_clock_time(self.forecast.end_ns)}"
+        return f"{title} ({end})" if title else end
+
+    def render(self) -> Table:
+        """Render a table from the current rows."""
+        if self._table is None:
+            table = _get_empty_table(self._title(), show_eta=self.forecast is not None)
+            texts = {}
+            for row_idx, row in enumerate(self.rows):
+                cells = self._live_cells.get(row_idx)
+                if cells is not None:
+                    for cell, markup in zip(cells, row):
+                        cell.markup = markup
+                    cells = list(cells)
+                else:
+                    # parse markup once instead of on every frame (or transition, as most rows stay the same)
+                    cells = [self._parse(markup, texts) for markup in row]
+                if self.forecast is not None:
+                    eta_cell = self._eta_cells.get(row_idx)
+                    if eta_cell is not None:
+                        eta_cell.markup = self.etas[row_idx]
+                    cells.append(eta_cell or "")
+                table.add_row(*cells)
+            self._texts = texts
+            self._table = table
+        return self._table
+
+    def _parse(self, markup: str, texts: dict[str, Text]) -> Text:
+        text = texts.get(markup)
+        if text is None:
+            text = self._texts.get(markup)
+            if text is None:
+                text = Text.from_markup(markup)
+            texts[markup] = text
+        return text
+
+
+def seconds_until_next_change(agenda: Agenda) -> float:
+    """Return the number of seconds until the output of :func:`render_running_agenda` changes on its own.
+
+    Only the active item changes over time: its delta ticks every full second and it is highlighted once it exceeds the
+    :data:`OVERRUN_THRESHOLD`.
+    """
+    item = agenda.current_item
+    if item is None or not item.is_active:
+        return 1.0
+    delta = (item.delta + agenda.delta).total_seconds()
+    rv = delta % 1 or 1.0
+    until_overrun = (item.delta + OVERRUN_THRESHOLD).total_seconds()
+    if 0 < until_overrun < rv:
+        rv = until_overrun
+    return rv
+
+
 def render_completed_agenda(agenda: Agenda) -> Table:
     """Render table for a previously completed agenda."""
     table = _get_empty_table(agenda.title)
@@ -77,3 +439,57 @@ def render_completed_agenda(agenda: Agenda) -> Table:
         time = f"{format_td(item.worktime, positive_sign=False)}"
         table.add_row(name, plan, time)
     return table
+
+
+def render_item_stats(items: list[ItemStats]) -> Table:
+    """Render a table of the overrun statistics of agenda items (see :func:`smart_agenda.history.item_stats`)."""
+    table = Table(title="Overrun of agenda items")
+    table.add_column("Agenda")
+    table.add_column("Item")
+    table.add_column("Meetings", justify="right")
+    table.add_column("Plan", justify="right", no_wrap=True)
+    table.add_column("Median", justify="right", no_wrap=True)
+    table.add_column("P90", justify="right", no_wrap=True)
+    table.add_column("Overrun", justify="right", no_wrap=True)
+    table.add_column("Trend", justify="right", no_wrap=True)
+    for item in items:
+        style = "red" if item.overrun_p50 > OVERRUN_THRESHOLD.total_seconds() else None
+        table.add_row(
+            item.title,
+            item.name,
+            str(item.sessions),
+            format_td(timedelta(seconds=item.planned), positive_sign=False),
+            format_td(timedelta(seconds=item.overrun_p50)),
+            format_td(timedelta(seconds=item.overrun_p90)),
+            f"{item.overrun_rate:.0%}",
+            format_td(timedelta(seconds=item.trend)),
+            style=style,
+        )
+    return table
+
+
+def render_agenda_picker(picker: AgendaPicker, max_rows: int) -> Group:
+    """Render the search line and a table of at most *max_rows* of the files that match the query of *picker*.
+
+    The table scrolls along with the selected file (see :mod:`smart_agenda.picker`).
+    """
+    n_matches = len(picker.matches)
+    start = max(0, min(picker.selected - max_rows // 3, n_matches - max_rows))
+    stop = min(start + max_rows, n_matches)
+    status = "" if picker.scanner.done else ", scanning..."
+    table = Table(title=f"{picker.title} ({n_matches} of {len(picker.scanner.results)} {picker.unit}{status})")
+    table.add_column("File", no_wrap=True)
+    table.add_column("Title", no_wrap=True)
+    table.add_column("Items", justify="right")
+    table.add_column("Plan", justify="right", no_wrap=True)
+    for idx in range(start, stop):
+        summary = picker.matches[idx]
+        table.add_row(
+            picker.relative_path(summary),
+            summary.title or "",
+            str(summary.items),
+            format_td(ns_to_timedelta(summary.duration_ns), positive_sign=False),
+            style="reverse" if idx == picker.selected else None,
+        )
+    query = Text.assemble(("> ", "bold"), picker.query, ("  (type to filter, enter to select, esc to cancel)", "dim"))
+    return Group(query, table)
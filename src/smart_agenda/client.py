@@ -0,0 +1,126 @@
+"""Thin client of the agenda server (``smart-agenda attach``), which shows an agenda that is running on the server."""
+
+from __future__ import annotations
+
+import itertools
+import json
+import socket
+import threading
+import time
+from typing import Callable
+
+from smart_agenda.lib import Agenda, AgendaItem
+from smart_agenda.server import parse_address
+
+
+class ServerError(Exception):
+    """Raised when the server rejects a request."""
+
+
+class AgendaClient:
+    """Connection to the agenda server at *address* (see :func:`~smart_agenda.server.parse_address`).
+
+    Requests block until their response arrives. Updates that are pushed by the server are passed to *on_push* in a
+    background thread.
+
+    Example:
+
+        >>> with AgendaClient("unix:/tmp/agenda.sock") as client:  # doctest: +SKIP
+        ...     client.request("next", room="Room A")
+    """
+
+    def __init__(self, address: str, on_push: Callable[[dict], None] = None, timeout: float = 5.0):
+        kind, *location = parse_address(address)
+        if kind == "unix":
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(location[0])
+        else:
+            self._socket = socket.create_connection(tuple(location))
+        self.on_push = on_push
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._responses: dict[int, dict] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._read, name="agenda-client", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> AgendaClient:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        """Whether the connection was closed (by either side)."""
+        return self._closed
+
+    def request(self, cmd: str, **params) -> dict:
+        """Send the request *cmd* with *params* and return the response.
+
+        Raises:
+            ServerError: if the server rejected the request, or did not answer in time.
+        """
+        request_id = next(self._ids)
+        line = json.dumps({"id": request_id, "cmd": cmd, **params}, separators=(",", ":"), ensure_ascii=False)
+        self._socket.sendall(line.encode() + b"\n")
+        with self._condition:
+            if not self._condition.wait_for(lambda: request_id in self._responses or self._closed, self.timeout):
+                raise ServerError(f"no response to '{cmd}'")
+            response = self._responses.pop(request_id, None)
+        if response is None:
+            raise ServerError("connection closed")
+        if not response.pop("ok"):
+            raise ServerError(response["error"])
+        return response
+
+    def _read(self):
+        with self._socket.makefile("rb") as f:
+            try:
+                for line in f:
+                    message = json.loads(line)
+                    if "id" in message:
+                        with self._condition:
+                            self._responses[message.pop("id")] = message
+                            self._condition.notify_all()
+                    elif self.on_push is not None:
+                        self.on_push(message)
+            except (OSError, ValueError):
+                pass
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self.on_push is not None:
+            self.on_push({"event": "disconnect"})
+
+    def close(self):
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        self._thread.join(1.0)
+
+
+def mirror_agenda(record: dict) -> Agenda:
+    """Return a local copy of the agenda in the full *record* (see :func:`~smart_agenda.ndjson.agenda_record`)."""
+    items = [AgendaItem.from_ns(item["name"], round(item["plan"] * 1e9)) for item in record["items"]]
+    agenda = Agenda(record["title"], items)
+    apply_record(agenda, record)
+    return agenda
+
+
+def apply_record(agenda: Agenda, record: dict):
+    """Update the worktimes and the current item of *agenda* to the state in *record*.
+
+    The active item keeps running on the local clock until the next record arrives.
+    """
+    now = time.monotonic_ns()
+    for item, worktime in zip(agenda.items, record["worktime"]):
+        item.past_worktime_ns = round(worktime * 1e9)
+        item.active_since_ns = None
+    agenda.current_item_idx = record["current"]
+    if record["active"]:
+        agenda.current_item.active_since_ns = now
+    agenda.invalidate()
@@ -0,0 +1,67 @@
+"""Clocks that agendas measure time with, which can be replaced by a virtual clock in tests and replays."""
+
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+
+
+class SystemClock:
+    """Clock of the operating system.
+
+    Durations are measured with the monotonic clock, which is not affected by changes of the system time, and the wall
+    clock is only used to relate them to calendar time.
+    """
+
+    def monotonic_ns(self) -> int:
+        return time.monotonic_ns()
+
+    def time_ns(self) -> int:
+        return time.time_ns()
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+SYSTEM_CLOCK = SystemClock()
+"""Clock that agendas use unless another one is given."""
+
+
+class VirtualClock(SystemClock):
+    """Clock that only moves when it is advanced, which makes anything timed with it deterministic and instant.
+
+    Examples:
+        >>> from smart_agenda.lib import Agenda, format_td
+        >>> clock = VirtualClock()
+        >>> agenda = Agenda("Title", ["first 1:00", "second 2:00"], clock=clock)
+        >>> agenda.to_next()
+        False
+        >>> clock.advance(75)
+        >>> format_td(agenda.current_item.worktime), format_td(agenda.delta_for(1))
+        ('+01:15', '-00:15')
+    """
+
+    def __init__(self, monotonic_ns: int = 0, time_ns: int = 0):
+        self._monotonic_ns = monotonic_ns
+        self._offset_ns = time_ns - monotonic_ns
+        """Difference between the wall clock and the monotonic clock."""
+
+    def monotonic_ns(self) -> int:
+        return self._monotonic_ns
+
+    def time_ns(self) -> int:
+        return self._monotonic_ns + self._offset_ns
+
+    def advance(self, seconds: float | timedelta):
+        """Move the clock forward by *seconds*."""
+        if isinstance(seconds, timedelta):
+            seconds = seconds.total_seconds()
+        self.advance_ns(round(seconds * 1e9))
+
+    def advance_ns(self, ns: int):
+        if ns < 0:
+            raise ValueError("clock cannot go backwards")
+        self._monotonic_ns += ns
+
+    def __repr__(self):
+        return f"{type(self).__name__}(monotonic_ns={self._monotonic_ns}, time_ns={self.time_ns()})"
@@ -0,0 +1,67 @@
+"""Fenwick tree (binary indexed tree) for sums over ranges of agenda items."""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+
+class FenwickTree:
+    """List of integers that supports updating a value and summing a range in O(log n).
+
+    Each node of the tree holds the sum of a power-of-two sized block of values, so changing a value only touches the
+    O(log n) blocks that contain it, instead of all prefix sums after it.
+
+    Examples:
+        >>> tree = FenwickTree([1, 2, 3, 4])
+        >>> tree.prefix_sum(3), tree.sum(1, 4)
+        (6, 9)
+        >>> tree[1] = 10
+        >>> tree.prefix_sum(3), tree[1], len(tree)
+        (14, 10, 4)
+    """
+
+    def __init__(self, values: Iterable[int] = ()):
+        self._values = list(values)
+        # build in O(n) by adding each node to its parent
+        self._tree = tree = [0] + self._values
+        n = len(tree)
+        for idx in range(1, n):
+            parent = idx + (idx & -idx)
+            if parent < n:
+                tree[parent] += tree[idx]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, idx: int) -> int:
+        return self._values[idx]
+
+    def __setitem__(self, idx: int, value: int):
+        self.add(idx, value - self._values[idx])
+
+    def add(self, idx: int, delta: int):
+        """Add *delta* to the value at *idx*."""
+        if idx < 0:
+            idx += len(self._values)
+        self._values[idx] += delta
+        tree = self._tree
+        idx += 1
+        while idx < len(tree):
+            tree[idx] += delta
+            idx += idx & -idx
+
+    def prefix_sum(self, stop: int) -> int:
+        """Return sum of the values before *stop*."""
+        rv = 0
+        tree = self._tree
+        while stop > 0:
+            rv += tree[stop]
+            stop &= stop - 1
+        return rv
+
+    def sum(self, start: int = 0, stop: int = None) -> int:
+        """Return sum of the values in ``[start:stop]`` (with the same semantics as slicing)."""
+        start, stop, _ = slice(start, stop).indices(len(self._values))
+        if stop <= start:
+            return 0
+        return self.prefix_sum(stop) - self.prefix_sum(start)
@@ -0,0 +1,78 @@
+"""Projected wall-clock times of a running agenda (``--eta``).
+
+The upcoming items are projected to start one after another as planned, as soon as the active item has used up its
+planned duration (or right away, once it overruns). All projections are based on a single running value, the time at
+which the next item starts (see :attr:`Forecast.next_start_ns`), so they cost O(1) each.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from smart_agenda.lib import Agenda, timedelta_to_ns
+
+
+def format_clock_time(time_ns: int) -> str:
+    """Format the wall-clock time *time_ns* (nanoseconds since the epoch) in local time, e.g. ``14:05``."""
+    return datetime.fromtimestamp(time_ns // 1_000_000_000).strftime("%H:%M")
+
+
+class Forecast:
+    """Project when the upcoming items of *agenda* start and when it ends, on the wall clock.
+
+    The wall clock is related to the monotonic clock of the agenda once, when the forecast is created. Hence, while the
+    active item is within its planned duration, the projection does not change at all, and once it overruns, the
+    projection moves along with the clock. Call :meth:`update` before reading projections (e.g. once per frame): it
+    takes O(1), also after the agenda moved to another item, as the planned durations up to any item are looked up in
+    the prefix sums of the agenda.
+
+    Examples:
+        >>> from smart_agenda.clock import VirtualClock
+        >>> clock = VirtualClock(time_ns=1_000 * 10**9)
+        >>> agenda = Agenda("Title", ["first 1:00", "second 2:00", "third 3:00"], clock=clock)
+        >>> agenda.to_next()
+        False
+        >>> forecast = Forecast(agenda)
+        >>> clock.advance(30)
+        >>> forecast.update(), forecast.start_ns(2) // 10**9, forecast.end_ns // 10**9
+        (False, 1180, 1360)
+        >>> clock.advance(45)  # the first item overruns by 15 seconds
+        >>> forecast.update(), forecast.start_ns(2) // 10**9, forecast.end_ns // 10**9
+        (True, 1195, 1375)
+        >>> forecast.start_ns(0) is None
+        True
+    """
+
+    def __init__(self, agenda: Agenda):
+        self.agenda = agenda
+        clock = agenda.clock
+        self._wall_offset_ns = clock.time_ns() - clock.monotonic_ns()
+        """Difference between the wall clock and the monotonic clock."""
+        self.next_start_ns = 0
+        """Projected wall-clock time at which the item after the active item starts (in ns since the epoch)."""
+        self.update()
+
+    def update(self) -> bool:
+        """Project from the current time, and return whether the projection changed."""
+        now = self.agenda.clock.monotonic_ns()
+        item = self.agenda.current_item
+        next_start = now if item is None else now + max(item.duration_ns - item.worktime_ns_at(now), 0)
+        next_start += self._wall_offset_ns
+        changed = next_start != self.next_start_ns
+        self.next_start_ns = next_start
+        return changed
+
+    def start_ns(self, idx: int) -> int | None:
+        """Return the projected wall-clock start of the item at *idx* (or None if it is not upcoming).
+
+        *idx* may also be the number of items, for the projected end of the agenda.
+        """
+        current = self.agenda.current_item_idx
+        if idx <= current:
+            return None
+        return self.next_start_ns + timedelta_to_ns(self.agenda.duration_for(current + 1, idx))
+
+    @property
+    def end_ns(self) -> int:
+        """Projected wall-clock time at which the agenda ends."""
+        return self.start_ns(len(self.agenda.items))
@@ -0,0 +1,258 @@
+"""History of completed sessions, stored column by column for statistics over thousands of sessions.
+
+Every item of a completed session is a row of the history. Rows are appended to one binary file per column, which are
+read back as :class:`array.array` without creating Python objects per row or parsing any agenda. Titles and item names
+are stored once in the manifest and referenced by their index (the key of a row).
+
+Example:
+
+    >>> history = History(app_dir / ".history")  # doctest: +SKIP
+    >>> history.append(agenda)  # doctest: +SKIP
+    >>> [(stats.name, stats.overrun_p50) for stats in item_stats(history.read())]  # doctest: +SKIP
+    [('First Topic', 184.5), ('Check-In', 12.0), ('AOB', -95.0), ('Second Topic', -120.0)]
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import operator
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+
+from smart_agenda.lib import Agenda
+
+MANIFEST_FILENAME = "history.json"
+HISTORY_VERSION = 1
+ROW_COLUMNS = {"key": "i", "session": "i", "planned": "d", "actual": "d"}
+"""Typecodes of the columns with a row per item: key of title and item name, index of the session and planned and
+actual duration (in seconds)."""
+SESSION_COLUMNS = {"completed": "d"}
+"""Typecodes of the columns with a row per session: when it was completed (seconds since epoch)."""
+OVERRUN_THRESHOLD = 30.0
+"""Items count as overrun once they exceed their planned duration by this many seconds."""
+
+
+@dataclass
+class HistoryColumns:
+    keys: list[tuple[str, str]]
+    """Title of the agenda and name of the item for every key."""
+    key: array
+    session: array
+    planned: array
+    actual: array
+    completed: array
+
+    def __len__(self) -> int:
+        return len(self.key)
+
+
+@dataclass
+class ItemStats:
+    title: str
+    name: str
+    sessions: int
+    """Number of sessions the item was part of."""
+    planned: float
+    """Planned duration in the most recent session (in seconds)."""
+    overrun_p50: float
+    """Median of how much longer the item took than planned (in seconds, negative if it was shorter)."""
+    overrun_p90: float
+    """90th percentile of the overrun (in seconds)."""
+    overrun_rate: float
+    """Share of the sessions in which the item overran by more than :data:`OVERRUN_THRESHOLD`."""
+    trend: float
+    """Change of the overrun from one session to the next (in seconds, least squares fit)."""
+
+
+class History:
+    """History of the sessions completed with the agendas in *directory* (see module docstring).
+
+    Rows are only appended, and the session column is written last, so rows of a session that was not written
+    completely (e.g. when the process was killed) are ignored when reading and overwritten by the next session.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.path = directory / MANIFEST_FILENAME
+
+    def append(self, agenda: Agenda, completed: float = None):
+        """Add the items of the completed *agenda* (at *completed* seconds since epoch, defaults to now)."""
+        if completed is None:
+            completed = agenda.clock.time_ns() / 1e9
+        self.directory.mkdir(parents=True, exist_ok=True)
+        keys = self._read_keys()
+        key_ids = {key: idx for idx, key in enumerate(keys)}
+        n_keys = len(keys)
+        rows = {column: array(typecode) for column, typecode in ROW_COLUMNS.items()}
+        session = self._repair()
+        for item in agenda.items:
+            key = (agenda.title or "", item.name)
+            if key not in key_ids:
+                key_ids[key] = len(keys)
+                keys.append(key)
+            rows["key"].append(key_ids[key])
+            rows["session"].append(session)
+            rows["planned"].append(item.duration_ns / 1e9)
+            rows["actual"].append(item.past_worktime_ns / 1e9)
+        if len(keys) > n_keys:
+            self._write_keys(keys)
+        for column, values in rows.items():
+            self._append_column(column, values)
+        self._append_column("completed", array(SESSION_COLUMNS["completed"], [completed]))
+
+    def read(self) -> HistoryColumns:
+        """Read all columns of the history."""
+        columns = {
+            column: self._read_column(column, typecode)
+            for column, typecode in {**ROW_COLUMNS, **SESSION_COLUMNS}.items()
+        }
+        n_rows = self._complete_rows(columns, len(columns["completed"]))
+        for column in ROW_COLUMNS:
+            del columns[column][n_rows:]
+        return HistoryColumns(self._read_keys(), **columns)
+
+    def _column_path(self, column: str) -> Path:
+        return self.directory / f"{column}.bin"
+
+    def _read_column(self, column: str, typecode: str) -> array:
+        values = array(typecode)
+        try:
+            data = self._column_path(column).read_bytes()
+        except FileNotFoundError:
+            return values
+        # ignore a partially written value at the end of the column
+        values.frombytes(data[: len(data) - len(data) % values.itemsize])
+        return values
+
+    def _append_column(self, column: str, values: array):
+        with self._column_path(column).open("ab") as f:
+            f.write(values.tobytes())
+
+    @staticmethod
+    def _complete_rows(columns: dict[str, array], n_sessions: int) -> int:
+        """Return the number of rows that belong to the *n_sessions* completely written sessions."""
+        n_rows = min(len(columns[column]) for column in ROW_COLUMNS)
+        # rows are appended in the order of their sessions
+        return bisect_left(columns["session"], n_sessions, 0, n_rows)
+
+    def _repair(self) -> int:
+        """Drop the rows of an incompletely written session and return the index of the next session."""
+        sizes = {}
+        for column, typecode in {**ROW_COLUMNS, **SESSION_COLUMNS}.items():
+            try:
+                sizes[column] = self._column_path(column).stat().st_size // array(typecode).itemsize
+            except FileNotFoundError:
+                sizes[column] = 0
+        n_sessions = sizes.pop("completed")
+        if len(set(sizes.values())) > 1 or self._last_session() >= n_sessions:
+            columns = {column: self._read_column(column, ROW_COLUMNS[column]) for column in ROW_COLUMNS}
+            n_rows = self._complete_rows(columns, n_sessions)
+            for column, typecode in ROW_COLUMNS.items():
+                os.truncate(self._column_path(column), n_rows * array(typecode).itemsize)
+        size = n_sessions * array(SESSION_COLUMNS["completed"]).itemsize
+        if self._column_path("completed").exists():
+            os.truncate(self._column_path("completed"), size)
+        return n_sessions
+
+    def _last_session(self) -> int:
+        session = array(ROW_COLUMNS["session"])
+        try:
+            with self._column_path("session").open("rb") as f:
+                f.seek(-session.itemsize, os.SEEK_END)
+                session.frombytes(f.read())
+        except (FileNotFoundError, OSError):
+            return -1
+        return session[0]
+
+    def _read_keys(self) -> list[tuple[str, str]]:
+        try:
+            with self.path.open() as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return []
+        if data.get("version") != HISTORY_VERSION:
+            raise ValueError(f"'{self.path}' is not a session history (version {HISTORY_VERSION})")
+        return [tuple(key) for key in data["keys"]]
+
+    def _write_keys(self, keys: list[tuple[str, str]]):
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with tmp_path.open("w") as f:
+            json.dump({"version": HISTORY_VERSION, "keys": keys}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+
+def item_stats(
+    columns: HistoryColumns, title: str = None, min_sessions: int = 1, threshold: float = OVERRUN_THRESHOLD
+) -> list[ItemStats]:
+    """Compute overrun statistics of every item in *columns*, sorted by median overrun (longest first).
+
+    Only items of agendas whose title contains *title* (ignoring case) and that were part of at least *min_sessions*
+    sessions are included. The overruns of all rows are computed and grouped by key (in the order of their sessions) in
+    a single pass over the columns.
+    """
+    groups: list[list[float]] = [[] for _ in columns.keys]
+    for key, value in zip(columns.key, map(operator.sub, columns.actual, columns.planned)):
+        groups[key].append(value)
+    # the last occurrence of a key wins, so this maps every key to the row of its most recent session
+    last_rows = dict(zip(columns.key, range(len(columns))))
+
+    stats = []
+    for key, values in enumerate(groups):
+        key_title, name = columns.keys[key]
+        if not values or len(values) < min_sessions:
+            continue
+        if title is not None and title.casefold() not in key_title.casefold():
+            continue
+        ordered = sorted(values)
+        stats.append(
+            ItemStats(
+                key_title,
+                name,
+                sessions=len(values),
+                planned=columns.planned[last_rows[key]],
+                overrun_p50=percentile(ordered, 50),
+                overrun_p90=percentile(ordered, 90),
+                overrun_rate=(len(ordered) - bisect_right(ordered, threshold)) / len(ordered),
+                trend=slope(values),
+            )
+        )
+    return sorted(stats, key=lambda item: item.overrun_p50, reverse=True)
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """Return the *p*-th percentile of the sorted values *ordered*, interpolating between the closest ranks.
+
+    Examples:
+        >>> percentile([1, 2, 3, 4], 50)
+        2.5
+        >>> percentile([10], 90)
+        10
+    """
+    pos = (len(ordered) - 1) * p / 100
+    lower = math.floor(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def slope(values: array | list[float]) -> float:
+    """Return the slope of the least squares line through *values* (at x = 0, 1, ...).
+
+    Examples:
+        >>> slope([1, 3, 5])
+        2.0
+        >>> slope([7])
+        0.0
+    """
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x, mean_y = (n - 1) / 2, sum(values) / n
+    covariance = sum(map(operator.mul, range(n), values)) - n * mean_x * mean_y
+    variance = (n - 1) * n * (n + 1) / 12
+    return covariance / variance
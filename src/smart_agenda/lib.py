@@ -1,62 +1,349 @@
 # required to support <=Python3.9
 from __future__ import annotations
 
+import functools
+import itertools
 import logging
-import re
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Tuple
 
-import pick
+from smart_agenda.clock import SYSTEM_CLOCK, SystemClock
+from smart_agenda.fenwick import FenwickTree
 
-agenda_item_pattern = re.compile(r"[-\*]? ?([\w\d \t\-,]*) \(?((?:\d{1,2}:)?\d?\d\:\d\d)\)?\n")
-"""Pattern that matches agenda items with durations."""
+if TYPE_CHECKING:  # pragma: no cover
+    from smart_agenda.bundle import AgendaBundle
+    from smart_agenda.session import SessionLog
 
 
-@dataclass
 class AgendaItem:
-    name: str
-    duration: timedelta
+    """Item of an agenda with its planned duration and the time worked on it.
+
+    Times are kept as integer nanoseconds of the monotonic clock (:func:`time.monotonic_ns`), which is not affected by
+    changes of the system time. They are only converted to :class:`~datetime.timedelta` when accessed through
+    :attr:`duration`, :attr:`past_worktime`, :attr:`worktime` or :attr:`delta`. While the item is active,
+    :attr:`active_since_ns` holds the monotonic clock of when it was started. The clock is read from *clock* (see
+    :mod:`smart_agenda.clock`), which is usually set by the agenda the item belongs to.
+    """
+
+    __slots__ = ("name", "duration_ns", "past_worktime_ns", "active_since_ns", "clock")
+
+    def __init__(
+        self,
+        name: str,
+        duration: timedelta | str,
+        active_since_ns: int = None,
+        past_worktime: timedelta = timedelta(),
+        clock: SystemClock = SYSTEM_CLOCK,
+    ):
+        # strip leading and trailing whitespace from name
+        self.name = name.strip()
+        self.duration = duration
+        self.active_since_ns = active_since_ns
+        self.past_worktime = past_worktime
+        self.clock = clock
+
+    @classmethod
+    def from_ns(
+        cls, name: str, duration_ns: int, past_worktime_ns: int = 0, clock: SystemClock = SYSTEM_CLOCK
+    ) -> AgendaItem:
+        """Create an item from times in ns, skipping the conversions of :meth:`__init__` (*name* must be stripped)."""
+        item = cls.__new__(cls)
+        item.name = name
+        item.duration_ns = duration_ns
+        item.past_worktime_ns = past_worktime_ns
+        item.active_since_ns = None
+        item.clock = clock
+        return item
+
+    def start(self, now: int = None):
+        self.active_since_ns = self.clock.monotonic_ns() if now is None else now
+
+    def stop(self, now: int = None):
+        self.past_worktime_ns = self.worktime_ns_at(self.clock.monotonic_ns() if now is None else now)
+        self.active_since_ns = None
 
-    active_since: datetime = None
-    past_worktime: timedelta = timedelta()
+    @property
+    def duration(self) -> timedelta:
+        return ns_to_timedelta(self.duration_ns)
 
-    def start(self):
-        self.active_since = datetime.now()
+    @duration.setter
+    def duration(self, duration: timedelta | str):
+        # parse duration string to timedelta
+        if isinstance(duration, str):
+            duration = parse_duration(duration)
+        self.duration_ns = timedelta_to_ns(duration)
 
-    def stop(self):
-        self.past_worktime += time_passed(self.active_since)
-        self.active_since = None
+    @property
+    def past_worktime(self) -> timedelta:
+        return ns_to_timedelta(self.past_worktime_ns)
+
+    @past_worktime.setter
+    def past_worktime(self, past_worktime: timedelta):
+        self.past_worktime_ns = timedelta_to_ns(past_worktime)
 
     @property
     def is_active(self):
-        return self.active_since is not None
+        return self.active_since_ns is not None
+
+    def worktime_ns_at(self, now: int) -> int:
+        """Return worktime (in ns) at monotonic clock *now*."""
+        if self.active_since_ns is None:
+            return self.past_worktime_ns
+        return self.past_worktime_ns + now - self.active_since_ns
 
     @property
     def worktime(self) -> timedelta:
-        if self.is_active:
-            return self.past_worktime + time_passed(self.active_since)
-        else:
-            return self.past_worktime
+        return ns_to_timedelta(self.worktime_ns_at(self.clock.monotonic_ns()))
 
     @property
     def delta(self) -> timedelta:
-        return self.duration - self.worktime
+        return ns_to_timedelta(self.duration_ns - self.worktime_ns_at(self.clock.monotonic_ns()))
 
     def __str__(self):
         return f"{self.name} ({self.duration})"
 
-    def __post_init__(self):
-        # strip leading and trailing whitespace from name
-        self.name = self.name.strip()
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(name={self.name!r}, duration={self.duration!r}, "
+            f"active_since_ns={self.active_since_ns!r}, past_worktime={self.past_worktime!r})"
+        )
 
-        # parse duration string to timedelta
-        if isinstance(self.duration, str):
-            if len(self.duration) <= 5:
-                time = datetime.strptime(self.duration, "%M:%S")
-            else:
-                time = datetime.strptime(self.duration, "%H:%M:%S")
-            self.duration = timedelta(hours=time.hour, minutes=time.minute, seconds=time.second)
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.name, self.duration_ns, self.active_since_ns, self.past_worktime_ns) == (
+            other.name,
+            other.duration_ns,
+            other.active_since_ns,
+            other.past_worktime_ns,
+        )
+
+    __hash__ = None
+
+
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def ns_to_timedelta(ns: int) -> timedelta:
+    """Convert *ns* nanoseconds to timedelta, rounding up to full microseconds.
+
+    Rounding up makes sure that any time that has passed results in a non-zero timedelta.
+
+    Examples:
+        >>> ns_to_timedelta(1_500).total_seconds(), ns_to_timedelta(-1_500).total_seconds()
+        (2e-06, -1e-06)
+    """
+    return -(-ns // 1000) * _MICROSECOND
+
+
+def timedelta_to_ns(td: timedelta) -> int:
+    """Convert timedelta *td* to nanoseconds."""
+    return td // _MICROSECOND * 1000
+
+
+AGENDA_ITEM_NAME_CHARS = frozenset(" \t-,_")
+"""Characters allowed in agenda item names (in addition to alphanumeric characters)."""
+AGENDA_ITEM_BULLETS = ("-", "*")
+"""Optional list bullets preceding an agenda item."""
+
+
+def _is_name_char(char: str) -> bool:
+    return char.isalnum() or char in AGENDA_ITEM_NAME_CHARS
+
+
+DURATION_UNITS = "hms"
+"""Units of durations given as e.g. ``1h30m`` (in descending order)."""
+
+
+def _split_duration(token: str) -> tuple[int | None, int | None, int | None] | None:
+    """Split *token* into hours, minutes and seconds (or None for components that are not given).
+
+    Supported formats are ``[H]H:MM:SS`` and ``[M]M:SS`` as well as unit-based durations like ``90m`` or ``1h30``,
+    where a trailing number refers to the next smaller unit. Returns None if *token* is not a duration.
+
+    Examples:
+        >>> _split_duration("1:00"), _split_duration("12:34:56"), _split_duration("1h30")
+        ((None, 1, 0), (12, 34, 56), (1, 30, None))
+        >>> _split_duration("1:2:3"), _split_duration("123:00"), _split_duration("30m1h")
+        (None, None, None)
+    """
+    if ":" in token:
+        parts = token.split(":")
+        if not 2 <= len(parts) <= 3 or len(parts[-1]) != 2:
+            return None
+        if not all(1 <= len(part) <= 2 and part.isascii() and part.isdigit() for part in parts):
+            return None
+        return (None,) * (3 - len(parts)) + tuple(int(part) for part in parts)
+
+    values = [None, None, None]
+    digits = ""
+    unit_idx = -1
+    for char in token:
+        if "0" <= char <= "9":
+            digits += char
+        elif char in DURATION_UNITS and digits and DURATION_UNITS.index(char) > unit_idx:
+            unit_idx = DURATION_UNITS.index(char)
+            values[unit_idx] = int(digits)
+            digits = ""
+        else:
+            return None
+    if digits:
+        # trailing number without unit (e.g. `1h30`) refers to the next smaller unit
+        if not 0 <= unit_idx < len(DURATION_UNITS) - 1:
+            return None
+        values[unit_idx + 1] = int(digits)
+    if unit_idx == -1:
+        return None
+    return tuple(values)
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_duration(duration: str) -> timedelta:
+    """Parse *duration* string to a timedelta.
+
+    Only the leading component of a duration may exceed its usual range (e.g. ``90:00`` or ``90m``).
+
+    Examples:
+        >>> parse_duration("12:34:56")
+        datetime.timedelta(seconds=45296)
+        >>> parse_duration("1h30")
+        datetime.timedelta(seconds=5400)
+        >>> parse_duration("1:60")
+        Traceback (most recent call last):
+        ValueError: invalid duration '1:60': seconds must be below 60
+        >>> parse_duration("99999999999999999999h")
+        Traceback (most recent call last):
+        ValueError: invalid duration '99999999999999999999h': too long
+
+    Raises:
+        ValueError: if *duration* cannot be parsed.
+    """
+    components = _split_duration(duration)
+    if components is None:
+        raise ValueError(f"invalid duration '{duration}', expected e.g. '5:00', '1:30:00', '90m' or '1h30'")
+    hours, minutes, seconds = components
+    if minutes is not None and hours is not None and minutes >= 60:
+        raise ValueError(f"invalid duration '{duration}': minutes must be below 60")
+    if seconds is not None and (hours is not None or minutes is not None) and seconds >= 60:
+        raise ValueError(f"invalid duration '{duration}': seconds must be below 60")
+    try:
+        return timedelta(seconds=(hours or 0) * 3600 + (minutes or 0) * 60 + (seconds or 0))
+    except OverflowError:
+        raise ValueError(f"invalid duration '{duration}': too long") from None
+
+
+def parse_agenda_item(line: str) -> AgendaItem | None:
+    """Parse a single *line* into an agenda item.
+
+    An agenda item consists of a name, followed by a space and a duration at the very end of the line. The duration
+    may optionally be enclosed in brackets. Only the trailing run of valid name characters is used as name. The line
+    is scanned once from its end, so parsing is linear in the length of the line.
+
+    Examples:
+        >>> item = parse_agenda_item("- First Item (12:00)")
+        >>> item.name, item.duration
+        ('First Item', datetime.timedelta(seconds=720))
+        >>> parse_agenda_item("Mentioning a duration (1:00) in the middle of a line") is None
+        True
+    """
+    head, sep, duration = line.rstrip("\r\n").rpartition(" ")
+    if not sep:
+        return None
+
+    if duration.startswith("("):
+        duration = duration[1:]
+    if duration.endswith(")"):
+        duration = duration[:-1]
+    if _split_duration(duration) is None:
+        return None
+
+    start = len(head)
+    while start > 0 and _is_name_char(head[start - 1]):
+        start -= 1
+    name = head[start:]
+    if name.startswith(AGENDA_ITEM_BULLETS):
+        name = name[1:]
+    return AgendaItem(name, duration)
+
+
+def iter_lines(content: str | Iterable[str]) -> Iterator[str]:
+    """Iterate over lines of *content* (a string or file object) without copying the whole document.
+
+    Examples:
+        >>> list(iter_lines("first\\nsecond"))
+        ['first\\n', 'second']
+    """
+    if not isinstance(content, str):
+        yield from content
+        return
+    start = 0
+    while start < len(content):
+        end = content.find("\n", start) + 1 or len(content)
+        yield content[start:end]
+        start = end
+
+
+def parse_title(line: str) -> str | None:
+    """Parse the title of an agenda from its first *line* (or return None if it isn't a heading).
+
+    Examples:
+        >>> parse_title("# Weekly Meeting\\n"), parse_title("Check-In 5:00")
+        ('Weekly Meeting', None)
+    """
+    if line.startswith("#"):
+        return line[2:].strip()
+    return None
+
+
+def parse_heading(line: str) -> tuple[int, str] | None:
+    """Parse level and title of a markdown heading (or return None if *line* isn't a heading).
+
+    Examples:
+        >>> parse_heading("## Exercises\\n"), parse_heading("#hashtag")
+        ((2, 'Exercises'), None)
+    """
+    if not line.startswith("#"):
+        return None
+    title = line.lstrip("#")
+    if title and not title[0].isspace():
+        return None
+    return len(line) - len(title), title.strip()
+
+
+ParsedLine = Tuple[Optional[Tuple[int, str]], Optional[AgendaItem]]
+"""Heading and agenda item of a line (either of which may be None)."""
+
+
+def parse_line(line: str) -> ParsedLine:
+    """Parse the heading and agenda item of a single *line*.
+
+    Examples:
+        >>> parse_line("## Intro\\n"), parse_line("# Break 5:00\\n")[0]
+        (((2, 'Intro'), None), (1, 'Break 5:00'))
+    """
+    return parse_heading(line), parse_agenda_item(line)
+
+
+@dataclass
+class Section:
+    """Section of an agenda, which spans the items from its heading up to the next heading of the same or a higher
+    level."""
+
+    title: str
+    level: int
+    """Number of ``#`` of the heading."""
+    start: int
+    """Index of the first item of the section."""
+    stop: int
+    """Index after the last item of the section (including its subsections)."""
+    parent: int | None = None
+    """Index of the enclosing section in :attr:`Agenda.sections` (or None for top-level sections)."""
+
+    def __len__(self) -> int:
+        return self.stop - self.start
 
 
 NOT_RUNNING = -1
@@ -68,17 +355,71 @@ class Agenda:
     items: list[AgendaItem | str]
 
     @classmethod
-    def loads(cls, content: str, title: str = None) -> "Agenda":
+    def loads(cls, content: str | Iterable[str], title: str = None, clock: SystemClock = SYSTEM_CLOCK) -> "Agenda":
+        """Load agenda from *content*, which is either a string or a file object (timed with *clock*)."""
+        lines = iter_lines(content)
+        first_line = next(lines, "")
         if title is None:
             # try to read title from file content
-            if content.splitlines()[0].startswith("#"):
-                title = content.splitlines()[0][2:]
-            else:
-                title = None
+            title = parse_title(first_line)
+
+        if parse_heading(first_line) is not None and parse_agenda_item(first_line) is None:
+            # the heading in the first line is the title of the agenda rather than a section
+            first_line = ""
+        items, sections = cls.parse_sections(itertools.chain((first_line,), lines))
+        return cls(title, items, sections=sections, clock=clock)
 
-        agenda_items = [AgendaItem(*match) for match in agenda_item_pattern.findall(content + "\n")]
+    @staticmethod
+    def parse_sections(fp: str | Iterable[str]) -> tuple[list[AgendaItem], list[Section]]:
+        """Parse agenda items and the sections they are grouped into by headings from *fp*.
 
-        return cls(title, agenda_items)
+        Headings with a duration are agenda items, like any other line with a duration, which end the previous sections
+        of the same or a lower level.
+
+        Examples:
+            >>> items, sections = Agenda.parse_sections("## Intro\\nHi 5:00\\n## Work\\n### A\\nA 1:00\\nB 2:00\\n")
+            >>> [(section.title, section.start, section.stop, section.parent) for section in sections]
+            [('Intro', 0, 1, None), ('Work', 1, 3, None), ('A', 1, 3, 1)]
+        """
+        return Agenda.group_sections(map(parse_line, iter_lines(fp)))
+
+    @staticmethod
+    def group_sections(lines: Iterable[ParsedLine]) -> tuple[list[AgendaItem], list[Section]]:
+        """Collect the agenda items and sections of previously parsed *lines* (see :func:`parse_line`)."""
+        items, sections, open_sections = [], [], []
+        for heading, item in lines:
+            if heading is not None:
+                # close the sections that this heading is not part of
+                level, heading_title = heading
+                while open_sections and sections[open_sections[-1]].level >= level:
+                    sections[open_sections.pop()].stop = len(items)
+            if item is not None:
+                items.append(item)
+            elif heading is not None:
+                parent = open_sections[-1] if open_sections else None
+                open_sections.append(len(sections))
+                sections.append(Section(heading_title, level, len(items), len(items), parent))
+        for idx in open_sections:
+            sections[idx].stop = len(items)
+        return items, sections
+
+    @staticmethod
+    def load_many(path: str | Path) -> AgendaBundle:
+        """Open the agendas in the file at *path*, which starts a new agenda with every ``#`` heading.
+
+        Agendas are only parsed when they are accessed, see :class:`~smart_agenda.bundle.AgendaBundle`.
+        """
+        from smart_agenda.bundle import AgendaBundle
+
+        return AgendaBundle(path)
+
+    @staticmethod
+    def iter_items(fp: str | Iterable[str]) -> Iterator[AgendaItem]:
+        """Lazily yield agenda items from *fp*, which is either a string or a file object."""
+        for line in iter_lines(fp):
+            item = parse_agenda_item(line)
+            if item is not None:
+                yield item
 
     def __post_init__(self):
         if self.title:
@@ -88,10 +429,31 @@ class Agenda:
         for idx, item in enumerate(self.items):
             if isinstance(item, str):
                 logging.debug("parsing '%s' to AgendaItem", item)
-                self.items[idx] = AgendaItem(*agenda_item_pattern.search(item + "\n").groups())
+                parsed_item = parse_agenda_item(item)
+                if parsed_item is None:
+                    raise ValueError(f"'{item}' is not a valid agenda item")
+                self.items[idx] = parsed_item
+        if self.clock is not SYSTEM_CLOCK:
+            for item in self.items:
+                item.clock = self.clock
 
     current_item_idx: int = NOT_RUNNING
 
+    log: SessionLog = field(default=None, init=False, repr=False, compare=False)
+    """Session log that records all transitions between agenda items (optional)."""
+
+    sections: list[Section] = field(default_factory=list)
+    """Sections of the agenda (by their headings), in the order they appear."""
+
+    clock: SystemClock = field(default=SYSTEM_CLOCK, repr=False, compare=False)
+    """Clock that the agenda and its items are timed with."""
+
+    _duration_prefix: list[int] = field(default=None, init=False, repr=False, compare=False)
+    """Cached prefix sums of the planned item durations in ns (``_duration_prefix[i]`` covers ``items[:i]``)."""
+
+    _worktimes: FenwickTree = field(default=None, init=False, repr=False, compare=False)
+    """Cached past worktimes of the items in ns, which are updated in O(log n) whenever an item is stopped."""
+
     @property
     def current_item(self):
         if self.current_item_idx == NOT_RUNNING:
@@ -108,11 +470,67 @@ class Agenda:
         return self.delta_for(self.current_item_idx)
 
     def delta_for(self, idx: int):
-        """Return delta time for item at *idx*."""
-        rv = timedelta()
-        for item in self.items[:idx]:
-            rv += item.delta
-        return rv
+        """Return delta time for item at *idx*.
+
+        The delta of all items before *idx* is computed from cached sums of their planned durations and past
+        worktimes, so only the active item (if any) needs to consult the clock.
+        """
+        n_items = len(self.items)
+        stop = idx if 0 <= idx <= n_items else slice(idx).indices(n_items)[1]
+        rv = self._get_duration_prefix()[stop] - self._get_worktimes().prefix_sum(stop)
+        if 0 <= self.current_item_idx < stop:
+            rv -= self._active_worktime_ns()
+        return ns_to_timedelta(rv)
+
+    def duration_for(self, start: int = 0, stop: int = None) -> timedelta:
+        """Return planned duration of the items in ``items[start:stop]``.
+
+        Examples:
+            >>> agenda = Agenda("Title", ["first 1:00", "second 2:00", "third 3:00"])
+            >>> agenda.duration_for(1)
+            datetime.timedelta(seconds=300)
+            >>> agenda.duration_for(0, 2)
+            datetime.timedelta(seconds=180)
+        """
+        prefix = self._get_duration_prefix()
+        start, stop, _ = slice(start, stop).indices(len(self.items))
+        return ns_to_timedelta(max(prefix[stop] - prefix[start], 0))
+
+    def worktime_for(self, start: int = 0, stop: int = None) -> timedelta:
+        """Return worktime of the items in ``items[start:stop]`` (including the running time of the active item)."""
+        start, stop, _ = slice(start, stop).indices(len(self.items))
+        rv = self._get_worktimes().sum(start, stop)
+        if start <= self.current_item_idx < stop:
+            rv += self._active_worktime_ns()
+        return ns_to_timedelta(rv)
+
+    def _active_worktime_ns(self) -> int:
+        """Return worktime of the active item that is not part of the cached worktimes (i.e. since it was started)."""
+        idx = self.current_item_idx
+        return self.items[idx].worktime_ns_at(self.clock.monotonic_ns()) - self._get_worktimes()[idx]
+
+    def _get_duration_prefix(self) -> list[int]:
+        if self._duration_prefix is None or len(self._duration_prefix) != len(self.items) + 1:
+            self._duration_prefix = prefix = [0]
+            for item in self.items:
+                prefix.append(prefix[-1] + item.duration_ns)
+        return self._duration_prefix
+
+    def _get_worktimes(self) -> FenwickTree:
+        if self._worktimes is None or len(self._worktimes) != len(self.items):
+            self._worktimes = FenwickTree(item.past_worktime_ns for item in self.items)
+        return self._worktimes
+
+    def invalidate(self):
+        """Drop cached timing information after :attr:`items` have been edited."""
+        self._duration_prefix = None
+        self._worktimes = None
+
+    def _stop_current_item(self, now: int):
+        item = self.current_item
+        item.stop(now)
+        if self._worktimes is not None:
+            self._worktimes[self.current_item_idx] = item.past_worktime_ns
 
     @property
     def _previous_item_available(self):
@@ -124,31 +542,76 @@ class Agenda:
         Returns:
             True when there are no more agenda items to work on. False otherwise.
         """
+        now = self.clock.monotonic_ns()
         if self.current_item_idx >= 0:
-            self.current_item.stop()
+            self._stop_current_item(now)
         if self._next_item_available:
             self.current_item_idx += 1
-            self.current_item.start()
+            self.current_item.start(now)
+            if self.log is not None:
+                self.log.append(self.current_item_idx, now)
             return False
+        if self.log is not None:
+            self.log.complete(now)
         return True
 
     def to_previous(self):
         """Go to previous agenda item."""
         if self.current_item_idx == NOT_RUNNING:
             return
-        self.current_item.stop()
+        now = self.clock.monotonic_ns()
+        self._stop_current_item(now)
         if self._previous_item_available:
             self.current_item_idx -= 1
-            self.current_item.start()
+            self.current_item.start(now)
         else:
             self.current_item_idx = NOT_RUNNING
-
-
-def time_passed(start: datetime, end: datetime = None) -> timedelta:
-    """Return how much time has passed between start and (optional) end."""
-    if end is None:
-        end = datetime.now()
-    return end - start
+        if self.log is not None:
+            self.log.append(self.current_item_idx, now)
+
+    def merge(self, other: Agenda):
+        """Take over title, items and sections of *other* (an edited version of the agenda), matching items by name.
+
+        Items that are in both agendas keep their worktime (and stay active) with the planned duration of *other*. When
+        a name is used for several items, they are matched in order. If the current item was removed, the item that
+        took its place becomes the current item.
+
+        Examples:
+            >>> agenda = Agenda("Title", ["first 1:00", "second 2:00"])
+            >>> agenda.to_next(), agenda.to_next()
+            (False, False)
+            >>> agenda.merge(Agenda("Title", ["intro 1:00", "first 1:00", "second 3:00"]))
+            >>> agenda.current_item_idx, agenda.current_item.duration
+            (2, datetime.timedelta(seconds=180))
+        """
+        if not other.items:
+            raise ValueError("agenda has no items")
+        previous: dict[str, deque[AgendaItem]] = {}
+        for item in self.items:
+            previous.setdefault(item.name, deque()).append(item)
+        items = []
+        for new_item in other.items:
+            matches = previous.get(new_item.name)
+            if matches:
+                item = matches.popleft()
+                item.duration_ns = new_item.duration_ns
+            else:
+                item = AgendaItem.from_ns(new_item.name, new_item.duration_ns, clock=self.clock)
+            items.append(item)
+
+        current = self.current_item
+        if current is not None:
+            idx = next((idx for idx, item in enumerate(items) if item is current), None)
+            if idx is None:
+                now = self.clock.monotonic_ns()
+                current.stop(now)
+                idx = min(self.current_item_idx, len(items) - 1)
+                items[idx].start(now)
+            self.current_item_idx = idx
+        self.title = other.title
+        self.items = items
+        self.sections = other.sections
+        self.invalidate()
 
 
 def format_td(td: timedelta, positive_sign=True) -> str:
@@ -176,17 +639,21 @@ def format_td(td: timedelta, positive_sign=True) -> str:
     return rv
 
 
-def select_agenda_file(parent: Path = None) -> str:
-    """Select an agenda file from *parent* directory.
+def select_agenda_file(parent: Path = None, cache_path: Path = None) -> str | None:
+    """Select an agenda file from *parent* directory and its subdirectories (see :mod:`smart_agenda.picker`).
 
     Args:
         parent: directory to scan for agenda files (defaults to `Path.cwd`).
+        cache_path: file to cache the summaries of agenda files in (they are not cached across calls if omitted).
+
+    Returns:
+        the path of the selected file, or None if the selection was cancelled.
     """
+    from smart_agenda.picker import pick_agenda_file
+
     if parent is None:
         parent = Path.cwd()
-    md_files = list(parent.glob("*.md"))
-    option, idx = pick.pick(md_files)
-    return option
+    return pick_agenda_file(parent, cache_path=cache_path)
 
 
 def format_agenda(agenda: Agenda):
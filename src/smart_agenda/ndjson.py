@@ -0,0 +1,121 @@
+"""Headless output of a running agenda as newline-delimited JSON (``--output ndjson``).
+
+Every line is a JSON object, e.g. for a dashboard that displays the timer of a meeting::
+
+    {"event":"start","time":1697630000.0,"title":"Weekly","items":[{"name":"Check-In","plan":300},...],...}
+    {"event":"tick","time":1697630001.0,"current":0,"active":true,"delta":299.0,"worktime":[1.0,0.0,0.0]}
+    {"event":"next","time":1697630042.5,"current":1,"active":true,"delta":557.5,"worktime":[42.5,0.0,0.0]}
+
+``delta`` is the planned minus the actual time of all items up to and including the current one (in seconds), which
+is positive while the meeting is on time. This module does not depend on rich.
+"""
+
+from __future__ import annotations
+
+import collections
+import json
+import os
+import threading
+from typing import IO
+
+from smart_agenda.lib import Agenda
+
+EVENTS = ("start", "tick", "next", "previous", "complete")
+"""Events that trigger a line of output."""
+
+
+def agenda_record(agenda: Agenda, event: str, full: bool = None) -> dict:
+    """Return the state of *agenda* as record for *event*.
+
+    The title and the planned items are only part of *full* records (by default of the ``start`` record), as they do
+    not change while the agenda is running.
+    """
+    clock = agenda.clock
+    record = {"event": event, "time": round(clock.time_ns() / 1e9, 3)}
+    if full or (full is None and event == "start"):
+        record["title"] = agenda.title
+        record["items"] = [{"name": item.name, "plan": item.duration_ns / 1e9} for item in agenda.items]
+    record["current"] = agenda.current_item_idx
+    current_item = agenda.current_item
+    record["active"] = current_item is not None and current_item.is_active
+    record["delta"] = round(agenda.delta_for(agenda.current_item_idx + 1).total_seconds(), 3)
+    now = clock.monotonic_ns()
+    record["worktime"] = [round(item.worktime_ns_at(now) / 1e9, 1) for item in agenda.items]
+    return record
+
+
+class NdjsonWriter:
+    """Write records as JSON lines to *output* (a path, e.g. of a FIFO, or a binary file) in a background thread.
+
+    Writing never blocks the caller, even when the reader of *output* is slow or has not opened a FIFO yet. Up to
+    *max_pending* records are buffered, beyond that the oldest records that are marked as droppable (i.e. ticks,
+    which are superseded by the next one) are discarded. Consecutive records are written together.
+
+    Example:
+
+        >>> with NdjsonWriter("/tmp/agenda.fifo") as writer:  # doctest: +SKIP
+        ...     writer.write(agenda_record(agenda, "start"))
+    """
+
+    def __init__(self, output: str | os.PathLike | IO[bytes], max_pending: int = 100):
+        self.output = output
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending: collections.deque[tuple[bytes, bool]] = collections.deque()
+        self._condition = threading.Condition()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name="ndjson-writer", daemon=True)
+
+    def __enter__(self) -> NdjsonWriter:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, record: dict, droppable: bool = False):
+        """Queue *record* for writing."""
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode() + b"\n"
+        with self._condition:
+            if len(self._pending) >= self.max_pending:
+                self._drop()
+            self._pending.append((line, droppable))
+            self._condition.notify()
+
+    def _drop(self):
+        for idx, (_, droppable) in enumerate(self._pending):
+            if droppable:
+                del self._pending[idx]
+                self.dropped += 1
+                return
+
+    def close(self, timeout: float = 1.0):
+        """Write the pending records (waiting at most *timeout* seconds for a stalled reader) and stop writing."""
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        if isinstance(self.output, (str, os.PathLike)):
+            # opening a FIFO waits for its reader
+            with open(self.output, "wb", buffering=0) as f:
+                self._write_pending(f)
+        else:
+            self._write_pending(self.output)
+
+    def _write_pending(self, f: IO[bytes]):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closing:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                lines = b"".join(line for line, _ in self._pending)
+                self._pending.clear()
+            try:
+                f.write(lines)
+                f.flush()
+            except BrokenPipeError:
+                return
@@ -1,6 +1,8 @@
 import click
+from click.shell_completion import CompletionItem
 
 from smart_agenda.cli import app_dir
+from smart_agenda.store import AgendaIndex
 
 
 def recent(func=None, **options):
@@ -21,11 +23,17 @@ def recent(func=None, **options):
 
 def cb_recent(ctx, param, filename):
     if filename:
-        fp = app_dir / filename
-        if not fp.exists():
-            raise click.BadParameter(f"'{filename}' not found in '{app_dir}'")
-        return fp
+        index = AgendaIndex(app_dir)
+        entry = index.get(filename)
+        if entry is None:
+            # fall back to searching agenda titles
+            matches = index.search(filename)
+            if len(matches) != 1:
+                candidates = "".join(f"\n  {match.name} ({match.title})" for match in matches)
+                raise click.BadParameter(f"'{filename}' not found in '{app_dir}'{candidates}")
+            entry = matches[0]
+        return entry.name
 
 
 def comp_recent_agendas(ctx, args, incomplete):  # noqa
-    return sorted(fp.name for fp in app_dir.glob("*") if not incomplete or fp.name.startswith(incomplete))
+    return [CompletionItem(entry.name, help=entry.title) for entry in AgendaIndex(app_dir).find(prefix=incomplete)]
@@ -0,0 +1,367 @@
+"""Interactive selection of an agenda file in a directory tree (``--pick``).
+
+The tree is scanned in a background thread (see :class:`AgendaScanner`), which summarizes every markdown file (title,
+number of items and planned duration). Summaries are cached by path, modification time and size (see
+:class:`SummaryCache`), so files that did not change are not read again. The list of files is shown right away and
+filled in as the scan proceeds, and can be narrowed down by typing (see :class:`AgendaPicker`). The agendas of a
+bundle are picked the same way (see :class:`AgendaList` and :func:`~smart_agenda.bundle.select_agenda`).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import astuple, dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+from smart_agenda.check import is_agenda_heading
+from smart_agenda.lib import parse_agenda_item
+from smart_agenda.terminal import KEY_BACKSPACE, KEY_DOWN, KEY_ENTER, KEY_ESCAPE, KEY_UP, KeyReader
+
+CACHE_VERSION = 1
+UPDATE_INTERVAL = 0.05
+"""Minimum number of seconds between notifications about new scan results, so a fast scan does not flood the UI."""
+PICKER_CHROME_HEIGHT = 7
+"""Lines of the picker besides its rows (search line, title, header and borders of the table, and the cursor)."""
+
+
+@dataclass
+class AgendaSummary:
+    path: str
+    title: str | None
+    """Title of the first agenda in the file."""
+    agendas: int
+    items: int
+    duration_ns: int
+    """Planned duration of all items."""
+
+
+def summarize_agenda_file(path: str | os.PathLike) -> AgendaSummary:
+    """Summarize the agendas in the file at *path* (lines with invalid durations are ignored).
+
+    Raises:
+        OSError, UnicodeDecodeError: if the file cannot be read.
+    """
+    with open(path, encoding="utf-8") as f:
+        return summarize_agenda_lines(f, str(path))
+
+
+def summarize_agenda_lines(lines: Iterable[str], path: str) -> AgendaSummary:
+    """Summarize the agendas in *lines* (of the file at *path*), ignoring lines with invalid durations."""
+    title, agendas, items, duration_ns = None, 0, 0, 0
+    blank = True
+    for line in lines:
+        if is_agenda_heading(line):
+            if agendas == 0 and not blank:
+                agendas += 1  # content before the first heading
+            agendas += 1
+            title = line[1:].strip() if title is None else title
+        blank = blank and not line.strip()
+        try:
+            item = parse_agenda_item(line)
+        except ValueError:
+            continue
+        if item is not None:
+            items += 1
+            duration_ns += item.duration_ns
+    return AgendaSummary(path, title, agendas or 1, items, duration_ns)
+
+
+class SummaryCache:
+    """Summaries of agenda files, stored in the JSON file at *path* (or only kept in memory if *path* is None).
+
+    A summary is only returned as long as the modification time and size of its file are unchanged. The file is read
+    on first access, i.e. in the thread of the scanner. It is replaced on every save, so it should be in a directory of
+    its own (the index of saved agendas is invalidated by any change to the app dir, see
+    :class:`~smart_agenda.store.AgendaIndex`).
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self._entries: dict[str, list] = None
+        self._dirty = False
+
+    def _get_entries(self) -> dict[str, list]:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                data = json.loads(self.path.read_text()) if self.path is not None else {}
+                self._entries = data["files"] if data["version"] == CACHE_VERSION else {}
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        return self._entries
+
+    def get(self, path: str, stat: os.stat_result) -> AgendaSummary | None:
+        entry = self._get_entries().get(path)
+        if entry is None or entry[:2] != [stat.st_mtime_ns, stat.st_size]:
+            return None
+        return AgendaSummary(path, *entry[2:])
+
+    def put(self, summary: AgendaSummary, stat: os.stat_result):
+        self._get_entries()[summary.path] = [stat.st_mtime_ns, stat.st_size, *astuple(summary)[1:]]
+        self._dirty = True
+
+    def prune(self, root: str, seen: set[str]):
+        """Forget the files in *root* that are not in *seen* (e.g. because they were deleted)."""
+        prefix = os.path.join(root, "")
+        for path in [path for path in self._get_entries() if path.startswith(prefix) and path not in seen]:
+            del self._entries[path]
+            self._dirty = True
+
+    def save(self):
+        if self.path is None or not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        tmp_path.write_text(json.dumps({"version": CACHE_VERSION, "files": self._entries}, separators=(",", ":")))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+class AgendaScanner:
+    """Summarize the markdown files below *root* in a background thread.
+
+    Hidden directories (e.g. ``.git``) are skipped. Directories are visited depth first, each with its files before its
+    subdirectories in sorted order, so the order of :attr:`results` is the same on every scan. *on_update* is called
+    from the scanning thread (at most every :data:`UPDATE_INTERVAL` seconds) when there are new results, and once more
+    when the scan is :attr:`done`.
+
+    Example:
+
+        >>> with AgendaScanner(Path.cwd(), SummaryCache(), on_update=keys.wakeup) as scanner:  # doctest: +SKIP
+        ...     while not scanner.done:
+        ...         keys.read_key()
+        ...         print(len(scanner.results))
+    """
+
+    def __init__(self, root: Path, cache: SummaryCache, on_update: Callable[[], object] = None):
+        self.root = Path(root).absolute()
+        self.cache = cache
+        self.on_update = on_update
+        self.results: list[AgendaSummary] = []
+        """Summaries found so far (only ever appended to, so it can be read from other threads)."""
+        self.parsed = 0
+        """Number of files that were read, as they were not cached."""
+        self._done = threading.Event()
+        self._closing = threading.Event()
+        self._notified = 0.0
+        self._thread = threading.Thread(target=self._run, name="agenda-scanner", daemon=True)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def start(self):
+        self._thread.start()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    def close(self):
+        self._closing.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def __enter__(self) -> AgendaScanner:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        root = str(self.root)
+        seen = set()
+        try:
+            for entry in self._iter_files(root):
+                if self._closing.is_set():
+                    break
+                summary = self._summarize(entry)
+                if summary is not None:
+                    seen.add(summary.path)
+                    self.results.append(summary)
+                    self._notify()
+            if not self._closing.is_set():
+                self.cache.prune(root, seen)
+            self.cache.save()
+        except OSError as e:
+            logging.warning("Cannot scan '%s' for agendas: %s", root, e)
+        finally:
+            self._done.set()
+            if self.on_update is not None:
+                self.on_update()
+
+    def _iter_files(self, root: str):
+        stack = [root]
+        while stack and not self._closing.is_set():
+            try:
+                with os.scandir(stack.pop()) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                logging.debug("skipping directory: %s", e)
+                continue
+            yield from (entry for entry in entries if entry.name.endswith(".md") and entry.is_file())
+            # push in reverse, so subdirectories are visited in sorted order
+            stack.extend(entry.path for entry in reversed(entries) if not entry.name.startswith(".") and entry.is_dir())
+
+    def _summarize(self, entry: os.DirEntry) -> AgendaSummary | None:
+        try:
+            stat = entry.stat()
+            summary = self.cache.get(entry.path, stat)
+            if summary is None:
+                summary = summarize_agenda_file(entry.path)
+                self.parsed += 1
+                self.cache.put(summary, stat)
+        except (OSError, UnicodeDecodeError) as e:
+            logging.debug("skipping agenda file: %s", e)
+            return None
+        return summary
+
+    def _notify(self):
+        now = time.monotonic()
+        if self.on_update is not None and now - self._notified >= UPDATE_INTERVAL:
+            self._notified = now
+            self.on_update()
+
+
+class AgendaList:
+    """Summaries of agendas that are known up front (e.g. of the agendas in a bundle), to be picked like the files of
+    an :class:`AgendaScanner` (with paths relative to *root*)."""
+
+    done = True
+
+    def __init__(self, root: Path, results: list[AgendaSummary]):
+        self.root = Path(root).absolute()
+        self.results = results
+
+
+class AgendaPicker:
+    """State of the picker: the files of *scanner* (or agendas of a list) that match the typed :attr:`query`, and the
+    selected one.
+
+    Call :meth:`update` to take over new results of the scanner, and :meth:`handle_key` for every key press. Only new
+    results are matched against the query, unless the query changed.
+
+    Examples:
+        >>> scanner = AgendaScanner(Path("/agendas"), SummaryCache())
+        >>> scanner.results.append(AgendaSummary("/agendas/team/weekly.md", "Weekly", 1, 5, 0))
+        >>> scanner.results.append(AgendaSummary("/agendas/team/retro.md", None, 1, 3, 0))
+        >>> picker = AgendaPicker(scanner)
+        >>> picker.update(), len(picker.matches)
+        (True, 2)
+        >>> [picker.handle_key(key) for key in ("r", "e", "t", KEY_ENTER)]
+        [None, None, None, 'select']
+        >>> picker.relative_path(picker.selection)
+        'team/retro.md'
+    """
+
+    def __init__(self, scanner: AgendaScanner | AgendaList, title: str = "Select an agenda", unit: str = "files"):
+        self.scanner = scanner
+        self.title = title
+        self.unit = unit
+        """What the results of the scanner are called, in the title of the table."""
+        self.query = ""
+        self.matches: list[AgendaSummary] = []
+        self.selected = 0
+        self._seen = 0
+        self._search_keys: list[str] = []
+        """Casefolded relative path and title of each result of the scanner."""
+        self._prefix_len = len(os.path.join(str(scanner.root), ""))
+
+    @property
+    def selection(self) -> AgendaSummary | None:
+        return self.matches[self.selected] if self.matches else None
+
+    def relative_path(self, summary: AgendaSummary) -> str:
+        """Return the path of *summary* relative to the scanned directory."""
+        start = self._prefix_len
+        return summary.path[start:]
+
+    def update(self) -> bool:
+        """Match the results of the scanner that are new since the last update, and return whether any matched.
+
+        A result matches if its title or its path (relative to the scanned directory) contains the query.
+        """
+        results = self.scanner.results
+        start, stop = self._seen, len(results)
+        search_keys = self._search_keys
+        first_new = len(search_keys)
+        for summary in results[first_new:stop]:
+            search_keys.append(f"{self.relative_path(summary)}\0{summary.title or ''}".casefold())
+        query = self.query.casefold()
+        new = [summary for summary, key in zip(results[start:stop], search_keys[start:stop]) if query in key]
+        self._seen = stop
+        self.matches += new
+        return bool(new)
+
+    def handle_key(self, key: str) -> str | None:
+        """Handle *key* and return "select" or "cancel" when the picker is done (or None otherwise)."""
+        if key in (KEY_ENTER, "\r"):
+            return "select" if self.matches else None
+        if key == KEY_ESCAPE:
+            return "cancel"
+        if key in (KEY_UP, KEY_DOWN):
+            step = -1 if key == KEY_UP else 1
+            self.selected = min(max(self.selected + step, 0), max(len(self.matches) - 1, 0))
+            return None
+        if key in (KEY_BACKSPACE, "\b"):
+            self._set_query(self.query[:-1])
+        elif key.isprintable():
+            self._set_query(self.query + key)
+        return None
+
+    def _set_query(self, query: str):
+        selection = self.selection
+        self.query = query
+        self.matches, self._seen = [], 0
+        self.update()
+        # keep the selected file selected, if it still matches
+        self.selected = next((idx for idx, match in enumerate(self.matches) if match is selection), 0)
+
+
+def pick_agenda_file(root: Path, cache_path: Path = None, console=None) -> str | None:
+    """Let the user pick an agenda file below *root* and return its path (or None if the picker was cancelled).
+
+    Summaries of the files are cached in *cache_path* (if given).
+    """
+    with KeyReader() as keys, AgendaScanner(root, SummaryCache(cache_path), on_update=keys.wakeup) as scanner:
+        selection = run_picker(AgendaPicker(scanner), keys, console=console)
+    return selection.path if selection is not None else None
+
+
+def run_picker(picker: AgendaPicker, keys: KeyReader = None, console=None) -> AgendaSummary | None:
+    """Show *picker* until the user selected a summary (or cancelled, then None is returned).
+
+    Keys are read from *keys* (or a new :class:`~smart_agenda.terminal.KeyReader` of stdin).
+    """
+    from rich.console import Console
+    from rich.live import Live
+
+    from smart_agenda.cli_output import render_agenda_picker
+
+    if keys is None:
+        with KeyReader() as keys:
+            return run_picker(picker, keys, console=console)
+    console = console or Console()
+    scanner = picker.scanner
+    picker.update()
+
+    def render():
+        max_rows = max(console.height - PICKER_CHROME_HEIGHT, 1)
+        return render_agenda_picker(picker, max_rows=max_rows)
+
+    with Live(render(), console=console, auto_refresh=False, transient=True) as live:
+        while True:
+            done = scanner.done
+            key = keys.read_key()
+            action = picker.handle_key(key) if key else None
+            if action == "select":
+                return picker.selection
+            if action == "cancel":
+                return None
+            if picker.update() or key or done != scanner.done:
+                live.update(render(), refresh=True)
@@ -0,0 +1,239 @@
+"""Instrumentation of the live view (enabled with ``--profile``)."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import time
+from pathlib import Path
+from typing import Iterator
+
+import click
+
+SUB_BUCKETS = 4
+"""Number of buckets per power of two, which bounds the relative error of percentiles to 25%."""
+
+
+class Histogram:
+    """Histogram of non-negative integer values with logarithmic buckets.
+
+    Recording a value is O(1) and memory does not grow with the number of values, so histograms can record every frame
+    of a long session. Count, sum, minimum and maximum are exact, percentiles are estimated from the buckets.
+
+    Examples:
+        >>> h = Histogram()
+        >>> for value in range(1, 101):
+        ...     h.record(value)
+        >>> h.count, h.min, h.max, h.mean
+        (100, 1, 100, 50.5)
+        >>> h.percentile(50)
+        55
+    """
+
+    def __init__(self):
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value: int):
+        if value < 1:
+            value = 0
+        idx = _bucket(value)
+        self.buckets[idx] = self.buckets.get(idx, 0) + 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> int:
+        """Return estimate of the *p*-th percentile (the upper bound of the bucket that contains it)."""
+        if not self.count:
+            return 0
+        rank = p / 100 * self.count
+        seen = 0
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if seen >= rank:
+                return min(max(_bucket_upper_bound(idx), self.min), self.max)
+        return self.max  # pragma: no cover
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min or 0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max or 0,
+        }
+
+
+def _bucket(value: int) -> int:
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - 3  # keep the two bits following the leading bit
+    return shift * SUB_BUCKETS + (value >> shift)
+
+
+def _bucket_upper_bound(idx: int) -> int:
+    if idx < SUB_BUCKETS:
+        return idx
+    shift, mantissa = divmod(idx - SUB_BUCKETS, SUB_BUCKETS)
+    return ((mantissa + SUB_BUCKETS + 1) << shift) - 1
+
+
+class CountingWriter:
+    """File wrapper that counts the bytes written to *file*."""
+
+    def __init__(self, file):
+        self.file = file
+        self.bytes_written = 0
+
+    def write(self, s: str) -> int:
+        self.bytes_written += len(s.encode(errors="replace"))
+        return self.file.write(s)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+class NullProfiler:
+    """Profiler that does not record anything (used when profiling is disabled)."""
+
+    def wrap(self, file):
+        return file
+
+    def frame_started(self):
+        pass
+
+    def frame_rendered(self):
+        pass
+
+    def frame_shown(self):
+        pass
+
+    def frame_skipped(self):
+        pass
+
+    def key_pressed(self):
+        pass
+
+
+class FrameProfiler(NullProfiler):
+    """Record render time, latency from key press to screen update and output volume of each frame.
+
+    A frame is rendered between :meth:`frame_started` and :meth:`frame_rendered`, and written to the terminal until
+    :meth:`frame_shown`. Output is only counted when writing through a file returned by :meth:`wrap`.
+    """
+
+    METRICS = {
+        "render": "ns",
+        "refresh": "ns",
+        "key_latency": "ns",
+        "bytes": "B",
+    }
+    """Recorded metrics and their units."""
+
+    def __init__(self):
+        self.histograms = {name: Histogram() for name in self.METRICS}
+        self.frames_skipped = 0
+        self.keys = 0
+        self.started = time.perf_counter_ns()
+        self._writer = None
+        self._frame_started = self._frame_rendered = self._key_pressed = None
+        self._bytes_written = 0
+
+    def wrap(self, file):
+        self._writer = CountingWriter(file)
+        return self._writer
+
+    def frame_started(self):
+        self._frame_started = time.perf_counter_ns()
+
+    def frame_rendered(self):
+        self._frame_rendered = time.perf_counter_ns()
+
+    def frame_shown(self):
+        now = time.perf_counter_ns()
+        self.histograms["render"].record(self._frame_rendered - self._frame_started)
+        self.histograms["refresh"].record(now - self._frame_rendered)
+        if self._key_pressed is not None:
+            self.histograms["key_latency"].record(now - self._key_pressed)
+            self._key_pressed = None
+        if self._writer is not None:
+            self.histograms["bytes"].record(self._writer.bytes_written - self._bytes_written)
+            self._bytes_written = self._writer.bytes_written
+
+    def frame_skipped(self):
+        self.frames_skipped += 1
+
+    def key_pressed(self):
+        self.keys += 1
+        if self._key_pressed is None:
+            self._key_pressed = time.perf_counter_ns()
+
+    def summary(self) -> dict:
+        duration = (time.perf_counter_ns() - self.started) / 1e9
+        return {
+            "duration": duration,
+            "frames": self.histograms["render"].count,
+            "frames_skipped": self.frames_skipped,
+            "keys": self.keys,
+            "bytes_per_second": self.histograms["bytes"].sum / duration if duration else 0.0,
+            "metrics": {name: {"unit": unit, **self.histograms[name].summary()} for name, unit in self.METRICS.items()},
+        }
+
+    def format_summary(self) -> str:
+        """Format summary as human-readable table."""
+        summary = self.summary()
+        lines = [
+            f"{summary['frames']} frames ({summary['frames_skipped']} unchanged frames skipped), {summary['keys']} keys"
+            f" in {summary['duration']:.1f} s, {summary['bytes_per_second']:.0f} B/s written to terminal",
+            f"{'':<12} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}",
+        ]
+        for name, metric in summary["metrics"].items():
+            values = (metric[key] for key in ("mean", "p50", "p90", "p99", "max"))
+            lines.append(f"{name:<12} " + " ".join(f"{_format_value(v, metric['unit']):>9}" for v in values))
+        return "\n".join(lines)
+
+
+def _format_value(value: float, unit: str) -> str:
+    if unit == "ns":
+        return f"{value / 1e6:.2f}ms"
+    return f"{value:.0f}{unit}"
+
+
+@contextlib.contextmanager
+def profile_session(enabled: bool, output: Path = None, cprofile_output: Path = None) -> Iterator[NullProfiler]:
+    """Provide a profiler for the live view of a session and report its results at the end of the session.
+
+    Args:
+        enabled: whether to record frames (a :class:`NullProfiler` is provided otherwise).
+        output: write summary as JSON to this file instead of printing it (implies *enabled*).
+        cprofile_output: dump :mod:`cProfile` statistics of the whole session to this file.
+    """
+    profiler = FrameProfiler() if enabled or output else NullProfiler()
+    if cprofile_output:
+        import cProfile
+
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    try:
+        yield profiler
+    finally:
+        if cprofile_output:
+            cprofile.disable()
+            cprofile.dump_stats(cprofile_output)
+        if output:
+            output.write_text(json.dumps(profiler.summary(), indent=2))
+        elif enabled:
+            click.echo(profiler.format_summary(), err=True)
@@ -0,0 +1,166 @@
+"""Live reload of the agenda file while the meeting is running (enabled with ``--watch``).
+
+The file is watched in a background thread (see :mod:`smart_agenda.watch`), which also reads and parses every new
+version of the agenda. The render loop only merges the parsed agenda into the running one (see
+:meth:`~smart_agenda.lib.Agenda.merge`), so it never waits for the file.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+from pathlib import Path
+from typing import Callable
+
+from smart_agenda.lib import Agenda, ParsedLine, iter_lines, parse_line, parse_title
+from smart_agenda.watch import FileWatcher
+
+
+class IncrementalParser:
+    """Parse successive versions of an agenda, only parsing the lines that changed since the previous version.
+
+    The lines before the first and after the last changed line are taken over from the previous version, so saving a
+    small edit of a long agenda only parses the edited lines.
+
+    Examples:
+        >>> parser = IncrementalParser()
+        >>> len(parser.parse("# Title\\nfirst 1:00\\nsecond 2:00\\n").items), parser.lines_parsed
+        (2, 3)
+        >>> [item.name for item in parser.parse("# Title\\nfirst 1:00\\nnew 1:00\\nsecond 2:00\\n").items]
+        ['first', 'new', 'second']
+        >>> parser.lines_parsed
+        1
+    """
+
+    def __init__(self):
+        self.lines: list[str] = []
+        self.parsed: list[ParsedLine] = []
+        self.lines_parsed = 0
+        """Number of lines that were parsed for the most recent version."""
+
+    def parse(self, content: str) -> Agenda:
+        """Parse the agenda of *content* (as :meth:`Agenda.loads`)."""
+        lines = list(iter_lines(content))
+        previous = self.lines
+        common = min(len(previous), len(lines))
+        prefix = 0
+        while prefix < common and previous[prefix] == lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < common - prefix and previous[-1 - suffix] == lines[-1 - suffix]:
+            suffix += 1
+        stop, previous_stop = len(lines) - suffix, len(previous) - suffix
+        changed = lines[prefix:stop]
+        self.parsed = self.parsed[:prefix] + list(map(parse_line, changed)) + self.parsed[previous_stop:]
+        self.lines = lines
+        self.lines_parsed = len(changed)
+
+        title = parse_title(lines[0]) if lines else None
+        heading, item = self.parsed[0] if lines else (None, None)
+        # as in Agenda.loads, the heading in the first line is the title of the agenda rather than a section
+        skip = heading is not None and item is None
+        items, sections = Agenda.group_sections(itertools.islice(self.parsed, int(skip), None))
+        return Agenda(title, items, sections=sections)
+
+
+def read_watched_agenda(path: Path, title: str | None) -> str | None:
+    """Read the content of the agenda *title* from the file at *path*.
+
+    If the file contains several agendas (see :class:`~smart_agenda.bundle.AgendaBundle`), the one with the same title
+    is read, and None is returned if there is no such agenda (e.g. because its title was edited).
+    """
+    with Agenda.load_many(path) as bundle:
+        if len(bundle) == 1:
+            return bundle.content(0)
+        if title in bundle.titles:
+            return bundle.content(bundle.titles.index(title))
+    return None
+
+
+class AgendaReloader:
+    """Reload the agenda in the file at *path* whenever the file was changed.
+
+    *content* and *title* are those of the agenda as it was loaded at the start of the meeting. Call :meth:`apply` from
+    the render loop to merge the most recent version into the running agenda.
+
+    Example:
+
+        >>> reloader = AgendaReloader(path, content, agenda.title)  # doctest: +SKIP
+        >>> reloader.start(on_reload=keys.wakeup)  # doctest: +SKIP
+        >>> while True:  # doctest: +SKIP
+        ...     key = keys.read_key(timeout)
+        ...     if reloader.apply(agenda):
+        ...         renderer.invalidate()
+    """
+
+    def __init__(self, path: Path, content: str, title: str | None, interval: float = 1.0):
+        self.path = path
+        self.title = title
+        self.interval = interval
+        self.parser = IncrementalParser()
+        self.parser.parse(content)
+        self.on_reload: Callable[[], object] = None
+        self._pending: tuple[str, Agenda] | None = None
+        self._lock = threading.Lock()
+        self._watcher: FileWatcher = None
+
+    def start(self, on_reload: Callable[[], object] = None):
+        """Start watching the file. *on_reload* is called from the watcher thread when a new version can be applied."""
+        self.on_reload = on_reload
+        self._watcher = FileWatcher(self.path, self.reload, interval=self.interval)
+        self._watcher.start()
+
+    def close(self):
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+
+    def reload(self):
+        """Read and parse the current version of the file, and keep it until it is applied."""
+        try:
+            content = read_watched_agenda(self.path, self.title)
+        except (OSError, UnicodeDecodeError) as e:
+            logging.warning("Cannot reload '%s': %s", self.path, e)
+            return
+        if content is None:
+            logging.warning("Cannot reload '%s': agenda '%s' not found", self.path, self.title)
+            return
+        agenda = self.parser.parse(content)
+        if not agenda.items:
+            logging.warning("Cannot reload '%s': no agenda items found", self.path)
+            return
+        self.title = agenda.title
+        with self._lock:
+            self._pending = (content, agenda)
+        if self.on_reload is not None:
+            self.on_reload()
+
+    def apply(self, agenda: Agenda) -> bool:
+        """Merge the most recent version of the file into *agenda* and return whether there was a new version.
+
+        The session log of *agenda* is rewritten for the new version in its background thread, so the meeting can still
+        be resumed, and applying only takes as long as merging the items.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            return False
+        content, new_agenda = pending
+        agenda.merge(new_agenda)
+        if agenda.log is not None:
+            agenda.log.rewrite(content, agenda)
+        return True
+
+
+class NullReloader:
+    """Reloader that never reloads anything, for when ``--watch`` is not given."""
+
+    def start(self, on_reload: Callable[[], object] = None):
+        pass
+
+    def close(self):
+        pass
+
+    def apply(self, agenda: Agenda) -> bool:
+        return False
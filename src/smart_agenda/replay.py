@@ -0,0 +1,172 @@
+"""Replay of recorded or synthetic sessions on a virtual clock, at any speed.
+
+A session is replayed as the key presses that move the agenda to the next or previous item, with the time between
+them passing on a :class:`~smart_agenda.clock.VirtualClock`. Unless a *speed* is given, nothing waits for real time,
+so a whole day of meetings replays as fast as the frames can be rendered.
+
+Example:
+
+    >>> from smart_agenda.clock import VirtualClock
+    >>> agenda = Agenda.loads(EXAMPLE_AGENDA, clock=VirtualClock())  # doctest: +SKIP
+    >>> replay(agenda, synthetic_events(agenda), on_frame=print_frame)  # doctest: +SKIP
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from smart_agenda.clock import VirtualClock
+from smart_agenda.lib import Agenda
+from smart_agenda.session import COMPLETED, Session
+
+if TYPE_CHECKING:  # pragma: no cover
+    from rich.console import Console
+
+NEXT, PREVIOUS = "next", "previous"
+"""Actions of key events."""
+SECOND = 1_000_000_000
+
+
+@dataclass(frozen=True)
+class KeyEvent:
+    at_ns: int
+    """Time of the key press since the start of the session (in ns)."""
+    action: str
+    """Either :data:`NEXT` or :data:`PREVIOUS`."""
+
+
+@dataclass
+class ReplayResult:
+    events: int = 0
+    """Number of key events that were replayed."""
+    frames: int = 0
+    """Number of frames that were passed to ``on_frame``."""
+    duration_ns: int = 0
+    """Virtual time that passed during the replay."""
+    completed: bool = False
+    """Whether the agenda was completed."""
+
+
+def recorded_events(session: Session) -> list[KeyEvent]:
+    """Return the key events that produced the transitions recorded in *session*.
+
+    Examples:
+        >>> session = Session("# Title\\nfirst 1:00\\nsecond 2:00\\n", 0, 0, [(0, 0), (1, 10), (0, 15), (-2, 20)])
+        >>> [(event.at_ns, event.action) for event in recorded_events(session)]
+        [(0, 'next'), (10, 'next'), (15, 'previous'), (20, 'next')]
+    """
+    events, idx = [], -1
+    for next_idx, timestamp in session.events:
+        action = NEXT if next_idx == COMPLETED or next_idx > idx else PREVIOUS
+        events.append(KeyEvent(timestamp - session.started_monotonic, action))
+        idx = next_idx
+    return events
+
+
+def synthetic_events(agenda: Agenda, seed: int = 0, overrun: float = 0.2, p_previous: float = 0.05) -> list[KeyEvent]:
+    """Create the key events of a plausible session of *agenda*, which runs from its first item until it is completed.
+
+    The time spent on each item deviates from its planned duration by up to *overrun* (relative), and with probability
+    *p_previous* the previous item is revisited for a bit. The same *seed* always yields the same events.
+    """
+    rng = random.Random(seed)
+    events = [KeyEvent(0, NEXT)]
+    now = 0
+    for idx, item in enumerate(agenda.items):
+        now += round(item.duration_ns * rng.uniform(1 - overrun, 1 + overrun))
+        if idx and rng.random() < p_previous:
+            events.append(KeyEvent(now, PREVIOUS))
+            now += rng.randrange(10 * SECOND, 120 * SECOND)
+            events.append(KeyEvent(now, NEXT))
+            now += rng.randrange(SECOND, 30 * SECOND)
+        events.append(KeyEvent(now, NEXT))
+    return events
+
+
+def replay(
+    agenda: Agenda,
+    events: Iterable[KeyEvent],
+    on_frame: Callable[[Agenda], object] = None,
+    frame_interval: float = None,
+    speed: float = None,
+) -> ReplayResult:
+    """Replay *events* on *agenda*, which has to be timed with a :class:`~smart_agenda.clock.VirtualClock`.
+
+    *on_frame* is called after every event, and every *frame_interval* virtual seconds in between (if given). With a
+    *speed*, the replay waits for real time, which passes *speed* times slower than virtual time (e.g. 60 replays a
+    minute of the session per second).
+
+    Raises:
+        TypeError: if *agenda* is not timed with a virtual clock.
+    """
+    if not isinstance(agenda.clock, VirtualClock):
+        raise TypeError("replayed agendas must be timed with a VirtualClock")
+    player = _Player(agenda, on_frame, round(frame_interval * SECOND) if frame_interval else None, speed)
+    start = agenda.clock.monotonic_ns()
+    for event in events:
+        player.advance_to(start + event.at_ns)
+        player.result.events += 1
+        if event.action == NEXT:
+            player.result.completed = agenda.to_next()
+        else:
+            agenda.to_previous()
+        player.frame()
+        if player.result.completed:
+            break
+    player.result.duration_ns = agenda.clock.monotonic_ns() - start
+    return player.result
+
+
+class _Player:
+    """Advance the virtual clock of *agenda*, calling *on_frame* every *interval_ns* (if given)."""
+
+    def __init__(self, agenda: Agenda, on_frame: Callable[[Agenda], object], interval_ns: int, speed: float):
+        self.agenda = agenda
+        self.clock: VirtualClock = agenda.clock
+        self.on_frame = on_frame
+        self.interval_ns = interval_ns
+        self.speed = speed
+        self.result = ReplayResult()
+
+    def frame(self):
+        if self.on_frame is not None:
+            self.on_frame(self.agenda)
+            self.result.frames += 1
+
+    def advance_to(self, target_ns: int):
+        now = self.clock.monotonic_ns()
+        while self.interval_ns is not None and now + self.interval_ns < target_ns:
+            self.advance_by(self.interval_ns)
+            now += self.interval_ns
+            self.frame()
+        self.advance_by(max(target_ns - now, 0))
+
+    def advance_by(self, ns: int):
+        if self.speed:
+            time.sleep(ns / SECOND / self.speed)
+        self.clock.advance_ns(ns)
+
+
+def render_replay(
+    agenda: Agenda, events: Iterable[KeyEvent], console: Console, frame_interval: float = None, speed: float = None
+) -> ReplayResult:
+    """Replay *events* on *agenda* (see :func:`replay`) and print every frame that changed to *console*.
+
+    Frames are rendered as in the live view (only the rows that fit on the console), and the completed agenda is printed
+    at the end (if it was completed).
+    """
+    from smart_agenda.cli_output import RunningAgendaRenderer, max_rows_for, render_completed_agenda
+
+    renderer = RunningAgendaRenderer(agenda, max_rows=max_rows_for(console), show_sections=bool(agenda.sections))
+
+    def show_frame(agenda: Agenda):
+        if renderer.update():
+            console.print(renderer.render())
+
+    result = replay(agenda, events, on_frame=show_frame, frame_interval=frame_interval, speed=speed)
+    if result.completed:
+        console.print(render_completed_agenda(agenda))
+    return result
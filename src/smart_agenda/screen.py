@@ -0,0 +1,151 @@
+"""Low-bandwidth output to the terminal (``--output diff``), e.g. for SSH connections and nested tmux sessions.
+
+Instead of repainting the whole table on every frame (as :class:`rich.live.Live` does), :class:`DiffScreen` keeps the
+cells that are on the screen, compares each frame against them and only writes the runs of cells that changed, at their
+position on the screen (using cursor addressing). While time passes, that is usually just the delta of the active item.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import List, Optional, Tuple
+
+from rich.cells import cell_len
+from rich.console import COLOR_SYSTEMS, Console, RenderableType
+from rich.style import Style
+
+Cell = Tuple[str, Optional[Style]]
+"""Character and style of a cell on the screen (the character of the second cell of a wide character is empty)."""
+Line = List[Cell]
+
+HIDE_CURSOR, SHOW_CURSOR = "\x1b[?25l", "\x1b[?25h"
+CLEAR_SCREEN = "\x1b[H\x1b[2J"
+CLEAR_LINE = "\x1b[2K"
+
+
+def move_to(row: int, column: int) -> str:
+    """Return the escape sequence that moves the cursor to *row* and *column* (counted from 0).
+
+    Examples:
+        >>> move_to(0, 0), move_to(4, 10)
+        ('\\x1b[1;1H', '\\x1b[5;11H')
+    """
+    return f"\x1b[{row + 1};{column + 1}H"
+
+
+class DiffScreen:
+    """Show *renderable* on the screen of *console* and only write the cells that changed on every :meth:`update`.
+
+    Can be used in place of :class:`rich.live.Live` (without auto refresh). The screen is cleared when it is entered and
+    whenever the width of the console changed. The number of bytes written is counted in :attr:`bytes_written` (see
+    :attr:`bytes_per_second`).
+
+    Example:
+
+        >>> with DiffScreen(renderer.render(), console=console) as screen:  # doctest: +SKIP
+        ...     screen.update(renderer.render(), refresh=True)
+    """
+
+    def __init__(self, renderable: RenderableType, console: Console):
+        self.renderable = renderable
+        self.console = console
+        self.lines: list[Line] = []
+        """Cells that are currently on the screen."""
+        self.bytes_written = 0
+        self._entered = None
+        self._width = None
+        self._color_system = COLOR_SYSTEMS.get(console.color_system) if console.color_system else None
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Average number of bytes written per second since the screen was entered."""
+        duration = time.monotonic() - self._entered if self._entered is not None else 0.0
+        return self.bytes_written / duration if duration else 0.0
+
+    def __enter__(self) -> DiffScreen:
+        self._entered = time.monotonic()
+        self._write(HIDE_CURSOR)
+        self.refresh()  # clears the screen, as the width is not known yet
+        return self
+
+    def __exit__(self, *exc_info):
+        self.refresh()
+        self._write(move_to(len(self.lines), 0) + SHOW_CURSOR)
+
+    def update(self, renderable: RenderableType, refresh: bool = False):
+        self.renderable = renderable
+        if refresh:
+            self.refresh()
+
+    def refresh(self):
+        """Write the cells of the current renderable that differ from the screen."""
+        output = []
+        width = self.console.width
+        if width != self._width:
+            # lines were wrapped or truncated by the terminal, so nothing on the screen can be relied upon
+            output.append(CLEAR_SCREEN)
+            self.lines = []
+            self._width = width
+        lines = self.render_lines()
+        for row, line in enumerate(lines):
+            previous = self.lines[row] if row < len(self.lines) else []
+            if line != previous:
+                output.append(self._diff_line(row, previous, line))
+        for row in range(len(lines), len(self.lines)):
+            output.append(move_to(row, 0) + CLEAR_LINE)
+        self.lines = lines
+        self._write("".join(output))
+
+    def render_lines(self) -> list[Line]:
+        """Render the current renderable into lines of cells."""
+        lines = []
+        for segments in self.console.render_lines(self.renderable, self.console.options, pad=False):
+            line = []
+            for segment in segments:
+                if segment.control:
+                    continue
+                for char in segment.text:
+                    line.append((char, segment.style))
+                    if cell_len(char) == 2:
+                        line.append(("", segment.style))
+            lines.append(line)
+        return lines
+
+    def _diff_line(self, row: int, previous: Line, line: Line) -> str:
+        """Return the output that turns *previous* into *line* on the screen (writing only the changed cells)."""
+        start = 0
+        common = min(len(previous), len(line))
+        while start < common and previous[start] == line[start]:
+            start += 1
+        while 0 < start < len(line) and line[start][0] == "":
+            # start with the first cell of a wide character
+            start -= 1
+        stop = len(line)
+        if len(previous) == len(line):
+            while stop > start and previous[stop - 1] == line[stop - 1]:
+                stop -= 1
+        output = [move_to(row, start)]
+        if start < stop:
+            output.append(self._format_cells(line, start, stop))
+        if len(line) < len(previous):
+            output.append("\x1b[K")  # clear the rest of the line
+        return "".join(output)
+
+    def _format_cells(self, line: Line, start: int, stop: int) -> str:
+        """Format the cells in ``line[start:stop]``, with a style sequence per run of cells with the same style."""
+        output = []
+        run_start = start
+        for idx in range(start + 1, stop + 1):
+            if idx == stop or line[idx][1] != line[run_start][1]:
+                text = "".join(char for char, _ in line[run_start:idx])
+                style = line[run_start][1]
+                output.append(style.render(text, color_system=self._color_system) if style else text)
+                run_start = idx
+        return "".join(output)
+
+    def _write(self, output: str):
+        if not output:
+            return
+        self.bytes_written += len(output.encode(errors="replace"))
+        self.console.file.write(output)
+        self.console.file.flush()
@@ -0,0 +1,312 @@
+"""Server that runs the agendas of many meetings in a single process (``smart-agenda serve``).
+
+Clients connect over a Unix socket or localhost TCP and send one JSON request per line, e.g.::
+
+    {"id":1,"cmd":"open","room":"Room A","content":"# Weekly\\nCheck-In 5:00\\n"}
+    {"id":2,"cmd":"subscribe","room":"Room A"}
+    {"id":3,"cmd":"next","room":"Room A"}
+
+Each request is answered by a line with the same ``id`` and ``"ok":true`` (plus the state of the agenda, see
+:func:`~smart_agenda.ndjson.agenda_record`) or ``"ok":false`` and an ``error``. Subscribers additionally receive a line
+(without ``id``) whenever an agenda changes and whenever its displayed time changes, i.e. once per second. Commands:
+
+``open``
+    start hosting an agenda (``content`` in markdown) in ``room`` (``replace`` an existing one if true)
+``close``
+    stop hosting the agenda of ``room``
+``rooms``
+    list all rooms with the state of their agenda
+``status``, ``subscribe``, ``unsubscribe``
+    return the state of the agenda in ``room`` (and start or stop pushing updates)
+``next``, ``previous``
+    move the agenda in ``room`` to the next or previous item
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from smart_agenda.lib import Agenda
+from smart_agenda.ndjson import agenda_record
+from smart_agenda.timerwheel import TimerWheel
+
+TICK_RESOLUTION = 0.05
+"""Resolution of the timer wheel (in seconds), i.e. how late updates of the displayed time may be pushed."""
+TICK_BATCH_SIZE = 50
+"""Number of rooms whose displayed time is updated before pending commands are handled."""
+MAX_CLIENT_BUFFER = 64 * 1024
+"""Bytes that may be pending for a client before updates of the displayed time are no longer sent to it."""
+
+
+def parse_address(address: str) -> tuple:
+    """Parse a server address, which is either ``unix:PATH`` or ``HOST:PORT``.
+
+    Examples:
+        >>> parse_address("unix:/tmp/agenda.sock")
+        ('unix', '/tmp/agenda.sock')
+        >>> parse_address("localhost:8765")
+        ('tcp', 'localhost', 8765)
+    """
+    kind, _, path = address.partition(":")
+    if kind == "unix":
+        return "unix", path
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"invalid address '{address}' (expected 'unix:PATH' or 'HOST:PORT')")
+    return "tcp", host, int(port)
+
+
+class _Client:
+    """Connection of a client, which buffers its output without waiting for the client.
+
+    Lines that are sent during one iteration of the event loop are written together, i.e. with a single system call.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.rooms: set[str] = set()
+        self._buffer: list[bytes] = []
+
+    def send(self, line: bytes, droppable: bool = False) -> bool:
+        """Send *line* unless it is *droppable* and the client does not keep up. Return whether it was sent."""
+        if self.writer.is_closing():
+            return False
+        if droppable and self.writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+            return False
+        if not self._buffer:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self._buffer.append(line)
+        return True
+
+    def _flush(self):
+        if not self.writer.is_closing():
+            self.writer.write(b"".join(self._buffer))
+        self._buffer.clear()
+
+
+@dataclass
+class Room:
+    name: str
+    agenda: Agenda
+    subscribers: set[_Client] = field(default_factory=set)
+
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode() + b"\n"
+
+
+def _seconds_until_next_second(agenda: Agenda) -> float | None:
+    """Return the number of seconds until the displayed delta of *agenda* changes (or None if it does not change)."""
+    item = agenda.current_item
+    if item is None or not item.is_active:
+        return None
+    return agenda.delta_for(agenda.current_item_idx + 1).total_seconds() % 1 or 1.0
+
+
+class AgendaServer:
+    """Host the agendas of many rooms and push their updates to subscribed clients.
+
+    All rooms share a single :class:`~smart_agenda.timerwheel.TimerWheel` that is driven by one task, instead of one
+    task (or timer) per agenda, and only rooms with subscribers have a timer at all. Each update is encoded once and
+    written to all subscribers of a room. Subscribers that do not keep up miss updates of the displayed time, but not
+    transitions between items.
+
+    Example:
+
+        >>> server = AgendaServer()  # doctest: +SKIP
+        >>> asyncio.run(server.serve_forever("unix:/tmp/agenda.sock"))  # doctest: +SKIP
+    """
+
+    def __init__(self, resolution: float = TICK_RESOLUTION):
+        self.rooms: dict[str, Room] = {}
+        self.wheel = TimerWheel(resolution)
+        self.updates_dropped = 0
+        self._wakeup: asyncio.Event | None = None
+        self._sleeping_until: float | None = None
+        """Time until which the timer task sleeps (None if it waits for the first timer)."""
+        self._timer_task = None
+        self._commands: dict[str, Callable[[_Client, dict], dict]] = {
+            "open": self.cmd_open,
+            "close": self.cmd_close,
+            "rooms": self.cmd_rooms,
+            "status": self.cmd_status,
+            "subscribe": self.cmd_subscribe,
+            "unsubscribe": self.cmd_unsubscribe,
+            "next": self.cmd_next,
+            "previous": self.cmd_previous,
+        }
+
+    def open(self, name: str, agenda: Agenda, replace: bool = False) -> Room:
+        """Host *agenda* in room *name*."""
+        if name in self.rooms and not replace:
+            raise ValueError(f"room '{name}' exists already")
+        room = self.rooms.get(name)
+        if room is None:
+            room = self.rooms[name] = Room(name, agenda)
+        else:
+            room.agenda = agenda
+            self._publish(room, "open")
+        return room
+
+    async def start(self, address: str) -> asyncio.AbstractServer:
+        """Start listening on *address* (see :func:`parse_address`) and running the timers of all rooms."""
+        kind, *location = parse_address(address)
+        if kind == "unix":
+            path = Path(location[0])
+            if path.is_socket():
+                path.unlink()  # left over from a previous server
+            server = await asyncio.start_unix_server(self._handle_client, path)
+        else:
+            server = await asyncio.start_server(self._handle_client, *location)
+        # created here, as events are bound to the running loop before Python 3.10
+        self._wakeup = asyncio.Event()
+        self._timer_task = asyncio.get_running_loop().create_task(self._run_timers())
+        return server
+
+    async def serve_forever(self, address: str):
+        server = await self.start(address)
+        async with server:
+            await server.serve_forever()
+
+    async def _run_timers(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._sleeping_until = self.wheel.next_deadline()
+            timeout = None if self._sleeping_until is None else max(self._sleeping_until - loop.time(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            for idx, name in enumerate(self.wheel.advance(loop.time()), 1):
+                room = self.rooms.get(name)
+                if room is not None:
+                    self._publish(room, "tick", droppable=True)
+                    self._schedule(room)
+                if idx % TICK_BATCH_SIZE == 0:
+                    # let commands in between the updates of many rooms that tick at the same time
+                    await asyncio.sleep(0)
+
+    def _schedule(self, room: Room):
+        """Schedule the next update of the displayed time of *room* (if it has subscribers)."""
+        delay = _seconds_until_next_second(room.agenda) if room.subscribers else None
+        if delay is None:
+            self.wheel.cancel(room.name)
+            return
+        deadline = asyncio.get_running_loop().time() + delay
+        self.wheel.schedule(room.name, deadline)
+        if self._wakeup is not None and (self._sleeping_until is None or deadline < self._sleeping_until):
+            self._wakeup.set()
+
+    def _publish(self, room: Room, event: str, droppable: bool = False):
+        if not room.subscribers:
+            return
+        line = _encode({"room": room.name, **agenda_record(room.agenda, event, full=event == "open")})
+        for client in room.subscribers:
+            if not client.send(line, droppable):
+                self.updates_dropped += 1
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = _Client(writer)
+        try:
+            async for line in reader:
+                client.send(_encode(self.dispatch(client, line)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for name in client.rooms:
+                room = self.rooms.get(name)
+                if room is not None:
+                    room.subscribers.discard(client)
+            writer.close()
+
+    def dispatch(self, client: _Client, line: bytes) -> dict:
+        """Handle the request in *line* and return the response."""
+        request = {}
+        try:
+            request = json.loads(line)
+            command = self._commands.get(request.get("cmd"))
+            if command is None:
+                raise ValueError(f"unknown command {request.get('cmd')!r}")
+            response = {"ok": True, **command(client, request)}
+        except KeyError as e:
+            response = {"ok": False, "error": f"missing {e}"}
+        except (ValueError, TypeError, AttributeError) as e:
+            logging.debug("request %r failed: %s", line, e)
+            response = {"ok": False, "error": str(e)}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    def _get_room(self, request: dict) -> Room:
+        name = request["room"]
+        if name not in self.rooms:
+            raise ValueError(f"no agenda in room '{name}'")
+        return self.rooms[name]
+
+    def cmd_open(self, client: _Client, request: dict) -> dict:
+        agenda = Agenda.loads(request["content"])
+        room = self.open(request["room"], agenda, replace=request.get("replace", False))
+        self._schedule(room)
+        return {"room": room.name, **agenda_record(agenda, "open", full=True)}
+
+    def cmd_close(self, client: _Client, request: dict) -> dict:
+        room = self._get_room(request)
+        self._publish(room, "close")
+        self.wheel.cancel(room.name)
+        del self.rooms[room.name]
+        return {"room": room.name}
+
+    def cmd_rooms(self, client: _Client, request: dict) -> dict:
+        return {"rooms": [{"room": room.name, **agenda_record(room.agenda, "status")} for room in self.rooms.values()]}
+
+    def cmd_status(self, client: _Client, request: dict) -> dict:
+        room = self._get_room(request)
+        return {"room": room.name, **agenda_record(room.agenda, "status", full=True)}
+
+    def cmd_subscribe(self, client: _Client, request: dict) -> dict:
+        room = self._get_room(request)
+        room.subscribers.add(client)
+        client.rooms.add(room.name)
+        self._schedule(room)
+        return self.cmd_status(client, request)
+
+    def cmd_unsubscribe(self, client: _Client, request: dict) -> dict:
+        room = self._get_room(request)
+        room.subscribers.discard(client)
+        client.rooms.discard(room.name)
+        self._schedule(room)
+        return {"room": room.name}
+
+    def cmd_next(self, client: _Client, request: dict) -> dict:
+        room = self._get_room(request)
+        event = "complete" if room.agenda.to_next() else "next"
+        return self._transition(room, event)
+
+    def cmd_previous(self, client: _Client, request: dict) -> dict:
+        room = self._get_room(request)
+        room.agenda.to_previous()
+        return self._transition(room, "previous")
+
+    def _transition(self, room: Room, event: str) -> dict:
+        self._publish(room, event)
+        self._schedule(room)
+        return {"room": room.name, **agenda_record(room.agenda, event)}
+
+
+def default_address(directory: Path) -> str:
+    """Return the default address of the server, a Unix socket in *directory* (or localhost TCP on Windows).
+
+    The socket should not be placed in the app dir itself, as creating it would invalidate the index of saved agendas
+    (see :class:`~smart_agenda.store.AgendaIndex`).
+    """
+    if os.name == "nt":
+        return "localhost:8765"
+    return f"unix:{directory / 'server.sock'}"
@@ -0,0 +1,297 @@
+"""Session logs, which allow resuming an interrupted meeting."""
+
+from __future__ import annotations
+
+import itertools
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from smart_agenda.clock import SYSTEM_CLOCK, SystemClock
+from smart_agenda.lib import NOT_RUNNING, Agenda
+
+MAGIC = b"SAGL"
+VERSION = 1
+HEADER = struct.Struct("<4sHqqI")
+"""Magic bytes, version, wall clock and monotonic clock at session start (in ns) and length of the agenda content."""
+EVENT = struct.Struct("<iq")
+"""Index of the new current item and monotonic clock (in ns)."""
+COMPLETED = -2
+"""Item index of the event that marks a completed agenda."""
+KEEP_SESSIONS = 50
+"""Number of most recent session logs that are kept (see :func:`prune_sessions`)."""
+
+
+@dataclass
+class Session:
+    content: str
+    """Content of the agenda."""
+    started: int
+    """Wall clock at session start (ns since epoch)."""
+    started_monotonic: int
+    """Monotonic clock at session start (ns)."""
+    events: list[tuple[int, int]]
+    """Item index and monotonic clock for every transition."""
+
+    @property
+    def completed(self) -> bool:
+        return bool(self.events) and self.events[-1][0] == COMPLETED
+
+    def replay(self, now_monotonic: int = None, clock: SystemClock = SYSTEM_CLOCK) -> Agenda:
+        """Rebuild the agenda with the worktimes recorded in this session (and continue timing it with *clock*)."""
+        if now_monotonic is None:
+            now_monotonic = clock.monotonic_ns()
+        agenda = Agenda.loads(self.content, clock=clock)
+        worktimes = [0] * len(agenda.items)
+        idx, timestamp = NOT_RUNNING, None
+        for next_idx, next_timestamp in self.events:
+            if idx >= 0:
+                worktimes[idx] += next_timestamp - timestamp
+            idx, timestamp = next_idx, next_timestamp
+        for item, worktime in zip(agenda.items, worktimes):
+            item.past_worktime_ns = worktime
+
+        if idx == COMPLETED:
+            agenda.current_item_idx = len(agenda.items) - 1
+        elif idx >= 0:
+            elapsed = now_monotonic - timestamp
+            if elapsed < 0:
+                # monotonic clock was reset by a reboot, fall back to wall clock
+                elapsed = clock.time_ns() - (self.started + timestamp - self.started_monotonic)
+            agenda.current_item_idx = idx
+            agenda.current_item.active_since_ns = clock.monotonic_ns() - elapsed
+        agenda.invalidate()
+        return agenda
+
+
+class SessionLog:
+    """Append-only log of the transitions between agenda items during a session.
+
+    Events are written to the operating system right away, so they survive the process being killed. Syncing them to
+    disk happens in a background thread, at most once every *sync_interval* seconds, so appending never waits for the
+    disk. The log file is only created with the first event.
+
+    Example:
+
+        >>> agenda.log = SessionLog(app_dir / ".sessions" / "session.log", content)  # doctest: +SKIP
+        >>> agenda.to_next()  # appends an event  # doctest: +SKIP
+    """
+
+    def __init__(self, path: Path, content: str, sync_interval: float = 1.0, clock: SystemClock = SYSTEM_CLOCK):
+        self.path = path
+        self.content = content
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self._fd = None
+        self._pending = threading.Event()
+        self._closing = threading.Event()
+        self._sync_thread = None
+        self._lock = threading.Lock()
+        self._rewrite: bytes | None = None
+        """Content of the log that replaces the file, until it is replaced by the background thread."""
+        self._queued: list[bytes] = []
+        """Events appended while the file is being replaced, which are added to the new file."""
+
+    @classmethod
+    def resume(cls, path: Path, **kwargs) -> tuple[SessionLog, Session]:
+        """Read the session at *path* and return a log that continues it.
+
+        A partially written event at the end of the log is removed, so the events that follow are aligned.
+
+        Raises:
+            ValueError: if *path* is not a session log.
+        """
+        session = read_session(path)
+        log = cls(path, session.content, **kwargs)
+        os.truncate(path, HEADER.size + len(session.content.encode()) + len(session.events) * EVENT.size)
+        log._open(os.O_WRONLY | os.O_APPEND)
+        return log, session
+
+    def append(self, idx: int, timestamp: int = None):
+        """Log transition to item *idx* at *timestamp* (monotonic clock in ns, defaults to now)."""
+        if timestamp is None:
+            timestamp = self.clock.monotonic_ns()
+        if self._fd is None:
+            self._create(timestamp)
+        event = EVENT.pack(idx, timestamp)
+        with self._lock:
+            if self._rewrite is not None:
+                self._queued.append(event)
+            else:
+                os.write(self._fd, event)
+        self._pending.set()
+
+    def complete(self, timestamp: int = None):
+        """Log that the agenda was completed."""
+        self.append(COMPLETED, timestamp)
+
+    def rewrite(self, content: str, agenda: Agenda):
+        """Replace the log by one of the edited agenda *content*, whose events reproduce the worktimes of *agenda*.
+
+        The items of *agenda* have to match *content* (e.g. after :meth:`~smart_agenda.lib.Agenda.merge`). The file is
+        replaced atomically by the background thread, so this does not wait for the disk, and the session can be
+        resumed with the edited agenda at any time. Events appended in the meantime are added to the new file.
+        """
+        self.content = content
+        events = _events_for(agenda)
+        if not events:
+            # the log is created with the first event
+            return
+        if self._fd is None:
+            self._create(events[0][1])
+            os.write(self._fd, b"".join(EVENT.pack(*event) for event in events))
+            self._pending.set()
+            return
+        encoded = content.encode()
+        started = self.clock.time_ns() - (self.clock.monotonic_ns() - events[0][1])
+        header = HEADER.pack(MAGIC, VERSION, started, events[0][1], len(encoded))
+        with self._lock:
+            self._rewrite = header + encoded + b"".join(EVENT.pack(*event) for event in events)
+            self._queued = []
+        self._pending.set()
+
+    def close(self):
+        """Sync all events to disk and close the log."""
+        if self._fd is None:
+            return
+        self._closing.set()
+        self._pending.set()
+        self._sync_thread.join()
+        os.close(self._fd)
+        self._fd = None
+
+    def _create(self, timestamp: int):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        path = self.path
+        for attempt in itertools.count(1):
+            try:
+                self._open(os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+                break
+            except FileExistsError:
+                # another session was started at the same time
+                self.path = path.with_name(f"{path.stem}-{attempt}{path.suffix}")
+        content = self.content.encode()
+        started = self.clock.time_ns() - (self.clock.monotonic_ns() - timestamp)
+        os.write(self._fd, HEADER.pack(MAGIC, VERSION, started, timestamp, len(content)) + content)
+
+    def _open(self, flags: int):
+        self._fd = os.open(self.path, flags, 0o600)
+        self._closing.clear()
+        self._sync_thread = threading.Thread(target=self._sync, name="session-log-sync", daemon=True)
+        self._sync_thread.start()
+
+    def _sync(self):
+        while not self._closing.is_set():
+            self._pending.wait()
+            if self._rewrite is None:
+                # batch events that arrive shortly after each other into a single sync
+                self._closing.wait(self.sync_interval)
+            self._pending.clear()
+            self._replace()
+            os.fsync(self._fd)
+        # events and rewrites that arrived while closing
+        self._replace()
+        os.fsync(self._fd)
+
+    def _replace(self):
+        """Replace the file by the content of the latest :meth:`rewrite` (if any), without blocking :meth:`append`."""
+        data = self._rewrite
+        if data is None:
+            return
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o600)
+        os.write(fd, data)
+        os.fsync(fd)
+        with self._lock:
+            if self._rewrite is not data:
+                # superseded by another rewrite, which is replaced in the next iteration
+                os.close(fd)
+                return
+            os.write(fd, b"".join(self._queued))
+            os.replace(tmp_path, self.path)
+            fd, self._fd = self._fd, fd
+            self._rewrite, self._queued = None, []
+        os.close(fd)
+
+
+def _events_for(agenda: Agenda) -> list[tuple[int, int]]:
+    """Create events that add up to the current worktimes of *agenda* when the session is replayed.
+
+    Every item that was worked on gets a single visit of its past worktime, in order, which ends when the current item
+    was started (so its worktime keeps growing from there).
+    """
+    now = agenda.clock.monotonic_ns()
+    current = agenda.current_item
+    end = now if current is None or current.active_since_ns is None else current.active_since_ns
+    visits = [
+        (idx, item.past_worktime_ns)
+        for idx, item in enumerate(agenda.items)
+        if item.past_worktime_ns and item is not current
+    ]
+    if current is not None:
+        visits.append((agenda.current_item_idx, current.past_worktime_ns))
+    elif visits:
+        visits.append((NOT_RUNNING, 0))
+    timestamp = end - sum(worktime for _, worktime in visits)
+    events = []
+    for idx, worktime in visits:
+        events.append((idx, timestamp))
+        timestamp += worktime
+    return events
+
+
+def read_session(path: Path) -> Session:
+    """Read the session log at *path*.
+
+    Raises:
+        ValueError: if *path* is not a session log.
+    """
+    data = path.read_bytes()
+    if len(data) < HEADER.size:
+        raise ValueError(f"'{path}' is not a session log")
+    magic, version, started, started_monotonic, content_length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"'{path}' is not a session log (version {VERSION})")
+    start, offset = HEADER.size, HEADER.size + content_length
+    if len(data) < offset:
+        raise ValueError(f"'{path}' is not a complete session log")
+    try:
+        content = data[start:offset].decode()
+    except UnicodeDecodeError as e:
+        raise ValueError(f"'{path}' is not a session log: {e}") from None
+    # ignore a partially written event at the end of the log
+    end = offset + (len(data) - offset) // EVENT.size * EVENT.size
+    events = list(EVENT.iter_unpack(data[offset:end]))
+    return Session(content, started, started_monotonic, events)
+
+
+def latest_session(parent: Path) -> Path | None:
+    """Return path of the most recent session log in *parent* (or None if there is none)."""
+    if not parent.is_dir():
+        return None
+    # session logs are named by their start time, so the most recent one sorts last
+    return max(parent.glob("*.log"), default=None)
+
+
+def prune_sessions(parent: Path, keep: int = KEEP_SESSIONS) -> int:
+    """Remove all but the *keep* most recent session logs in *parent*, and return the number of removed logs."""
+    if not parent.is_dir():
+        return 0
+    paths = sorted(parent.glob("*.log"))
+    removed = 0
+    for path in paths[: max(len(paths) - keep, 0)]:
+        try:
+            path.unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass  # removed by another session in the meantime
+    return removed
+
+
+def session_filename(name: str) -> str:
+    """Create filename of a session log for agenda *name*, which sorts by session start (in microseconds)."""
+    now = time.time_ns()
+    return f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now // 10**9))}-{now // 1000 % 10**6:06d}_{name}.log"
@@ -0,0 +1,355 @@
+"""Storage of saved agendas.
+
+Recently saved (or used) agendas are kept as plain files, named by :func:`~smart_agenda.util.get_filepath`. Once
+there are more than :data:`PACK_THRESHOLD` of them, all but the :data:`KEEP_LOOSE` most recently used ones are moved
+into a single compressed pack file. The :class:`AgendaIndex` lists both, so saved agendas are found by name no matter
+where they are stored (see :class:`AgendaStore`).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+from smart_agenda.lib import parse_title
+
+INDEX_FILENAME = ".index.json"
+"""Name of the index file within the directory of saved agendas."""
+INDEX_VERSION = 2
+PACK_FILENAME = ".agendas.pack"
+"""Name of the pack file within the directory of saved agendas."""
+PACK_VERSION = 1
+PACK_FOOTER = struct.Struct("<Q8s")
+"""Offset of the pack index and magic bytes at the end of a pack file."""
+PACK_MAGIC = b"SAPACK01"
+PACK_THRESHOLD = 32
+"""Number of plain files of saved agendas above which they are packed."""
+KEEP_LOOSE = 8
+"""Number of most recently used agendas that are kept as plain files when packing."""
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+"""Default size limit of the saved agendas in bytes (as stored, i.e. compressed if packed)."""
+
+
+def content_digest(content: str) -> str:
+    """Return the hash that identifies *content* (e.g. to save identical agendas only once)."""
+    return hashlib.md5(content.encode(), usedforsecurity=False).hexdigest()
+
+
+@dataclass
+class IndexEntry:
+    name: str
+    title: str | None
+    saved: float
+    """Timestamp of when the agenda was last saved."""
+    used: float = 0.0
+    """Timestamp of when the agenda was last saved or loaded."""
+    digest: str | None = None
+    """Hash of the content of the agenda (see :func:`content_digest`)."""
+    size: int = 0
+    """Number of bytes the agenda takes up in storage."""
+    packed: bool = False
+    """Whether the agenda is stored in the pack file (rather than as a plain file)."""
+
+
+class AgendaIndex:
+    """Index of the agendas saved in *parent*.
+
+    The index is kept in a JSON manifest next to the saved agendas, so listing, completing and searching saved agendas
+    does not need to access every file. The manifest is only trusted as long as *parent* has not been modified after
+    it was written (e.g. when files were added or removed by hand), otherwise it is rebuilt from the directory.
+
+    Example:
+
+        >>> index = AgendaIndex(app_dir)  # doctest: +SKIP
+        >>> [entry.name for entry in index.find(prefix="Weekly")]  # doctest: +SKIP
+        ['Weekly-Meeting_8f14e45f', 'Weekly-Sync_c9f0f895']
+    """
+
+    def __init__(self, parent: Path):
+        self.parent = parent
+        self.path = parent / INDEX_FILENAME
+        self.entries: dict[str, IndexEntry] = self._load()
+
+    def get(self, name: str) -> IndexEntry | None:
+        """Return index entry of the saved agenda *name* (or None if there is no such agenda)."""
+        return self.entries.get(name)
+
+    def find(self, prefix: str = "") -> list[IndexEntry]:
+        """Return entries whose name starts with *prefix*, most recently saved first."""
+        entries = (entry for entry in self.entries.values() if entry.name.startswith(prefix))
+        return sorted(entries, key=lambda entry: entry.saved, reverse=True)
+
+    def search(self, query: str) -> list[IndexEntry]:
+        """Return entries whose title contains *query* (ignoring case), most recently saved first."""
+        query = query.casefold()
+        entries = (entry for entry in self.entries.values() if entry.title and query in entry.title.casefold())
+        return sorted(entries, key=lambda entry: entry.saved, reverse=True)
+
+    def add(self, name: str, title: str | None, saved: float = None, digest: str = None, size: int = 0):
+        """Add (or update) the saved agenda *name*, which is stored as a plain file, and write the index."""
+        saved = time.time() if saved is None else saved
+        self.entries[name] = IndexEntry(name, title, saved, saved, digest, size)
+        self.write()
+
+    def write(self):
+        """Write the index to disk."""
+        data = {
+            "version": INDEX_VERSION,
+            "agendas": {
+                entry.name: [entry.title, entry.saved, entry.used, entry.digest, entry.size, entry.packed]
+                for entry in self.entries.values()
+            },
+        }
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with tmp_path.open("w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        # mark index as up to date with the directory, whose mtime was just changed by replacing the index file
+        os.utime(self.path)
+
+    def _load(self) -> dict[str, IndexEntry]:
+        entries = {}
+        try:
+            with self.path.open() as f:
+                data = json.load(f)
+            if data["version"] == INDEX_VERSION:
+                entries = {name: IndexEntry(name, *values) for name, values in data["agendas"].items()}
+                if self.parent.stat().st_mtime_ns <= self.path.stat().st_mtime_ns:
+                    return entries
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return self._rebuild(previous=entries)
+
+    def _rebuild(self, previous: dict[str, IndexEntry] = None) -> dict[str, IndexEntry]:
+        """Rebuild the index from the directory, keeping when unchanged agendas of *previous* were last used."""
+        if not self.parent.is_dir():
+            return {}
+        logging.debug("rebuilding index of saved agendas in %s", self.parent)
+        self.entries = self._read_packed_entries()
+        for fp in self.parent.iterdir():
+            if fp.name.startswith(".") or not fp.is_file():
+                continue
+            stat = fp.stat()
+            try:
+                content = fp.read_text()
+                title, digest = parse_title(content.partition("\n")[0]), content_digest(content)
+            except (OSError, UnicodeDecodeError):
+                title, digest = None, None
+            # plain files take precedence over packed agendas of the same name
+            self.entries[fp.name] = IndexEntry(fp.name, title, stat.st_mtime, stat.st_mtime, digest, stat.st_size)
+        for entry in self.entries.values():
+            old = (previous or {}).get(entry.name)
+            if old is not None and old.digest == entry.digest:
+                entry.used = max(entry.used, old.used)
+        self.write()
+        return self.entries
+
+    def _read_packed_entries(self) -> dict[str, IndexEntry]:
+        entries = {}
+        try:
+            for name, (_, length, digest, title, saved, used) in read_pack_index(self.parent / PACK_FILENAME).items():
+                entries[name] = IndexEntry(name, title, saved, used, digest, length, packed=True)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning("Cannot read packed agendas in '%s': %s", self.parent, e)
+        return entries
+
+
+def read_pack_index(path: Path) -> dict[str, list]:
+    """Read the index of the pack file at *path*, which maps names to offset, length, digest, title, saved and used.
+
+    Raises:
+        OSError: if the pack file cannot be read.
+        ValueError: if it is not a pack file of this version.
+    """
+    with path.open("rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size < PACK_FOOTER.size:
+            raise ValueError("truncated pack file")
+        f.seek(size - PACK_FOOTER.size)
+        offset, magic = PACK_FOOTER.unpack(f.read(PACK_FOOTER.size))
+        if magic != PACK_MAGIC or offset > size - PACK_FOOTER.size:
+            raise ValueError("not a pack file")
+        f.seek(offset)
+        data = json.loads(f.read(size - PACK_FOOTER.size - offset))
+    if data["version"] != PACK_VERSION:
+        raise ValueError(f"unsupported version {data['version']} of pack file")
+    return data["agendas"]
+
+
+class AgendaStore:
+    """Saved agendas in *parent*, either as plain files or in a pack file, which are listed by an :class:`AgendaIndex`.
+
+    Files are written to a temporary file and renamed, so a saved agenda is either complete or missing. An agenda
+    whose content was saved before is not written again (only its timestamps are updated). After saving, agendas are
+    packed (see :meth:`pack`) and evicted least recently used first once they exceed *max_bytes* (see :meth:`evict`).
+
+    The pack file contains the compressed agendas followed by an index of their offsets, so a packed agenda is read
+    with a single seek. The pack file is only ever replaced as a whole.
+
+    Example:
+
+        >>> store = AgendaStore(app_dir)  # doctest: +SKIP
+        >>> name = store.save("Weekly-Meeting_8f14e45f", "Weekly Meeting", content)  # doctest: +SKIP
+        >>> store.read(name) == content  # doctest: +SKIP
+        True
+    """
+
+    def __init__(
+        self,
+        parent: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        pack_threshold: int = PACK_THRESHOLD,
+        keep_loose: int = KEEP_LOOSE,
+    ):
+        self.parent = parent
+        self.max_bytes = max_bytes
+        self.pack_threshold = pack_threshold
+        self.keep_loose = keep_loose
+        self.index = AgendaIndex(parent)
+        self.pack_path = parent / PACK_FILENAME
+        self._pack_index: dict[str, list] = None
+
+    def save(self, name: str, title: str | None, content: str) -> str:
+        """Save *content* as *name* and return the name it is saved as (that of an identical agenda, if any)."""
+        digest = content_digest(content)
+        now = time.time()
+        for entry in self.index.entries.values():
+            if entry.digest == digest:
+                entry.saved = entry.used = now
+                self.index.write()
+                return entry.name
+
+        self.parent.mkdir(parents=True, exist_ok=True)
+        data = content.encode()
+        _write_atomic(self.parent / name, data)
+        self.index.add(name, title, saved=now, digest=digest, size=len(data))
+        if sum(not entry.packed for entry in self.index.entries.values()) > self.pack_threshold:
+            self.pack()
+        self.evict()
+        return name
+
+    def read(self, name: str) -> str:
+        """Return the content of the saved agenda *name*.
+
+        Raises:
+            FileNotFoundError: if there is no such agenda.
+        """
+        try:
+            return (self.parent / name).read_text()
+        except FileNotFoundError:
+            pass
+        entry = self._get_pack_index().get(name)
+        if entry is None:
+            raise FileNotFoundError(f"no saved agenda '{name}' in '{self.parent}'")
+        offset, length, digest = entry[:3]
+        with self.pack_path.open("rb") as f:
+            f.seek(offset)
+            content = zlib.decompress(f.read(length)).decode()
+        if content_digest(content) != digest:
+            raise ValueError(f"packed agenda '{name}' is corrupt")
+        return content
+
+    def touch(self, name: str):
+        """Mark the saved agenda *name* as used (see :meth:`evict`)."""
+        entry = self.index.get(name)
+        if entry is not None:
+            entry.used = time.time()
+            self.index.write()
+
+    def pack(self):
+        """Move all but the *keep_loose* most recently used plain files into the pack file.
+
+        The pack file is rewritten with the agendas that are packed according to the index, so the space of evicted
+        agendas is reclaimed as well.
+        """
+        loose = sorted((entry for entry in self.index.entries.values() if not entry.packed), key=lambda e: e.used)
+        to_pack = loose[: max(len(loose) - self.keep_loose, 0)]
+        packed = [entry for entry in self.index.entries.values() if entry.packed]
+        old_index = self._get_pack_index()
+        pack_index = {}
+        tmp_path = self.pack_path.with_name(f"{PACK_FILENAME}.tmp")
+        with tmp_path.open("wb") as out, _open_or_none(self.pack_path) as old_pack:
+            for entry in packed:
+                if entry.name not in old_index:
+                    logging.warning("Packed agenda '%s' is missing from '%s'", entry.name, self.pack_path)
+                    del self.index.entries[entry.name]
+                    continue
+                offset, length = old_index[entry.name][:2]
+                old_pack.seek(offset)
+                pack_index[entry.name] = [out.tell(), length, entry.digest, entry.title, entry.saved, entry.used]
+                out.write(old_pack.read(length))
+            for entry in to_pack:
+                blob = zlib.compress((self.parent / entry.name).read_bytes())
+                pack_index[entry.name] = [out.tell(), len(blob), entry.digest, entry.title, entry.saved, entry.used]
+                out.write(blob)
+            index_offset = out.tell()
+            out.write(json.dumps({"version": PACK_VERSION, "agendas": pack_index}, separators=(",", ":")).encode())
+            out.write(PACK_FOOTER.pack(index_offset, PACK_MAGIC))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, self.pack_path)
+        self._pack_index = pack_index
+        for entry in to_pack:
+            entry.packed, entry.size = True, pack_index[entry.name][1]
+        self.index.write()
+        for entry in to_pack:
+            (self.parent / entry.name).unlink()
+        logging.debug("packed %d agendas into %s", len(to_pack), self.pack_path)
+
+    def evict(self):
+        """Remove the least recently used agendas until all fit into *max_bytes* (keeping the most recent one)."""
+        entries = sorted(self.index.entries.values(), key=lambda entry: entry.used)
+        total = sum(entry.size for entry in entries)
+        if total <= self.max_bytes:
+            return
+        repack = False
+        for entry in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            logging.debug("evicting saved agenda %s", entry.name)
+            del self.index.entries[entry.name]
+            total -= entry.size
+            if entry.packed:
+                repack = True
+            else:
+                (self.parent / entry.name).unlink(missing_ok=True)
+        if repack:
+            self.pack()  # also writes the index
+        else:
+            self.index.write()
+
+    def _get_pack_index(self) -> dict[str, list]:
+        if self._pack_index is None:
+            try:
+                self._pack_index = read_pack_index(self.pack_path)
+            except FileNotFoundError:
+                self._pack_index = {}
+        return self._pack_index
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Write *data* to *path* via a temporary file, so *path* is never left partially written."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _open_or_none(path: Path):
+    """Open the file at *path* for reading binary data, or return a context of None if it does not exist."""
+    try:
+        return path.open("rb")
+    except FileNotFoundError:
+        return contextlib.nullcontext()
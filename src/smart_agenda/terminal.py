@@ -0,0 +1,157 @@
+"""Low-level terminal input handling."""
+
+from __future__ import annotations
+
+import codecs
+import logging
+import os
+import sys
+from collections import deque
+
+KEY_UP, KEY_DOWN, KEY_RIGHT, KEY_LEFT = [f"\x1b[{c}" for c in "ABCD"]
+KEY_ENTER, KEY_BACKSPACE, KEY_ESCAPE = ("\n", "\x7f", "\x1b")
+
+
+def split_keys(data: str) -> list[str]:
+    """Split *data* read from a terminal into single keys, i.e. characters or complete escape sequences.
+
+    Examples:
+        >>> split_keys("nn")
+        ['n', 'n']
+        >>> split_keys("\\x1b[B\\x1b[5~\\x1bOPq\\x1b")
+        ['\\x1b[B', '\\x1b[5~', '\\x1bOP', 'q', '\\x1b']
+    """
+    keys = []
+    start, end = 0, len(data)
+    while start < end:
+        stop = start + 1
+        if data[start] == "\x1b" and stop < end and data[stop] in "[O":
+            stop += 1
+            # parameters of a control sequence (e.g. "5;2") are followed by a single final character
+            while stop < end and data[start + 1] == "[" and data[stop] in "0123456789;":
+                stop += 1
+            stop = min(stop + 1, end)
+        keys.append(data[start:stop])
+        start = stop
+    return keys
+
+
+class KeyReader:
+    """Read single key presses from *stdin*, waiting for input without polling.
+
+    The terminal is switched into cbreak mode once for the lifetime of the reader (instead of once per key read), and
+    waiting for input is delegated to a selector, so an idle reader does not consume any CPU. When *stdin* is not a
+    terminal (e.g. a pipe in headless mode), its input is read as is, and the reader only waits once it is exhausted
+    (or right away if it cannot be waited for, e.g. ``/dev/null``).
+
+    Example:
+
+        >>> with KeyReader() as keys:  # doctest: +SKIP
+        ...     key = keys.read_key(timeout=1.0)
+    """
+
+    def __init__(self, stdin=None):
+        self.stdin = stdin or sys.stdin
+        self._settings = None
+        self._selector = None
+        self._wakeup_fds = None
+        self._pending: deque[str] = deque()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        """Decoder of the input, which keeps multibyte characters that are split across reads."""
+        self._at_line_start = True
+        """Keys that were read along with a previous key (e.g. when a key is pressed twice in quick succession)."""
+
+    def __enter__(self) -> "KeyReader":
+        if sys.platform != "win32":
+            import selectors
+            import termios
+            import tty
+
+            if self.stdin.isatty():
+                self._settings = termios.tcgetattr(self.stdin)
+                tty.setcbreak(self.stdin)
+            self._selector = selectors.DefaultSelector()
+            try:
+                self._selector.register(self.stdin, selectors.EVENT_READ)
+            except OSError as e:
+                # e.g. /dev/null or a regular file, which epoll rejects: there are no keys to wait for
+                logging.debug("not reading keys from stdin: %s", e)
+            self._wakeup_fds = os.pipe()
+            for fd in self._wakeup_fds:
+                os.set_blocking(fd, False)
+            self._selector.register(self._wakeup_fds[0], selectors.EVENT_READ)
+        return self
+
+    def wakeup(self):
+        """Let a pending :meth:`read_key` return an empty string right away (can be called from any thread)."""
+        if self._wakeup_fds is not None:
+            try:
+                os.write(self._wakeup_fds[1], b"\0")
+            except BlockingIOError:  # pragma: no cover
+                pass  # a wakeup is pending already
+
+    def __exit__(self, *exc_info):
+        if self._selector is not None:
+            import termios
+
+            self._selector.close()
+            self._selector = None
+            for fd in self._wakeup_fds:
+                os.close(fd)
+            self._wakeup_fds = None
+            if self._settings is not None:
+                termios.tcsetattr(self.stdin, termios.TCSADRAIN, self._settings)
+
+    def read_key(self, timeout: float = None) -> str:
+        """Wait up to *timeout* seconds for a key press and return it (or an empty string if no key was pressed)."""
+        if self._selector is None:
+            # no selector support for console input on Windows
+            import getchlib
+
+            return getchlib.getkey(False, timeout)
+        if self._pending:
+            return self._pending.popleft()
+        if len(self._selector.get_map()) == 1:
+            # end of input was reached, wait for the timeout (or a wakeup) only
+            self._selector.select(timeout if timeout is not None else 1.0)
+            self._drain_wakeups()
+            return ""
+        if not self._stdin_ready(timeout):
+            self._drain_wakeups()
+            return ""
+        # read the full escape sequence of special keys (e.g. arrow keys) at once, along with any keys that follow
+        fd = self.stdin.fileno()
+        data = os.read(fd, 1024)
+        end_of_input = not data
+        while not end_of_input and self._stdin_ready(0):
+            chunk = os.read(fd, 1024)
+            data += chunk
+            end_of_input = not chunk
+        if end_of_input:
+            self._selector.unregister(self.stdin)
+        keys = split_keys(self._decoder.decode(data, final=end_of_input))
+        if self._settings is None:
+            keys = self._without_line_ends(keys)
+        self._pending.extend(keys)
+        return self._pending.popleft() if self._pending else ""
+
+    def _without_line_ends(self, keys: list[str]) -> list[str]:
+        """Remove the newlines that end lines of input that is not typed in a terminal (e.g. ``echo n | ...``).
+
+        Only a newline on an empty line is kept, as the enter key.
+        """
+        result = []
+        for key in keys:
+            if key != KEY_ENTER or self._at_line_start:
+                result.append(key)
+            self._at_line_start = key == KEY_ENTER
+        return result
+
+    def _stdin_ready(self, timeout: float | None) -> bool:
+        return any(selector_key.fileobj is self.stdin for selector_key, _ in self._selector.select(timeout))
+
+    def _drain_wakeups(self):
+        try:
+            os.read(self._wakeup_fds[0], 1024)
+        except BlockingIOError:
+            pass
@@ -0,0 +1,83 @@
+"""Hashed timer wheel, which runs the timers of many agendas from a single task."""
+
+from __future__ import annotations
+
+import math
+from typing import Hashable
+
+
+class TimerWheel:
+    """Timers with a deadline for each key, which expire when the wheel is advanced past their deadline.
+
+    Timers are hashed into *n_slots* slots of *resolution* seconds each, so scheduling and cancelling a timer is O(1)
+    and advancing the wheel only visits the slots that passed, no matter how many timers are pending. Timers expire
+    up to *resolution* seconds late. Scheduling a key that already has a timer replaces it.
+
+    Examples:
+        >>> wheel = TimerWheel(resolution=0.1, now=0.0)
+        >>> wheel.schedule("a", 0.25)
+        >>> wheel.schedule("b", 1.0)
+        >>> wheel.advance(0.5)
+        ['a']
+        >>> wheel.advance(60.0)
+        ['b']
+    """
+
+    def __init__(self, resolution: float = 0.05, n_slots: int = 256, now: float = 0.0):
+        self.resolution = resolution
+        self._slots: list[dict[Hashable, int]] = [{} for _ in range(n_slots)]
+        """Tick at which each timer in a slot expires (slots hold the timers of all rounds of the wheel)."""
+        self._slot_of: dict[Hashable, int] = {}
+        self._tick = self._to_tick(now)
+        """Tick up to which the wheel was advanced."""
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slot_of
+
+    def _to_tick(self, t: float) -> int:
+        # tolerate rounding errors, so that advancing to next_deadline() always reaches its slot
+        return math.floor(t / self.resolution + 1e-9)
+
+    def schedule(self, key: Hashable, deadline: float):
+        """Let the timer of *key* expire at *deadline* (replacing a previously scheduled timer of *key*)."""
+        self.cancel(key)
+        # timers that are due already expire with the next tick
+        tick = max(math.ceil(deadline / self.resolution), self._tick + 1)
+        slot = tick % len(self._slots)
+        self._slots[slot][key] = tick
+        self._slot_of[key] = slot
+
+    def cancel(self, key: Hashable):
+        """Cancel the timer of *key* (if there is one)."""
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            del self._slots[slot][key]
+
+    def advance(self, now: float) -> list[Hashable]:
+        """Advance the wheel to *now* and return the keys whose timer expired (which are removed from the wheel)."""
+        tick = self._to_tick(now)
+        n_slots = len(self._slots)
+        expired = []
+        # each slot needs to be visited at most once, as timers of later rounds stay in their slot
+        for t in range(self._tick + 1, min(tick, self._tick + n_slots) + 1):
+            slot = self._slots[t % n_slots]
+            due = [key for key, expires in slot.items() if expires <= tick]
+            for key in due:
+                del slot[key]
+                del self._slot_of[key]
+            expired.extend(due)
+        self._tick = max(tick, self._tick)
+        return expired
+
+    def next_deadline(self) -> float | None:
+        """Return the time of the slot with the next pending timer (or None if there is no timer)."""
+        if not self._slot_of:
+            return None
+        n_slots = len(self._slots)
+        for t in range(self._tick + 1, self._tick + n_slots + 1):
+            if self._slots[t % n_slots]:
+                return t * self.resolution
+        return None  # pragma: no cover
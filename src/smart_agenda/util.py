@@ -5,6 +5,7 @@ import logging
 from pathlib import Path
 
 from smart_agenda.lib import Agenda
+from smart_agenda.store import AgendaStore
 
 
 def get_filepath(agenda: Agenda, parent: Path = None) -> Path:
@@ -27,3 +28,8 @@ def get_filepath(agenda: Agenda, parent: Path = None) -> Path:
 
     logging.debug(filepath)
     return filepath
+
+
+def save_agenda(agenda: Agenda, content: str, parent: Path) -> str:
+    """Save *content* of *agenda* under a unique name in *parent* (see :class:`AgendaStore`) and return the name."""
+    return AgendaStore(parent).save(get_filepath(agenda).name, agenda.title, content)
@@ -0,0 +1,140 @@
+"""Watching a file for changes, with inotify where available and by polling its status otherwise."""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+"""Watch descriptor, mask, cookie and length of the name that follows an inotify event."""
+SETTLE_TIME = 0.05
+"""Seconds without further events until a change is reported, so a file that is being written is read only once."""
+
+
+def _load_inotify() -> ctypes.CDLL | None:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") else None
+
+
+class FileWatcher:
+    """Call *on_change* in a background thread whenever the file at *path* was changed.
+
+    On Linux, the directory of the file is watched with inotify, which also notices editors that save by replacing the
+    file. Elsewhere (or if inotify is not available), the status of the file is polled every *interval* seconds. Either
+    way, *on_change* is only called when size, modification time or inode of the file actually changed. Polling can
+    also be forced with *use_inotify* set to False.
+
+    Example:
+
+        >>> with FileWatcher(path, lambda: print("changed")):  # doctest: +SKIP
+        ...     path.write_text("# Edited\\n")
+        changed
+    """
+
+    def __init__(self, path: Path, on_change: Callable[[], object], interval: float = 1.0, use_inotify: bool = True):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._signature = self._stat()
+        self._closing = threading.Event()
+        self._close_r, self._close_w = os.pipe()
+        self._inotify_fd = self._open_inotify() if use_inotify else None
+        self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify_fd is not None
+
+    def start(self):
+        self._thread.start()
+
+    def close(self):
+        self._closing.set()
+        os.write(self._close_w, b"\0")
+        if self._thread.is_alive():
+            self._thread.join()
+        for fd in (self._close_r, self._close_w, self._inotify_fd):
+            if fd is not None:
+                os.close(fd)
+
+    def __enter__(self) -> FileWatcher:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _stat(self) -> tuple[int, int, int] | None:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _open_inotify(self) -> int | None:
+        libc = _load_inotify()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(self.path.parent.absolute()), mask) < 0:
+            logging.debug("cannot watch %s with inotify: %s", self.path, os.strerror(ctypes.get_errno()))
+            os.close(fd)
+            return None
+        return fd
+
+    def _run(self):
+        while not self._closing.is_set():
+            if self._inotify_fd is None:
+                if self._closing.wait(self.interval):
+                    break
+            elif not self._wait_for_inotify():
+                continue
+            signature = self._stat()
+            if signature is not None and signature != self._signature:
+                self._signature = signature
+                self.on_change()
+
+    def _wait_for_inotify(self) -> bool:
+        """Wait until the file was changed (and no further events follow within :data:`SETTLE_TIME`)."""
+        ready, _, _ = select.select([self._inotify_fd, self._close_r], [], [])
+        if self._close_r in ready or not self._read_inotify():
+            return False
+        while select.select([self._inotify_fd], [], [], SETTLE_TIME)[0]:
+            self._read_inotify()
+        return True
+
+    def _read_inotify(self) -> bool:
+        """Read pending inotify events and return whether any of them concerns the watched file."""
+        try:
+            data = os.read(self._inotify_fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        name = os.fsencode(self.path.name)
+        offset, found = 0, False
+        while offset < len(data):
+            _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            start, offset = offset + INOTIFY_EVENT.size, offset + INOTIFY_EVENT.size + length
+            found = found or data[start:offset].rstrip(b"\0") == name
+        return found
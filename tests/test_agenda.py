@@ -1,8 +1,8 @@
-import time
 from datetime import timedelta
 
 import pytest
 
+from smart_agenda.clock import VirtualClock
 from smart_agenda.lib import NOT_RUNNING, Agenda, AgendaItem
 
 
@@ -93,20 +93,117 @@ def test_agenda_to_previous():
 
 
 def test_agenda_item_worktime():
-    agenda = Agenda.loads(test_agenda_1)
+    clock = VirtualClock()
+    agenda = Agenda.loads(test_agenda_1, clock=clock)
     for item in agenda.items:
         assert item.worktime == timedelta(), "worktime should be zero initially"
 
     agenda.to_next()
-    worktime = agenda.current_item.worktime
-    assert worktime > timedelta(), "worktime should increase for current item"
-    time.sleep(0.01)
-    assert agenda.current_item.worktime > worktime, "worktime should increase with time"
+    clock.advance(10)
+    assert agenda.current_item.worktime == timedelta(seconds=10), "worktime should increase with time"
 
     agenda.to_next()
     previous_item = agenda.items[agenda.current_item_idx - 1]
     previous_item_worktime = previous_item.worktime
-    time.sleep(0.01)
+    clock.advance(10)
     assert (
         previous_item_worktime == previous_item.worktime
     ), "worktime should not increase with time for items other than the current one"
+
+
+def naive_delta_for(agenda, idx):
+    return sum((item.delta for item in agenda.items[:idx]), timedelta())
+
+
+def test_agenda_delta_for_matches_item_deltas():
+    clock = VirtualClock()
+    agenda = Agenda.loads(test_agenda_1, clock=clock)
+    for item in agenda.items:
+        item.past_worktime = timedelta(seconds=30)
+
+    for transition in (agenda.to_next, agenda.to_next, agenda.to_previous, agenda.to_next, agenda.to_next):
+        transition()
+        clock.advance(12.5)
+        for idx in range(-len(agenda.items), len(agenda.items) + 1):
+            assert naive_delta_for(agenda, idx) == agenda.delta_for(idx)
+
+
+def test_agenda_invalidate():
+    agenda = Agenda.loads(test_agenda_1)
+    assert agenda.delta_for(3) == timedelta(hours=12, minutes=46, seconds=57)
+
+    agenda.items[0].duration = timedelta()
+    agenda.invalidate()
+    assert agenda.delta_for(3) == timedelta(hours=12, minutes=34, seconds=57)
+
+    agenda.items.append(AgendaItem("Fourth", timedelta(minutes=1)))
+    assert agenda.delta_for(4) == timedelta(hours=12, minutes=35, seconds=57), "adding items drops the cache"
+
+
+def test_agenda_item_uses_monotonic_clock():
+    item = AgendaItem("item", "1:00")
+    assert not hasattr(item, "__dict__")
+
+    item.start(now=1_000_000_000)
+    assert item.is_active
+    assert item.worktime_ns_at(3_500_000_000) == 2_500_000_000
+    item.stop(now=3_500_000_000)
+    assert not item.is_active
+    assert item.worktime == timedelta(seconds=2.5)
+    assert item.delta == timedelta(seconds=57.5)
+
+
+def test_agenda_item_eq_and_repr():
+    item = AgendaItem("item", "1:00", past_worktime=timedelta(seconds=1))
+    assert item == AgendaItem("item", timedelta(minutes=1), past_worktime=timedelta(seconds=1))
+    assert item != AgendaItem("item", timedelta(minutes=1))
+    assert repr(item) == (
+        "AgendaItem(name='item', duration=datetime.timedelta(seconds=60), active_since_ns=None, "
+        "past_worktime=datetime.timedelta(seconds=1))"
+    )
+
+
+agenda_with_sections = """# Workshop
+## Intro
+Check-In 5:00
+## Exercises
+### Exercise 1
+Task 10:00
+Review 5:00
+### Exercise 2
+Task 10:00
+## Wrap-Up 5:00
+## Empty
+"""
+
+
+def test_agenda_sections():
+    agenda = Agenda.loads(agenda_with_sections)
+    assert agenda.title == "Workshop"
+    assert [item.name for item in agenda.items] == ["Check-In", "Task", "Review", "Task", "Wrap-Up"]
+    assert [(s.title, s.level, s.start, s.stop, s.parent) for s in agenda.sections] == [
+        ("Intro", 2, 0, 1, None),
+        ("Exercises", 2, 1, 4, None),
+        ("Exercise 1", 3, 1, 3, 1),
+        ("Exercise 2", 3, 3, 4, 1),
+        ("Empty", 2, 5, 5, None),
+    ], "headings with a duration should be items"
+
+    exercises = agenda.sections[1]
+    assert agenda.duration_for(exercises.start, exercises.stop) == timedelta(minutes=25)
+    assert agenda.worktime_for(exercises.start, exercises.stop) == timedelta()
+
+
+def test_agenda_worktime_for():
+    agenda = Agenda.loads(agenda_with_sections)
+    for item in agenda.items:
+        item.past_worktime = timedelta(minutes=1)
+    assert agenda.worktime_for(1, 4) == timedelta(minutes=3)
+
+    agenda.to_next()
+    agenda.to_next()
+    agenda.current_item.active_since_ns -= 60 * 10**9
+    assert abs(agenda.worktime_for(1, 4) - timedelta(minutes=4)) < timedelta(milliseconds=5)
+    agenda.to_next()
+    assert abs(agenda.worktime_for(1, 4) - timedelta(minutes=4)) < timedelta(milliseconds=5)
+    assert abs(agenda.worktime_for() - timedelta(minutes=6)) < timedelta(milliseconds=5)
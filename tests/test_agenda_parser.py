@@ -2,7 +2,7 @@ from datetime import timedelta
 
 import pytest
 
-from smart_agenda.lib import Agenda, AgendaItem
+from smart_agenda.lib import Agenda, AgendaItem, parse_duration
 
 test_agenda = """
 # Title
@@ -43,3 +43,79 @@ def test_agenda_loads():
 )
 def test_agenda_loads2(agenda_text, expected):
     assert Agenda.loads(agenda_text) == expected
+
+
+def test_agenda_loads_file(tmp_path):
+    fp = tmp_path / "agenda.md"
+    fp.write_text(test_agenda)
+    with fp.open() as f:
+        assert Agenda.loads(f) == Agenda.loads(test_agenda)
+
+
+def test_agenda_iter_items():
+    items = Agenda.iter_items(test_agenda)
+    assert next(items).name == "First Item"
+    assert next(items).name == "Long Item"
+
+
+@pytest.mark.parametrize(
+    "line,expected",
+    [
+        ("- Bullet Item (1:00)", AgendaItem("Bullet Item", timedelta(minutes=1))),
+        ("* Bullet Item 1:00", AgendaItem("Bullet Item", timedelta(minutes=1))),
+        ("Q&A 1:00", AgendaItem("A", timedelta(minutes=1))),
+        ("Tab separated\t1:00", None),
+        ("Invalid duration 123:00", None),
+        ("Invalid duration 1:2:3", None),
+        ("Unit duration 1h30", AgendaItem("Unit duration", timedelta(hours=1, minutes=30))),
+    ],
+)
+def test_agenda_iter_items_single_line(line, expected):
+    assert next(Agenda.iter_items(line), None) == expected
+
+
+def test_agenda_loads_long_line_without_duration():
+    # regex-based parsing used to backtrack quadratically on such lines
+    agenda = Agenda.loads("# Notes\n" + "word " * 100_000 + "\nLast Item 1:00\n")
+    assert agenda.items == [AgendaItem("Last Item", timedelta(minutes=1))]
+
+
+def test_agenda_init_with_invalid_item():
+    with pytest.raises(ValueError):
+        Agenda("Title", ["no duration"])
+
+
+@pytest.mark.parametrize(
+    "duration,expected",
+    [
+        ("0:00", timedelta()),
+        ("5:00", timedelta(minutes=5)),
+        ("05:00", timedelta(minutes=5)),
+        ("1:30:00", timedelta(hours=1, minutes=30)),
+        ("90:00", timedelta(minutes=90)),
+        ("90m", timedelta(minutes=90)),
+        ("45s", timedelta(seconds=45)),
+        ("1h", timedelta(hours=1)),
+        ("1h30", timedelta(hours=1, minutes=30)),
+        ("1h30m", timedelta(hours=1, minutes=30)),
+        ("2m30", timedelta(minutes=2, seconds=30)),
+        ("1h2m3s", timedelta(hours=1, minutes=2, seconds=3)),
+    ],
+)
+def test_parse_duration(duration, expected):
+    assert parse_duration(duration) == expected
+
+
+@pytest.mark.parametrize(
+    "duration", ["", "5", "1:2:3", "1:60", "1h60", "30m1h", "1s30", "1hh", "h", "5:00 ", "9" * 20 + "h"]
+)
+def test_parse_duration_invalid(duration):
+    with pytest.raises(ValueError, match="invalid duration"):
+        parse_duration(duration)
+
+
+def test_agenda_loads_invalid_duration():
+    with pytest.raises(ValueError, match="seconds must be below 60"):
+        Agenda.loads("Item 1:99")
+    with pytest.raises(ValueError, match="too long"):
+        Agenda.loads("Item 99999999999999999999h")
@@ -0,0 +1,88 @@
+import pytest
+
+from smart_agenda import bundle as bundle_module, picker as picker_module
+from smart_agenda.bundle import select_agenda
+from smart_agenda.cli import read_agenda_file
+from smart_agenda.lib import Agenda
+
+content = """# Opening
+Welcome 5:00
+
+## Keynote
+Talk 45:00
+# Workshop
+#hashtag
+Task 1:00:00
+# Closing
+Bye 5:00
+"""
+
+
+@pytest.fixture()
+def fp(tmp_path):
+    fp = tmp_path / "event.md"
+    fp.write_text(content)
+    return fp
+
+
+def test_load_many(fp):
+    with Agenda.load_many(fp) as bundle:
+        assert bundle.titles == ["Opening", "Workshop", "Closing"]
+        assert not bundle._agendas, "agendas should only be parsed when accessed"
+        assert bundle.content(1) == "# Workshop\n#hashtag\nTask 1:00:00\n"
+
+        agenda = bundle[0]
+        assert agenda.title == "Opening"
+        assert [item.name for item in agenda.items] == ["Welcome", "Talk"]
+        assert [section.title for section in agenda.sections] == ["Keynote"]
+        assert bundle[0] is agenda
+        assert bundle[-1].title == "Closing"
+        assert list(bundle._agendas) == [0, 2]
+
+
+@pytest.mark.parametrize(
+    "text, titles",
+    [
+        ("", []),
+        ("first 1:00\n", [None]),
+        ("\n\n# Title\nfirst 1:00\n", ["Title"]),
+        ("first 1:00\n# Title\nsecond 1:00", [None, "Title"]),
+        ("# Title\r\nfirst 1:00\r\n", ["Title"]),
+    ],
+)
+def test_load_many_edge_cases(tmp_path, text, titles):
+    fp = tmp_path / "agenda.md"
+    fp.write_bytes(text.encode())
+    with Agenda.load_many(fp) as bundle:
+        assert bundle.titles == titles
+        assert all(len(bundle[idx].items) == 1 for idx in range(len(bundle)))
+
+
+def test_select_agenda(fp, monkeypatch):
+    def run_picker(picker):
+        assert picker.update() and picker.relative_path(picker.selection) == fp.name
+        for key in "work":
+            picker.handle_key(key)
+        assert [summary.title for summary in picker.matches] == ["Workshop"]
+        return picker.selection
+
+    monkeypatch.setattr(picker_module, "run_picker", run_picker)
+    with Agenda.load_many(fp) as bundle:
+        assert select_agenda(bundle) == 1
+    monkeypatch.setattr(picker_module, "run_picker", lambda picker: None)
+    with Agenda.load_many(fp) as bundle:
+        assert select_agenda(bundle) is None, "selection was cancelled"
+
+
+def test_read_agenda_file(fp, tmp_path, monkeypatch):
+    monkeypatch.setattr(bundle_module, "select_agenda", lambda bundle: 2)
+    with fp.open() as f:
+        assert read_agenda_file(f) == "# Closing\nBye 5:00\n"
+    monkeypatch.setattr(bundle_module, "select_agenda", lambda bundle: None)
+    with fp.open() as f:
+        assert read_agenda_file(f) == "", "nothing should be read if the selection was cancelled"
+
+    single = tmp_path / "single.md"
+    single.write_text("# Title\nfirst 1:00\n")
+    with single.open() as f:
+        assert read_agenda_file(f) == "# Title\nfirst 1:00\n"
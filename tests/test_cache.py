@@ -0,0 +1,39 @@
+import os
+
+from smart_agenda import cache as cache_module
+from smart_agenda.cache import AgendaCache, dumps_agenda, loads_agenda
+from smart_agenda.lib import Agenda
+
+content = "# Title\n## Section\nfirst 1:00\nsecond 1:02:03\n"
+
+
+def test_dumps_and_loads_agenda():
+    agenda = Agenda.loads(content)
+    assert loads_agenda(dumps_agenda(agenda)) == agenda
+
+
+def test_agenda_cache(tmp_path, monkeypatch):
+    expected = Agenda.loads(content)
+    assert AgendaCache(tmp_path / "cache").loads(content) == expected
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached agenda should not be parsed")
+
+    monkeypatch.setattr(cache_module.Agenda, "loads", fail)
+    assert AgendaCache(tmp_path / "cache").loads(content) == expected
+    monkeypatch.undo()
+
+    # modified content is parsed again
+    assert len(AgendaCache(tmp_path / "cache").loads(content + "third 3:00\n").items) == 3
+
+
+def test_agenda_cache_eviction(tmp_path):
+    cache = AgendaCache(tmp_path / "cache", max_bytes=100)
+    for idx in range(5):
+        cache.loads(f"# Agenda {idx}\nitem 1:00\n")
+        os.utime(max(cache.directory.iterdir(), key=lambda fp: fp.stat().st_mtime_ns), ns=(idx, idx))
+    cached = list(cache.directory.iterdir())
+    assert 0 < len(cached) < 5
+    assert sum(fp.stat().st_size for fp in cached) <= 100
+    titles = [loads_agenda(fp.read_text()).title for fp in cached]
+    assert "Agenda 4" in titles, "most recently used agenda should be kept"
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from smart_agenda.check import check_content, check_files
+
+agendas = "\n# Weekly\n## Updates\nfirst 30:00\nsecond 20:00\n\n# Retro 1:00\n# Planning\n"
+
+
+def test_check_content():
+    result = check_content(agendas, slot_ns=45 * 60 * 10**9)
+    assert (result.agendas, result.items) == (3, 3)
+    assert [str(problem) for problem in result.problems] == [
+        "2: agenda in 'Weekly' takes 50:00, longer than the slot of 45:00",
+        "8: no agenda items in 'Planning'",
+    ]
+    assert check_content("first 1:00\n").ok
+    assert [str(problem) for problem in check_content("").problems] == ["1: no agenda items"]
+    assert [problem.line for problem in check_content("first 1:60\nsecond 1:00\nthird 90:90\n").problems] == [1, 3]
+
+
+def test_check_files(tmp_path):
+    paths = []
+    for idx in range(50):
+        paths.append(tmp_path / f"{idx}.md")
+        paths[-1].write_text("# Weekly\nfirst 30:00\n" if idx % 10 else agendas)
+    paths.append(tmp_path / "missing.md")
+    results = list(check_files(paths, slot=timedelta(hours=1), jobs=3))
+    assert sorted(result.path for result in results) == sorted(map(str, paths))
+    failed = {result.path: [problem.message for problem in result.problems] for result in results if not result.ok}
+    assert len(failed) == 50 // 10 + 1
+    assert failed[str(tmp_path / "10.md")] == ["no agenda items in 'Planning'"]
+    assert failed[str(tmp_path / "missing.md")][0].startswith("cannot read file")
@@ -1,3 +1,4 @@
+import json
 import logging
 from contextlib import contextmanager
 from typing import Callable
@@ -5,7 +6,11 @@ from typing import Callable
 import pytest
 from click.testing import CliRunner, Result
 
+import smart_agenda.cli as cli_module
 from smart_agenda.cli import cli as f_cli
+from smart_agenda.clock import VirtualClock
+from smart_agenda.history import History
+from smart_agenda.lib import Agenda
 
 env = {}
 
@@ -57,6 +62,57 @@ def test_cli_version(cli):
     assert rv.exit_code == 0
 
 
+def test_subcommand_help(cli):
+    rv: Result = cli(["serve", "--help"])
+    assert rv.exit_code == 0
+    assert rv.stdout.startswith("Usage: cli serve [OPTIONS] [FILE]..."), "subcommands should not be read as FILE"
+
+
+def test_stats(cli, tmp_path, monkeypatch):
+    monkeypatch.setattr(cli_module, "history_dir", tmp_path)
+    rv: Result = cli(["stats"])
+    assert rv.exit_code == 0
+    assert "No completed meetings" in rv.stdout
+
+    clock = VirtualClock()
+    agenda = Agenda("Weekly", ["Check-In 5:00", "Updates 10:00"], clock=clock)
+    agenda.to_next()
+    clock.advance(7 * 60)
+    agenda.to_next()
+    clock.advance(10 * 60)
+    agenda.to_next()
+    History(tmp_path).append(agenda)
+    rv = cli(["stats", "--title", "weekly"])
+    assert rv.exit_code == 0
+    assert "Check-In" in rv.stdout and "+02:00" in rv.stdout
+
+
+def test_check(cli, tmp_path):
+    (tmp_path / "team").mkdir()
+    (tmp_path / "team" / "weekly.md").write_text("# Weekly\nCheck-In 5:00\nUpdates 50:00\n")
+    (tmp_path / "team" / "notes.txt").write_text("not an agenda")
+    rv: Result = cli(["check", "--slot", "1:00:00", str(tmp_path)])
+    assert rv.exit_code == 0, rv.stderr
+    assert "1 files OK." in rv.stderr
+
+    (tmp_path / "broken.md").write_text("# Retro\nGood 10:00\nBad 10:99\n")
+    rv = cli(["check", "--slot", "15:00", "--jobs", "2", str(tmp_path)])
+    assert rv.exit_code == 1
+    assert sorted(rv.stdout.splitlines()) == [
+        f"{tmp_path / 'broken.md'}:3: invalid duration '10:99': seconds must be below 60",
+        f"{tmp_path / 'team' / 'weekly.md'}:1: agenda in 'Weekly' takes 55:00, longer than the slot of 15:00",
+    ]
+    rv = cli(["check", "--format", "ndjson", str(tmp_path / "broken.md")])
+    assert json.loads(rv.stdout) == {
+        "path": str(tmp_path / "broken.md"),
+        "agendas": 1,
+        "items": 1,
+        "problems": [{"line": 3, "message": "invalid duration '10:99': seconds must be below 60"}],
+        "ok": False,
+    }
+    assert cli(["check", "--slot", "forever", str(tmp_path)]).exit_code == 2
+
+
 @contextmanager
 def mute_logging(level: int = logging.CRITICAL):
     """Context manager that mutes logging.
@@ -87,3 +143,11 @@ def mute_logging(level: int = logging.CRITICAL):
     if logger_disabled:
         # enable logger again by removing previous disable level
         logging.disable(logging.NOTSET)
+
+
+def test_resume_broken_session_log(cli, tmp_path, monkeypatch):
+    monkeypatch.setattr(cli_module, "sessions_dir", tmp_path)
+    (tmp_path / "20240101-120000-000000_Weekly.log").touch()
+    rv: Result = cli(["--resume", "--output", "ndjson"])
+    assert rv.exit_code == 1
+    assert "Cannot resume the most recent meeting" in rv.stderr
@@ -0,0 +1,153 @@
+from datetime import timedelta
+
+from smart_agenda.cli_output import RunningAgendaRenderer, running_agenda_rows, seconds_until_next_change
+from smart_agenda.clock import VirtualClock
+from smart_agenda.forecast import format_clock_time
+from smart_agenda.lib import Agenda
+
+
+def test_running_agenda_rows():
+    agenda = Agenda("Title", ["first 1:00", "second 2:00"])
+    agenda.to_next()
+    rows = running_agenda_rows(agenda)
+    assert rows[0] == ("[b]first", "[b]01:00", "[b]-00:59")
+    assert rows[1] == ("[dim]second", "[dim]02:00", "")
+    assert running_agenda_rows(agenda) == rows, "rows should not change within the same second"
+
+
+def test_seconds_until_next_change():
+    agenda = Agenda("Title", ["first 1:00", "second 2:00"])
+    assert seconds_until_next_change(agenda) == 1.0, "agenda that is not running should not change"
+
+    agenda.to_next()
+    agenda.current_item.past_worktime = timedelta(seconds=0.25)
+    assert 0.7 < seconds_until_next_change(agenda) <= 0.75
+
+    agenda.current_item.past_worktime = timedelta(seconds=89.5)
+    assert 0.4 < seconds_until_next_change(agenda) <= 0.5
+
+    agenda.current_item.past_worktime = timedelta(seconds=89.75)
+    assert 0.2 < seconds_until_next_change(agenda) <= 0.25, "overrun highlighting should be a change"
+
+
+def test_running_agenda_renderer():
+    agenda = Agenda("Title", ["first 1:00", "second 2:00"])
+    agenda.to_next()
+    renderer = RunningAgendaRenderer(agenda)
+    assert renderer.update()
+    assert renderer.rows == running_agenda_rows(agenda)
+    table = renderer.render()
+
+    agenda.current_item.past_worktime = timedelta(seconds=95)
+    assert renderer.update(), "active row should be formatted again on every update"
+    assert renderer.rows[0] == ("[b]first", "[b]01:00", "[red][b]+00:35")
+    assert renderer.render() is table, "table should be reused while the active item does not change"
+
+    agenda.to_next()
+    assert renderer.update()
+    assert renderer.rows == running_agenda_rows(agenda)
+    assert renderer.render() is not table
+
+
+def test_windowed_running_agenda_rows():
+    agenda = Agenda("Title", [f"item{idx} 1:00" for idx in range(100)])
+    for _ in range(51):
+        agenda.to_next()
+    rows = running_agenda_rows(agenda, max_rows=10)
+    assert len(rows) == 10
+    assert rows[0] == ("[dim][i]… 48 previous items", "[dim][i]48:00", "")
+    assert rows[1][0] == "[dim]item48"
+    assert rows[3][0] == "[b]item50"
+    assert rows[-1] == ("[dim][i]… 44 upcoming items", "[dim][i]44:00", "")
+    assert running_agenda_rows(agenda, max_rows=100) == running_agenda_rows(agenda)
+
+
+def test_windowed_renderer():
+    agenda = Agenda("Title", [f"item{idx} 1:00" for idx in range(100)])
+    agenda.to_next()
+    renderer = RunningAgendaRenderer(agenda, max_rows=10)
+    assert renderer.update()
+    assert renderer.rows == running_agenda_rows(agenda, max_rows=10)
+
+    agenda.current_item.past_worktime = timedelta(seconds=95)
+    assert renderer.update()
+    assert renderer.rows[0] == ("[b]item0", "[b]01:00", "[red][b]+00:35")
+
+    for _ in range(60):
+        agenda.to_next()
+    assert renderer.update()
+    assert renderer.rows == running_agenda_rows(agenda, max_rows=10)
+    assert renderer.rows[0][2] == "[dim][i]01:35", "summary should show the worktime of the hidden items"
+
+    renderer.max_rows = 20
+    assert renderer.update(), "rows should be formatted again when the window size changes"
+    assert len(renderer.rows) == 20
+
+
+def test_section_rows():
+    agenda = Agenda.loads("# Title\n## Intro\nCheck-In 5:00\n## Work\n### A\nA1 1:00\nA2 2:00\n### B\nB1 3:00\n")
+    for _ in range(3):
+        agenda.to_next()
+    rows = running_agenda_rows(agenda, show_sections=True)
+    assert [row[0] for row in rows] == [
+        "[dim][u]Intro",
+        "[dim]  Check-In",
+        "[b][u]Work",
+        "[b]  [u]A",
+        "[dim]    A1",
+        "[b]    A2",
+        "[dim]  [u]B",
+        "[dim]    B1",
+    ]
+    assert rows[2][1] == "[b]06:00"
+
+    rows = running_agenda_rows(agenda, max_rows=6, show_sections=True)
+    assert len(rows) <= 6, "section rows should count towards the maximum number of rows"
+    assert [row[0] for row in rows][:4] == ["[dim][i]… 2 previous items", "[b][u]Work", "[b]  [u]A", "[b]    A2"]
+
+
+def test_renderer_updates_section_rows():
+    agenda = Agenda.loads("# Title\n## Intro\nCheck-In 5:00\n## Work\nTask 1:00\n")
+    agenda.to_next()
+    renderer = RunningAgendaRenderer(agenda, show_sections=True)
+    assert renderer.update()
+    table = renderer.render()
+
+    agenda.current_item.past_worktime = timedelta(seconds=10)
+    assert renderer.update()
+    assert renderer.rows[0] == ("[b][u]Intro", "[b]05:00", "[b]00:10"), "section subtotal should follow active item"
+    assert renderer.render() is table
+
+
+def test_renderer_eta():
+    start = 1_700_000_000 * 10**9
+    clock = VirtualClock(time_ns=start)
+    agenda = Agenda("Title", [f"item{idx} 10:00" for idx in range(100)], clock=clock)
+    agenda.to_next()
+    renderer = RunningAgendaRenderer(agenda, max_rows=10, show_eta=True)
+    assert renderer.update()
+    table = renderer.render()
+    assert len(table.columns) == 4
+    assert renderer.etas == {
+        row_idx: f"[dim]{format_clock_time(start + row_idx * 600 * 10**9)}" for row_idx in range(1, 10)
+    }
+    assert table.title == f"Title (ends {format_clock_time(start + 1000 * 60 * 10**9)})"
+
+    etas = renderer.etas
+    clock.advance(9 * 60)
+    renderer.update()
+    assert renderer.etas is etas, "projection should not change while the active item is within its plan"
+    clock.advance(2 * 60)
+    assert renderer.update()
+    assert renderer.etas[1] == f"[dim]{format_clock_time(start + 11 * 60 * 10**9)}"
+    assert renderer.render() is table
+    assert table.title == f"Title (ends {format_clock_time(start + 1001 * 60 * 10**9)})"
+    etas = renderer.etas
+    clock.advance(1)
+    renderer.update()
+    assert renderer.etas is etas, "projection should only be formatted again when a minute is reached"
+
+    agenda.to_next()
+    assert renderer.update()
+    assert 0 not in renderer.etas and 1 not in renderer.etas
+    assert renderer.etas[2] == f"[dim]{format_clock_time(start + 21 * 60 * 10**9)}"
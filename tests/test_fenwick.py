@@ -0,0 +1,23 @@
+import random
+
+from smart_agenda.fenwick import FenwickTree
+
+
+def test_fenwick_tree_matches_list():
+    rng = random.Random(0)
+    values = [rng.randrange(-100, 100) for _ in range(257)]
+    tree = FenwickTree(values)
+    for _ in range(500):
+        idx = rng.randrange(len(values))
+        values[idx] = rng.randrange(-100, 100)
+        tree[idx] = values[idx]
+        start, stop = sorted(rng.randrange(-300, 300) for _ in range(2))
+        assert tree.sum(start, stop) == sum(values[start:stop])
+        assert tree.prefix_sum(idx) == sum(values[:idx])
+    assert [tree[idx] for idx in range(len(tree))] == values
+
+
+def test_empty_fenwick_tree():
+    tree = FenwickTree()
+    assert len(tree) == 0
+    assert tree.sum() == 0
@@ -0,0 +1,59 @@
+from array import array
+
+import pytest
+
+from smart_agenda.clock import VirtualClock
+from smart_agenda.history import History, item_stats
+from smart_agenda.lib import Agenda
+
+content = "# Weekly\nfirst 1:00\nsecond 2:00\n"
+
+
+def complete(overruns: list[float]) -> Agenda:
+    clock = VirtualClock()
+    agenda = Agenda.loads(content, clock=clock)
+    agenda.to_next()
+    for item, overrun in zip(agenda.items, overruns):
+        clock.advance(item.duration_ns / 1e9 + overrun)
+        agenda.to_next()
+    return agenda
+
+
+def test_history(tmp_path):
+    history = History(tmp_path / ".history")
+    assert len(history.read()) == 0
+    for session in range(5):
+        history.append(complete([60 + 10 * session, -30]), completed=1000.0 + session)
+
+    columns = history.read()
+    assert columns.keys == [("Weekly", "first"), ("Weekly", "second")]
+    assert len(columns) == 10
+    assert list(columns.session) == [0, 0, 1, 1, 2, 2, 3, 3, 4, 4]
+    assert list(columns.completed) == [1000.0, 1001.0, 1002.0, 1003.0, 1004.0]
+
+    first, second = item_stats(columns)
+    assert (first.name, first.sessions, first.planned) == ("first", 5, 60.0)
+    assert first.overrun_p50 == pytest.approx(80)
+    assert first.overrun_p90 == pytest.approx(96)
+    assert first.overrun_rate == 1.0
+    assert first.trend == pytest.approx(10)
+    assert second.overrun_p50 == pytest.approx(-30)
+    assert second.overrun_rate == 0.0
+    assert item_stats(columns, title="daily") == []
+    assert item_stats(columns, min_sessions=6) == []
+
+
+def test_history_incomplete_session(tmp_path):
+    history = History(tmp_path)
+    history.append(complete([0, 0]))
+    # rows of a session whose completion was not written (e.g. the process was killed)
+    with (tmp_path / "key.bin").open("ab") as f:
+        f.write(bytes(6))
+    with (tmp_path / "session.bin").open("ab") as f:
+        f.write(array("i", [1]).tobytes())
+    assert len(history.read()) == 2
+
+    history.append(complete([0, 0]))
+    columns = history.read()
+    assert list(columns.key) == [0, 1, 0, 1]
+    assert list(columns.session) == [0, 0, 1, 1]
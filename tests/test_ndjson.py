@@ -0,0 +1,118 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from smart_agenda.clock import VirtualClock
+from smart_agenda.lib import Agenda
+from smart_agenda.ndjson import NdjsonWriter, agenda_record
+
+
+def test_agenda_record():
+    agenda = Agenda("Title", ["first 1:00", "second 2:00"])
+    agenda.to_next()
+    record = agenda_record(agenda, "start")
+    assert record["items"] == [{"name": "first", "plan": 60.0}, {"name": "second", "plan": 120.0}]
+    assert record["current"] == 0
+    assert 59 < record["delta"] <= 60
+    assert record["worktime"] == [0.0, 0.0]
+    assert "items" not in agenda_record(agenda, "tick")
+
+
+def test_agenda_record_clock():
+    clock = VirtualClock(time_ns=1_000 * 10**9)
+    agenda = Agenda("Title", ["first 1:00", "second 2:00"], clock=clock)
+    agenda.to_next()
+    clock.advance(90)
+    record = agenda_record(agenda, "tick")
+    assert (record["time"], record["delta"], record["worktime"]) == (1090.0, -30.0, [90.0, 0.0])
+
+
+class SlowFile(io.BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.unblocked = threading.Event()
+
+    def write(self, data):
+        self.unblocked.wait()
+        return super().write(data)
+
+
+def test_ndjson_writer_drops_ticks_for_slow_reader():
+    f = SlowFile()
+    with NdjsonWriter(f, max_pending=5) as writer:
+        writer.write({"event": "start"})
+        for idx in range(20):
+            writer.write({"event": "tick", "idx": idx}, droppable=True)
+        writer.write({"event": "next"})
+        f.unblocked.set()
+    records = [json.loads(line) for line in f.getvalue().splitlines()]
+    assert records[0] == {"event": "start"}
+    assert records[-1] == {"event": "next"}, "state changes should never be dropped"
+    assert len(records) <= 2 * 5, "at most one batch in flight and max_pending records should be kept"
+    assert writer.dropped == 22 - len(records)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="requires FIFO")
+def test_ndjson_output(tmp_path):
+    fifo = tmp_path / "agenda.fifo"
+    os.mkfifo(fifo)
+    script = (
+        "import sys\n"
+        "from smart_agenda.cli import cli\n"
+        "try:\n"
+        "    cli(sys.argv[1:], prog_name='smart-agenda')\n"
+        "finally:\n"
+        "    assert 'rich' not in sys.modules, 'ndjson output should not import rich'\n"
+    )
+    args = ["--demo", "--no-save", "--output", "ndjson", "--output-file", str(fifo), "--tick", "0.01"]
+    proc = subprocess.Popen(
+        [sys.executable, "-c", script, *args],
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env={**os.environ, "HOME": str(tmp_path)},
+    )
+    with fifo.open() as f:
+        first = json.loads(f.readline())
+        proc.stdin.write(b"nnnn")
+        proc.stdin.close()
+        records = [first, *(json.loads(line) for line in f)]
+    assert proc.wait(timeout=10) == 0, proc.stderr.read().decode()
+    assert [record["event"] for record in records if record["event"] != "tick"] == [
+        "start",
+        "next",
+        "next",
+        "next",
+        "complete",
+    ]
+    assert records[0]["title"] == "Meeting Title"
+
+
+def test_ndjson_messages_on_stderr(tmp_path):
+    proc = subprocess.run(
+        [sys.executable, "-m", "smart_agenda", "--resume", "--output", "ndjson"],
+        capture_output=True,
+        env={**os.environ, "HOME": str(tmp_path)},
+        timeout=10,
+    )
+    assert proc.returncode == 0
+    assert proc.stdout == b"", "stdout should only contain JSON lines"
+    assert b"No meeting to resume." in proc.stderr
+
+
+def test_ndjson_output_without_stdin(tmp_path):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "smart_agenda", "--demo", "--no-save", "--output", "ndjson", "--tick", "0.01"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env={**os.environ, "HOME": str(tmp_path)},
+    )
+    records = [json.loads(proc.stdout.readline()) for _ in range(3)]
+    proc.terminate()
+    proc.wait(timeout=10)
+    assert [record["event"] for record in records] == ["start", "tick", "tick"], proc.stderr.read().decode()
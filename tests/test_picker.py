@@ -0,0 +1,102 @@
+import io
+import os
+
+from rich.console import Console
+
+from smart_agenda import cli
+from smart_agenda.cli_output import render_agenda_picker
+from smart_agenda.picker import AgendaPicker, AgendaScanner, SummaryCache, summarize_agenda_file
+from smart_agenda.store import AgendaIndex, AgendaStore
+from smart_agenda.terminal import KEY_BACKSPACE, KEY_DOWN, KEY_ESCAPE, KEY_UP
+
+
+def make_tree(root):
+    for name, content in {
+        "weekly.md": "# Weekly\nCheck-In 5:00\nUpdates 25:00\n",
+        "team/retro.md": "# Retro\nGood 10:00\nBad 10:00\n# Planning\nBacklog 30:00\n",
+        "team/notes.txt": "not an agenda",
+        "team/b/standup.md": "Round 15:00\n",
+        ".git/stale.md": "# Stale\nitem 1:00\n",
+    }.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(content)
+
+
+def scan(root, cache):
+    with AgendaScanner(root, cache) as scanner:
+        assert scanner.wait(5)
+    return scanner
+
+
+def test_summarize_agenda_file(tmp_path):
+    make_tree(tmp_path)
+    summary = summarize_agenda_file(tmp_path / "team" / "retro.md")
+    assert (summary.title, summary.agendas, summary.items, summary.duration_ns) == ("Retro", 2, 3, 50 * 60 * 10**9)
+    summary = summarize_agenda_file(tmp_path / "team" / "b" / "standup.md")
+    assert (summary.title, summary.agendas, summary.items) == (None, 1, 1)
+
+
+def test_agenda_scanner(tmp_path):
+    make_tree(tmp_path)
+    cache_path = tmp_path / "cache" / "picker.json"
+    scanner = scan(tmp_path, SummaryCache(cache_path))
+    assert [os.path.relpath(summary.path, tmp_path) for summary in scanner.results] == [
+        "weekly.md",
+        os.path.join("team", "retro.md"),
+        os.path.join("team", "b", "standup.md"),
+    ]
+    assert scanner.parsed == 3 and cache_path.exists()
+
+    # only changed files are read again, and deleted files are forgotten
+    assert scan(tmp_path, SummaryCache(cache_path)).parsed == 0
+    (tmp_path / "weekly.md").write_text("# Weekly\nCheck-In 5:00\n")
+    (tmp_path / "team" / "b" / "standup.md").unlink()
+    scanner = scan(tmp_path, SummaryCache(cache_path))
+    assert scanner.parsed == 1
+    assert [summary.items for summary in scanner.results] == [1, 3]
+    assert [summary.items for summary in scan(tmp_path, SummaryCache(cache_path)).results] == [1, 3]
+
+
+def test_summary_cache_keeps_index_valid(tmp_path, monkeypatch):
+    make_tree(tmp_path)
+    app_dir = tmp_path / "app"
+    cache_path = app_dir / cli.picker_cache.relative_to(cli.app_dir)
+    SummaryCache(cache_path).save()
+    scan(tmp_path, SummaryCache(cache_path))
+    AgendaStore(app_dir).save("weekly", "Weekly", "# Weekly\nCheck-In 5:00\n")
+    (tmp_path / "weekly.md").write_text("# Weekly\nCheck-In 5:00\n")
+    scan(tmp_path, SummaryCache(cache_path))
+
+    def rebuild(self, previous=None):
+        raise AssertionError("saving the picker cache should not invalidate the index of saved agendas")
+
+    monkeypatch.setattr(AgendaIndex, "_rebuild", rebuild)
+    assert AgendaIndex(app_dir).get("weekly").title == "Weekly"
+
+
+def test_agenda_picker(tmp_path):
+    make_tree(tmp_path)
+    picker = AgendaPicker(scan(tmp_path, SummaryCache()))
+    assert picker.update() and len(picker.matches) == 3
+    assert not picker.update()
+    assert picker.handle_key(KEY_UP) is None and picker.selected == 0
+    picker.handle_key(KEY_DOWN)
+    assert picker.relative_path(picker.selection) == os.path.join("team", "retro.md")
+
+    # typing filters by path and title, and keeps the selected file selected
+    for key in "TEAM":
+        picker.handle_key(key)
+    assert [summary.title for summary in picker.matches] == ["Retro", None]
+    assert picker.selection.title == "Retro"
+    picker.handle_key("x")
+    assert picker.matches == [] and picker.handle_key("\n") is None
+    picker.handle_key(KEY_BACKSPACE)
+    assert len(picker.matches) == 2
+    assert picker.handle_key("\n") == "select"
+    assert picker.handle_key(KEY_ESCAPE) == "cancel"
+
+    console = Console(file=io.StringIO(), width=100)
+    console.print(render_agenda_picker(picker, max_rows=1))
+    output = console.file.getvalue()
+    assert "> TEAM" in output and "2 of 3 files" in output
+    assert "Retro" in output and "50:00" in output and "standup" not in output
@@ -0,0 +1,66 @@
+import io
+import json
+
+import pytest
+
+from smart_agenda.profiling import CountingWriter, FrameProfiler, Histogram, NullProfiler, profile_session
+
+
+@pytest.mark.parametrize("values", [[0], [1, 2, 3], list(range(1, 10_000, 7)), [10**9, 10**9 + 1, 5 * 10**9]])
+def test_histogram_percentiles(values):
+    h = Histogram()
+    for value in values:
+        h.record(value)
+    assert h.count == len(values)
+    assert h.min == min(values) and h.max == max(values)
+    ordered = sorted(values)
+    for p in (50, 90, 99, 100):
+        exact = ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+        assert exact * 0.75 <= h.percentile(p) <= exact * 1.25 + 1
+
+
+def test_counting_writer():
+    file = io.StringIO()
+    writer = CountingWriter(file)
+    writer.write("abc")
+    writer.write("äö")
+    writer.flush()
+    assert file.getvalue() == "abcäö"
+    assert writer.bytes_written == 7
+
+
+def test_frame_profiler():
+    profiler = FrameProfiler()
+    file = profiler.wrap(io.StringIO())
+    for _ in range(3):
+        profiler.key_pressed()
+        profiler.frame_started()
+        profiler.frame_rendered()
+        file.write("x" * 10)
+        profiler.frame_shown()
+    profiler.frame_started()
+    profiler.frame_skipped()
+
+    summary = profiler.summary()
+    assert summary["frames"] == 3
+    assert summary["frames_skipped"] == 1
+    assert summary["keys"] == 3
+    assert summary["metrics"]["key_latency"]["count"] == 3
+    assert summary["metrics"]["bytes"]["max"] == 10
+    assert "3 frames" in profiler.format_summary()
+
+
+def test_profile_session(tmp_path, capsys):
+    with profile_session(False) as profiler:
+        assert type(profiler) is NullProfiler
+    assert capsys.readouterr().err == ""
+
+    with profile_session(True) as profiler:
+        assert isinstance(profiler, FrameProfiler)
+    assert "0 frames" in capsys.readouterr().err
+
+    output, cprofile_output = tmp_path / "profile.json", tmp_path / "profile.prof"
+    with profile_session(False, output, cprofile_output):
+        pass
+    assert json.loads(output.read_text())["frames"] == 0
+    assert cprofile_output.exists()
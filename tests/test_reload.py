@@ -0,0 +1,105 @@
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+from smart_agenda.clock import VirtualClock
+from smart_agenda.lib import Agenda
+from smart_agenda.reload import AgendaReloader, IncrementalParser
+from smart_agenda.session import SessionLog, read_session
+from smart_agenda.watch import FileWatcher
+
+content = "# Weekly\nfirst 1:00\nsecond 2:00\nthird 3:00\n"
+
+
+def running_agenda():
+    clock = VirtualClock()
+    agenda = Agenda.loads(content, clock=clock)
+    agenda.to_next()
+    clock.advance(90)
+    agenda.to_next()
+    clock.advance(30)
+    return agenda, clock
+
+
+def test_merge():
+    agenda, clock = running_agenda()
+    agenda.merge(Agenda.loads("# Weekly\n## Intro\nnew 1:00\nfirst 1:00\nsecond 4:00\n"))
+    assert [item.name for item in agenda.items] == ["new", "first", "second"]
+    assert [section.title for section in agenda.sections] == ["Intro"]
+    assert agenda.current_item_idx == 2
+    assert agenda.items[1].worktime == timedelta(seconds=90)
+    assert agenda.current_item.is_active and agenda.current_item.duration == timedelta(minutes=4)
+    clock.advance(10)
+    assert agenda.current_item.worktime == timedelta(seconds=40)
+    assert agenda.delta_for(3) == timedelta(minutes=6) - timedelta(seconds=130)
+    assert agenda.items[0].clock is clock
+
+
+def test_merge_removed_current_item():
+    agenda, clock = running_agenda()
+    agenda.merge(Agenda.loads("first 1:00\nthird 3:00\n"))
+    assert agenda.current_item_idx == 1
+    assert agenda.current_item.name == "third" and agenda.current_item.is_active
+    clock.advance(5)
+    assert agenda.current_item.worktime == timedelta(seconds=5)
+    with pytest.raises(ValueError):
+        agenda.merge(Agenda.loads("# Empty\n"))
+
+
+def test_incremental_parser():
+    parser = IncrementalParser()
+    long_content = "# Title\n" + "".join(f"item {idx} 1:00\n" for idx in range(1000))
+    assert len(parser.parse(long_content).items) == 1000
+    edited = parser.parse(long_content.replace("item 500 1:00", "item 500 2:00"))
+    assert parser.lines_parsed == 1
+    assert edited.title == "Title"
+    assert edited.items[500].duration == timedelta(minutes=2)
+    assert edited == Agenda.loads(long_content.replace("item 500 1:00", "item 500 2:00"))
+    assert parser.parse("# Title\n## Section\nitem 1:00\n").sections[0].title == "Section"
+
+
+@pytest.mark.parametrize("inotify", [True, False])
+def test_file_watcher(tmp_path, inotify):
+    fp = tmp_path / "agenda.md"
+    fp.write_text(content)
+    changed = threading.Event()
+    watcher = FileWatcher(fp, changed.set, interval=0.01, use_inotify=inotify)
+    if inotify and not watcher.uses_inotify:
+        pytest.skip("inotify is not available")
+    with watcher:
+        (tmp_path / "other.md").write_text("unrelated")
+        assert not changed.wait(0.1)
+        time.sleep(0.01)  # let the modification time change
+        # save by replacing the file, as many editors do
+        (tmp_path / "agenda.md.tmp").write_text(content + "fourth 1:00\n")
+        (tmp_path / "agenda.md.tmp").replace(fp)
+        assert changed.wait(2)
+
+
+def test_agenda_reloader(tmp_path):
+    fp = tmp_path / "agenda.md"
+    fp.write_text(content)
+    agenda, clock = running_agenda()
+    agenda.log = SessionLog(tmp_path / "session.log", content, clock=clock)
+    agenda.log.append(0, 0)
+    agenda.log.append(1, 90 * 1_000_000_000)
+    reloader = AgendaReloader(fp, content, agenda.title)
+    assert not reloader.apply(agenda)
+
+    edited = "# Weekly\nfirst 1:00\nsecond 2:00\nbreak 5:00\nthird 3:00\n"
+    fp.write_text(edited)
+    reloader.reload()
+    assert reloader.parser.lines_parsed == 1
+    assert reloader.apply(agenda)
+    assert [item.name for item in agenda.items] == ["first", "second", "break", "third"]
+    clock.advance(15)
+    agenda.to_next()  # logged while the log may still be rewritten in the background
+    agenda.log.close()
+
+    session = read_session(tmp_path / "session.log")
+    assert session.content == edited
+    resumed = session.replay(clock=clock)
+    assert resumed.current_item_idx == 2
+    assert [item.worktime for item in resumed.items] == [item.worktime for item in agenda.items]
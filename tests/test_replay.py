@@ -0,0 +1,65 @@
+import io
+from datetime import timedelta
+
+import pytest
+from rich.console import Console
+
+from smart_agenda.clock import VirtualClock
+from smart_agenda.lib import Agenda, ns_to_timedelta
+from smart_agenda.replay import NEXT, PREVIOUS, KeyEvent, recorded_events, render_replay, replay, synthetic_events
+from smart_agenda.session import SessionLog, read_session
+
+content = "# Title\nfirst 1:00\nsecond 2:00\nthird 3:00\n"
+DAY = "# Day\n" + "".join(f"Item {idx} 1:00:00\n" for idx in range(24))
+
+
+def test_replay_recorded_session(tmp_path):
+    clock = VirtualClock(monotonic_ns=10**12, time_ns=1_700_000_000 * 10**9)
+    agenda = Agenda.loads(content, clock=clock)
+    agenda.log = SessionLog(tmp_path / "session.log", content, clock=clock)
+    for seconds, transition in ((0, agenda.to_next), (70, agenda.to_next), (20, agenda.to_previous)):
+        clock.advance(seconds)
+        transition()
+    clock.advance(5)
+    agenda.log.close()
+
+    session = read_session(tmp_path / "session.log")
+    assert session.started == 1_700_000_000 * 10**9
+    events = recorded_events(session)
+    assert [event.action for event in events] == [NEXT, NEXT, PREVIOUS]
+
+    replayed = Agenda.loads(session.content, clock=VirtualClock())
+    result = replay(replayed, events)
+    assert result.events == 3 and not result.completed
+    assert result.duration_ns == 90 * 10**9
+    replayed.clock.advance(5)
+    assert [item.worktime for item in replayed.items] == [item.worktime for item in agenda.items]
+    assert replayed.delta_for(1) == agenda.delta_for(1) == timedelta(seconds=-15)
+
+
+def test_replay_frames():
+    agenda = Agenda.loads(content, clock=VirtualClock())
+    frames = []
+    events = [KeyEvent(0, NEXT), KeyEvent(90 * 10**9, NEXT)]
+    result = replay(agenda, events, on_frame=lambda agenda: frames.append(agenda.worktime_for()), frame_interval=30)
+    assert result.frames == len(frames) == 4, "a frame after each key press and two in between"
+    assert frames == [timedelta(seconds=seconds) for seconds in (0, 30, 60, 90)]
+
+
+def test_replay_requires_virtual_clock():
+    with pytest.raises(TypeError):
+        replay(Agenda.loads(content), [KeyEvent(0, NEXT)])
+
+
+def test_render_replay_of_a_day():
+    agenda = Agenda.loads(DAY, clock=VirtualClock())
+    events = synthetic_events(agenda, seed=1)
+    assert events == synthetic_events(agenda, seed=1), "synthetic sessions should be deterministic"
+
+    console = Console(file=io.StringIO(), width=80, height=20)
+    result = render_replay(agenda, events, console)
+    assert result.completed
+    assert result.events == len(events)
+    assert timedelta(hours=19) < ns_to_timedelta(result.duration_ns) < timedelta(hours=29)
+    assert agenda.worktime_for() == ns_to_timedelta(result.duration_ns)
+    assert "Item 23" in console.file.getvalue()
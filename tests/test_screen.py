@@ -0,0 +1,61 @@
+import io
+
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+
+from smart_agenda.cli_output import RunningAgendaRenderer
+from smart_agenda.clock import VirtualClock
+from smart_agenda.lib import Agenda
+from smart_agenda.screen import CLEAR_SCREEN, DiffScreen, move_to
+
+content = "# Weekly\n" + "".join(f"Topic {idx} {idx % 9 + 1}:00\n" for idx in range(20))
+
+
+def make_console() -> Console:
+    return Console(file=io.StringIO(), force_terminal=True, width=80, height=30, color_system="standard")
+
+
+def table(*cells: str) -> Table:
+    table = Table(show_header=False)
+    table.add_column()
+    for cell in cells:
+        table.add_row(cell)
+    return table
+
+
+def test_diff_screen():
+    console = make_console()
+    with DiffScreen(table("first", "+01:00"), console=console) as screen:
+        assert console.file.getvalue().count(CLEAR_SCREEN) == 1
+        assert [len(line) for line in screen.lines] == [10, 10, 10, 10]
+        start = len(console.file.getvalue())
+        screen.update(table("first", "[b]+00:59"), refresh=True)
+        assert console.file.getvalue()[start:] == move_to(2, 2) + "\x1b[1m+00:59\x1b[0m"
+        start = len(console.file.getvalue())
+        screen.update(table("first "), refresh=True)
+        # the bottom border moves up a row, and the last row is cleared
+        assert console.file.getvalue()[start:] == move_to(2, 0) + "└────────┘" + move_to(3, 0) + "\x1b[2K"
+        screen.refresh()
+        assert screen.bytes_written == len(console.file.getvalue().encode())
+
+
+def test_diff_screen_output_volume():
+    def run(screen_cls) -> int:
+        console = make_console()
+        clock = VirtualClock()
+        agenda = Agenda.loads(content, clock=clock)
+        agenda.to_next()
+        renderer = RunningAgendaRenderer(agenda, max_rows=26)
+        renderer.update()
+        with screen_cls(renderer.render(), console=console) as screen:
+            for second in range(60):
+                clock.advance(1)
+                if second % 20 == 19:
+                    agenda.to_next()
+                if renderer.update():
+                    screen.update(renderer.render(), refresh=True)
+        return len(console.file.getvalue().encode())
+
+    full_repaint = run(lambda renderable, console: Live(renderable, auto_refresh=False, console=console))
+    assert run(DiffScreen) * 10 < full_repaint
@@ -0,0 +1,84 @@
+import asyncio
+import json
+import sys
+import threading
+
+import pytest
+
+from smart_agenda.client import AgendaClient, ServerError, mirror_agenda
+from smart_agenda.server import AgendaServer
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="requires Unix sockets")
+
+AGENDA = "# Weekly\nCheck-In 5:00\nTopic 10:00\n"
+
+
+async def _request(reader, writer, request):
+    writer.write(json.dumps(request).encode() + b"\n")
+    while True:
+        message = json.loads(await reader.readline())
+        if "id" in message:
+            return message
+
+
+def test_server_commands_and_pushes(tmp_path):
+    address = f"unix:{tmp_path / 'server.sock'}"
+
+    async def run():
+        server = AgendaServer(resolution=0.01)
+        await server.start(address)
+        reader, writer = await asyncio.open_unix_connection(str(tmp_path / "server.sock"))
+        response = await _request(reader, writer, {"id": 1, "cmd": "open", "room": "A", "content": AGENDA})
+        assert response["ok"] and response["title"] == "Weekly" and response["current"] == -1
+        response = await _request(reader, writer, {"id": 2, "cmd": "open", "room": "A", "content": AGENDA})
+        assert response == {"id": 2, "ok": False, "error": "room 'A' exists already"}
+        response = await _request(reader, writer, {"id": 3, "cmd": "next", "room": "B"})
+        assert response == {"id": 3, "ok": False, "error": "no agenda in room 'B'"}
+
+        response = await _request(reader, writer, {"id": 4, "cmd": "subscribe", "room": "A"})
+        assert response["items"] == [{"name": "Check-In", "plan": 300.0}, {"name": "Topic", "plan": 600.0}]
+        assert "A" not in server.wheel, "agendas that are not running need no timer"
+        writer.write(b'{"id":5,"cmd":"next","room":"A"}\n')
+        pushed = json.loads(await reader.readline())
+        assert pushed["event"] == "next" and pushed["room"] == "A" and "id" not in pushed
+        response = json.loads(await reader.readline())
+        assert response["id"] == 5 and response["current"] == 0 and response["active"]
+
+        tick = json.loads(await asyncio.wait_for(reader.readline(), 2))
+        assert tick["event"] == "tick" and 0 < tick["worktime"][0] <= 1.1
+        response = await _request(reader, writer, {"id": 6, "cmd": "unsubscribe", "room": "A"})
+        assert response["ok"] and "A" not in server.wheel
+
+        response = await _request(reader, writer, {"id": 7, "cmd": "rooms"})
+        assert [room["room"] for room in response["rooms"]] == ["A"]
+        writer.close()
+
+    asyncio.run(run())
+
+
+def test_client_mirrors_agenda(tmp_path):
+    address = f"unix:{tmp_path / 'server.sock'}"
+    server = AgendaServer()
+    started = threading.Event()
+
+    async def serve():
+        await server.start(address)
+        started.set()
+        await asyncio.sleep(5)
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), daemon=True)
+    thread.start()
+    assert started.wait(5)
+
+    pushed = []
+    with AgendaClient(address, on_push=pushed.append) as client:
+        client.request("open", room="A", content=AGENDA)
+        client.request("next", room="A")
+        client.request("next", room="A")
+        agenda = mirror_agenda(client.request("status", room="A"))
+        with pytest.raises(ServerError, match="unknown command"):
+            client.request("jump", room="A")
+    assert agenda.title == "Weekly"
+    assert agenda.current_item_idx == 1 and agenda.current_item.is_active
+    assert [item.duration_ns for item in agenda.items] == [300 * 10**9, 600 * 10**9]
+    assert pushed == [{"event": "disconnect"}], "only subscribers should receive updates"
@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+import pytest
+
+from smart_agenda.lib import NOT_RUNNING, Agenda
+from smart_agenda.session import (
+    HEADER,
+    MAGIC,
+    VERSION,
+    SessionLog,
+    latest_session,
+    prune_sessions,
+    read_session,
+    session_filename,
+)
+
+content = "# Title\nfirst 1:00\nsecond 2:00\nthird 3:00\n"
+SECOND = 1_000_000_000
+
+
+def test_session_log(tmp_path):
+    fp = tmp_path / "session.log"
+    log = SessionLog(fp, content)
+    assert not fp.exists(), "log file should only be created with the first event"
+
+    log.append(0, timestamp=0)
+    log.append(1, timestamp=10 * SECOND)
+    log.append(0, timestamp=15 * SECOND)
+    log.append(1, timestamp=20 * SECOND)
+    log.close()
+
+    session = read_session(fp)
+    assert session.content == content
+    assert session.events == [(0, 0), (1, 10 * SECOND), (0, 15 * SECOND), (1, 20 * SECOND)]
+    assert not session.completed
+
+    agenda = session.replay(now_monotonic=23 * SECOND)
+    assert agenda.current_item_idx == 1
+    assert agenda.items[0].worktime == timedelta(seconds=15)
+    assert agenda.items[1].past_worktime == timedelta(seconds=5)
+    assert timedelta(seconds=8) <= agenda.items[1].worktime < timedelta(seconds=9)
+    assert agenda.items[2].worktime == timedelta()
+
+
+def test_session_log_resume(tmp_path):
+    fp = tmp_path / "session.log"
+    agenda = Agenda.loads(content)
+    agenda.log = SessionLog(fp, content)
+    agenda.to_next()
+    agenda.to_next()
+    agenda.log.close()
+
+    agenda.log, session = SessionLog.resume(fp)
+    agenda = session.replay()
+    assert agenda.current_item_idx == 1
+    assert agenda.current_item.is_active
+
+    agenda.log = SessionLog.resume(fp)[0]
+    agenda.to_previous()
+    agenda.to_previous()
+    agenda.log.close()
+    assert read_session(fp).replay().current_item_idx == NOT_RUNNING
+
+    agenda.log = SessionLog.resume(fp)[0]
+    for _ in range(4):
+        agenda.to_next()
+    agenda.log.close()
+    session = read_session(fp)
+    assert session.completed
+    assert session.replay().current_item_idx == 2
+    assert not session.replay().current_item.is_active
+
+
+def test_session_log_ignores_partial_event(tmp_path):
+    fp = tmp_path / "session.log"
+    log = SessionLog(fp, content)
+    log.append(0, timestamp=0)
+    log.close()
+    with fp.open("ab") as f:
+        f.write(b"\x01\x00")
+    assert read_session(fp).events == [(0, 0)]
+
+    # resuming removes the partial event, so later events can be read
+    log = SessionLog.resume(fp)[0]
+    log.append(1, timestamp=SECOND)
+    log.close()
+    assert read_session(fp).events == [(0, 0), (1, SECOND)]
+
+
+def test_read_session_invalid(tmp_path):
+    fp = tmp_path / "agenda.md"
+    fp.write_text(content)
+    with pytest.raises(ValueError):
+        read_session(fp)
+    # e.g. left by a process that was killed while creating the log
+    for data in (b"", HEADER.pack(MAGIC, VERSION, 0, 0, len(content)) + content[:5].encode()):
+        fp.write_bytes(data)
+        with pytest.raises(ValueError):
+            read_session(fp)
+
+
+def test_latest_session(tmp_path):
+    assert latest_session(tmp_path / "missing") is None
+    for name in ("20240101-120000_b.log", "20240102-090000_a.log", "20231231-235959_c.log"):
+        (tmp_path / name).touch()
+    assert latest_session(tmp_path).name == "20240102-090000_a.log"
+    assert session_filename("Title_1234").endswith("_Title_1234.log")
+
+
+def test_session_log_same_name(tmp_path):
+    path = tmp_path / session_filename("Title_1234")
+    logs = [SessionLog(path, content) for _ in range(2)]
+    for log in logs:
+        log.append(0, 0)
+        log.close()
+    assert logs[1].path != path
+    assert [read_session(log.path).events for log in logs] == [[(0, 0)], [(0, 0)]]
+
+
+def test_prune_sessions(tmp_path):
+    assert prune_sessions(tmp_path / "missing") == 0
+    names = [f"2024010{day}-120000-000000_a.log" for day in range(1, 6)]
+    for name in names:
+        (tmp_path / name).touch()
+    assert prune_sessions(tmp_path, keep=2) == 3
+    assert sorted(fp.name for fp in tmp_path.iterdir()) == names[-2:]
+    assert latest_session(tmp_path).name == names[-1]
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+IMPORT_TIME_BUDGET = 0.25
+"""Maximum time (in seconds) that importing the cli may take."""
+DEFERRED_MODULES = ("rich", "getchlib")
+"""Modules that should only be imported by code paths that need them."""
+
+
+def import_times(*args, env: dict = None) -> dict[str, float]:
+    """Run the cli with *args* and return the cumulative import time (in seconds) of each imported module."""
+    cmd = [sys.executable, "-X", "importtime", "-c", "from smart_agenda.cli import cli; cli(prog_name='smart-agenda')"]
+    proc = subprocess.run([*cmd, *args], env={**os.environ, **(env or {})}, capture_output=True, text=True)
+    rv = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and not line.endswith("imported package"):
+            _, cumulative, module = line.split("|")
+            rv[module.strip()] = int(cumulative) / 1e6
+    return rv
+
+
+@pytest.mark.parametrize(
+    "args,env",
+    [
+        (["--version"], None),
+        ([], {"_SMART_AGENDA_COMPLETE": "bash_complete", "COMP_WORDS": "smart-agenda --recent ", "COMP_CWORD": "2"}),
+    ],
+    ids=["version", "completion"],
+)
+def test_startup(args, env):
+    times = import_times(*args, env=env)
+    assert "smart_agenda.cli" in times
+    for module in DEFERRED_MODULES:
+        assert module not in times, f"{module} should not be imported on startup"
+    assert times["smart_agenda.cli"] < IMPORT_TIME_BUDGET, "importing the cli exceeds the startup time budget"
@@ -0,0 +1,115 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from smart_agenda.lib import Agenda
+from smart_agenda.store import INDEX_FILENAME, PACK_FILENAME, AgendaIndex, AgendaStore
+from smart_agenda.util import save_agenda
+
+
+def test_agenda_index(tmp_path):
+    index = AgendaIndex(tmp_path)
+    index.add("Weekly-Meeting_1", "Weekly Meeting", saved=1)
+    index.add("Weekly-Sync_2", "Weekly Sync", saved=3)
+    index.add("Retro_3", "Sprint Retro", saved=2)
+
+    index = AgendaIndex(tmp_path)
+    assert index.get("Retro_3").title == "Sprint Retro"
+    assert index.get("missing") is None
+    assert [entry.name for entry in index.find()] == ["Weekly-Sync_2", "Retro_3", "Weekly-Meeting_1"]
+    assert [entry.name for entry in index.find(prefix="Weekly")] == ["Weekly-Sync_2", "Weekly-Meeting_1"]
+    assert [entry.name for entry in index.search("weekly m")] == ["Weekly-Meeting_1"]
+
+
+def test_agenda_index_does_not_access_saved_agendas(tmp_path):
+    index = AgendaIndex(tmp_path)
+    index.add("agenda", "Title")
+    assert AgendaIndex(tmp_path).get("agenda") is not None, "index should be read without listing the directory"
+
+
+def test_agenda_index_rebuild(tmp_path):
+    (tmp_path / "first").write_text("# First\n\nItem 1:00\n")
+    index = AgendaIndex(tmp_path)
+    assert (tmp_path / INDEX_FILENAME).exists()
+    assert [(entry.name, entry.title) for entry in index.find()] == [("first", "First")]
+
+    # index becomes stale when directory is modified by others
+    (tmp_path / "second").write_text("Item 1:00\n")
+    os.utime(tmp_path, ns=(0, (tmp_path / INDEX_FILENAME).stat().st_mtime_ns + 1))
+    index = AgendaIndex(tmp_path)
+    assert index.get("second").title is None
+
+    (tmp_path / "first").unlink()
+    os.utime(tmp_path, ns=(0, (tmp_path / INDEX_FILENAME).stat().st_mtime_ns + 1))
+    assert AgendaIndex(tmp_path).get("first") is None
+
+
+def test_save_agenda(tmp_path):
+    content = "# Weekly\n\nItem 1:00\n"
+    name = save_agenda(Agenda.loads(content), content, parent=tmp_path / "agendas")
+    assert (tmp_path / "agendas" / name).read_text() == content
+    assert AgendaIndex(tmp_path / "agendas").get(name).title == "Weekly"
+    assert save_agenda(Agenda.loads(content), content, parent=tmp_path / "agendas") == name
+    assert sorted(fp.name for fp in (tmp_path / "agendas").iterdir()) == [INDEX_FILENAME, name]
+
+
+def save_many(store: AgendaStore, n: int):
+    for idx in range(n):
+        store.save(f"agenda_{idx}", f"Agenda {idx}", f"# Agenda {idx}\n" + "item 1:00\n" * 10)
+        store.touch(f"agenda_{idx}")
+        store.index.entries[f"agenda_{idx}"].used = idx  # deterministic order of use
+
+
+def test_agenda_store_pack(tmp_path):
+    store = AgendaStore(tmp_path, pack_threshold=4, keep_loose=2)
+    assert store.save("same", "Title", "# Title\nitem 1:00\n") == "same"
+    assert store.save("same_again", "Title", "# Title\nitem 1:00\n") == "same", "identical content is saved once"
+    store.index.entries["same"].used = -1
+    save_many(store, 10)
+    loose = sorted(fp.name for fp in tmp_path.iterdir() if not fp.name.startswith("."))
+    assert len(loose) <= 4 and "agenda_9" in loose and "same" not in loose
+    assert (tmp_path / PACK_FILENAME).exists()
+
+    store = AgendaStore(tmp_path)
+    assert store.read("same") == "# Title\nitem 1:00\n"
+    assert store.read("agenda_0").startswith("# Agenda 0\n")
+    assert store.index.get("agenda_0").packed and store.index.get("agenda_0").size < 60
+    with pytest.raises(FileNotFoundError):
+        store.read("missing")
+
+    # packed agendas are listed after the index is rebuilt
+    (tmp_path / INDEX_FILENAME).unlink()
+    index = AgendaIndex(tmp_path)
+    assert len(index.entries) == 11
+    assert index.get("agenda_1").title == "Agenda 1" and index.get("agenda_1").packed
+
+
+def test_agenda_store_eviction(tmp_path):
+    store = AgendaStore(tmp_path, max_bytes=200, pack_threshold=4, keep_loose=2)
+    save_many(store, 20)
+    assert sum(entry.size for entry in store.index.entries.values()) <= 200
+    assert store.index.get("agenda_19") is not None and store.index.get("agenda_0") is None
+    store = AgendaStore(tmp_path)
+    for name in store.index.entries:
+        assert store.read(name).startswith("# Agenda")
+    assert not [fp for fp in tmp_path.iterdir() if fp.name.endswith(".tmp")]
+
+
+def test_recent_packed_agenda(tmp_path):
+    store = AgendaStore(tmp_path / ".smart-agenda", pack_threshold=4, keep_loose=2)
+    save_many(store, 10)
+    assert store.index.get("agenda_3").packed
+    proc = subprocess.run(
+        [sys.executable, "-m", "smart_agenda", "--recent", "Agenda 3", "--output", "ndjson", "--tick", "10"],
+        input=b"n" * 10,
+        capture_output=True,
+        env={**os.environ, "HOME": str(tmp_path)},
+        timeout=10,
+    )
+    assert proc.returncode == 0, proc.stderr.decode()
+    records = [json.loads(line) for line in proc.stdout.splitlines()]
+    assert records[0]["title"] == "Agenda 3" and records[-1]["event"] == "complete"
+    assert AgendaIndex(store.parent).get("agenda_3").used > 9, "loading an agenda should count as a use"
@@ -0,0 +1,58 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from smart_agenda.terminal import KeyReader
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="requires a pseudo-terminal")
+
+
+@pytest.fixture()
+def tty():
+    import pty
+
+    controller, device = pty.openpty()
+    with os.fdopen(device) as stdin:
+        yield controller, stdin
+    os.close(controller)
+
+
+def test_key_reader(tty):
+    controller, stdin = tty
+    with KeyReader(stdin) as keys:
+        assert keys.read_key(timeout=0.01) == "", "no key pressed"
+        os.write(controller, b"n")
+        assert keys.read_key(timeout=1) == "n"
+        os.write(controller, b"\x1b[A")
+        assert keys.read_key(timeout=1) == "\x1b[A", "escape sequences should be read as a single key"
+
+
+def test_key_reader_wakeup(tty):
+    _, stdin = tty
+    with KeyReader(stdin) as keys:
+        threading.Timer(0.05, keys.wakeup).start()
+        start = time.monotonic()
+        assert keys.read_key(timeout=5) == ""
+        assert time.monotonic() - start < 1, "a wakeup should end waiting for a key"
+        assert keys.read_key(timeout=0.01) == "", "wakeups should be consumed"
+
+
+def test_key_reader_several_keys(tty):
+    controller, stdin = tty
+    with KeyReader(stdin) as keys:
+        os.write(controller, b"nn\x1b[B\x1b[B")
+        assert [keys.read_key(timeout=1) for _ in range(4)] == ["n", "n", "\x1b[B", "\x1b[B"]
+        assert keys.read_key(timeout=0.01) == "", "all keys should be consumed"
+
+
+def test_key_reader_pipe():
+    read_fd, write_fd = os.pipe()
+    with os.fdopen(read_fd) as stdin, KeyReader(stdin) as keys:
+        os.write(write_fd, "n\n\x1b[Bä\n\nb".encode())
+        os.close(write_fd)
+        keys_read = [keys.read_key(timeout=1) for _ in range(5)]
+        assert keys_read == ["n", "\x1b[B", "ä", "\n", "b"], "only newlines on empty lines should be enter keys"
+        assert keys.read_key(timeout=0.01) == "", "end of input was reached"
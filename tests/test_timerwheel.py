@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from smart_agenda.timerwheel import TimerWheel
+
+
+def test_timer_wheel_expires_timers_in_order():
+    rng = random.Random(0)
+    wheel = TimerWheel(resolution=0.1, n_slots=16)
+    deadlines = {key: rng.uniform(0, 10) for key in range(200)}  # many rounds of the wheel
+    for key, deadline in deadlines.items():
+        wheel.schedule(key, deadline)
+    assert len(wheel) == len(deadlines)
+
+    now, expired = 0.0, {}
+    while len(wheel):
+        next_deadline = wheel.next_deadline()
+        assert next_deadline > now
+        now = min(now + rng.uniform(0, 0.5), next_deadline)
+        for key in wheel.advance(now):
+            expired[key] = now
+    assert expired.keys() == deadlines.keys()
+    for key, deadline in deadlines.items():
+        assert deadline - 1e-9 <= expired[key] < deadline + 0.5 + 0.1, "timers expire at most one step late"
+
+
+def test_timer_wheel_reschedule_and_cancel():
+    wheel = TimerWheel(resolution=0.1, now=0.0)
+    wheel.schedule("a", 0.5)
+    wheel.schedule("a", 2.0)
+    wheel.schedule("b", 1.0)
+    wheel.cancel("b")
+    wheel.cancel("missing")
+    assert "a" in wheel and "b" not in wheel
+    assert wheel.advance(1.5) == []
+    assert wheel.next_deadline() == 2.0
+    assert wheel.advance(2.0) == ["a"]
+    assert wheel.next_deadline() is None
+
+
+def test_timer_wheel_overdue_timer():
+    wheel = TimerWheel(resolution=0.1, now=5.0)
+    wheel.schedule("late", 1.0)
+    assert wheel.next_deadline() == pytest.approx(5.1)
+    assert wheel.advance(5.1) == ["late"]